@@ -3,6 +3,7 @@ import { NextRequest, NextResponse } from "next/server";
 export const runtime = "nodejs";
 import bcrypt from "bcryptjs";
 import { prisma } from "@/utils/actions/database/prisma";
+import { indexUsers } from "@/utils/actions/notifications/userIndex";
 
 function isValidEmail(email: string) {
   return /^[^\s@]+@[^\s@]+\.[^\s@]+$/.test(email);
@@ -71,6 +72,9 @@ export async function POST(request: NextRequest) {
       // }
     });
 
+    // New users are notified of matching schemes without waiting for an index rebuild
+    await indexUsers([user]);
+
     return NextResponse.json(
       { message: "User created successfully", user },
       { status: 201 }
@@ -2,15 +2,8 @@
 import { prisma } from "@/utils/actions/database/prisma";
 import { NextRequest, NextResponse } from "next/server";
 
-// Map categories to keywords
-const categories: Record<string, string[]> = {
-  education: ["education", "school", "college", "scholarship"],
-  agriculture: ["agriculture", "farmer", "farming", "crop"],
-  health: ["health", "hospital", "insurance", "medical"],
-  women: ["women", "female", "girl"],
-  seniorCitizen: ["senior", "elderly", "old", "retirement"],
-  employment: ["employment", "job", "skill", "training"],
-};
+// Category keys as written by src/scripts/categorize.py (configurable there)
+const CATEGORY_KEY = /^[A-Za-z][A-Za-z0-9_-]*$/;
 
 export async function GET(
   req: NextRequest,
@@ -19,24 +12,18 @@ export async function GET(
   // Await the params property to correctly destructure it
   const { category } = await context.params;
 
-  if (!categories[category]) {
+  if (!CATEGORY_KEY.test(category)) {
     return NextResponse.json({ error: "Invalid category" }, { status: 400 });
   }
 
   try {
-    const keywords = categories[category].map((k) => k.toLowerCase());
-
-    // Fetch all schemes that have tags
+    // Indexed read of the materialised Scheme.categories
     const schemes = await prisma.scheme.findMany({
+      where: { categories: { has: category } },
       select: { id: true, name: true, link: true, tags: true },
     });
 
-    // Filter only schemes whose tags match category keywords
-    const filteredSchemes = schemes.filter((scheme) =>
-      (scheme.tags || []).some((tag) => keywords.includes(tag.toLowerCase()))
-    );
-
-    return NextResponse.json({ schemes: filteredSchemes });
+    return NextResponse.json({ schemes });
   } catch (err) {
     console.error("❌ Error fetching schemes for category:", err);
     return NextResponse.json({ error: "Failed to fetch schemes" }, { status: 500 });
@@ -1,9 +1,8 @@
 import { NextRequest, NextResponse } from "next/server";
 
-import { execFile } from "child_process";
-import path from "path";
 import { auth } from "@/utils/actions/auth/auth";
 import { prisma } from "@/utils/actions/database/prisma";
+import { checkEligibilityInWorker } from "@/utils/actions/eligibility/eligibilityWorker";
 
 
 export async function POST(
@@ -48,19 +47,8 @@ export async function POST(
       return NextResponse.json({ error: "Scheme not found" }, { status: 404 });
     }
 
-    // 2️⃣ Call Python script
-    const pythonScriptPath = path.join(process.cwd(), "src/scripts/user_eligibility.py");
-    const userData = JSON.stringify(user);
-    const schemeData = JSON.stringify([scheme]);
-
-    const result: string = await new Promise((resolve, reject) => {
-      execFile("python3", [pythonScriptPath, userData, schemeData], (error, stdout) => {
-        if (error) return reject(error);
-        resolve(stdout);
-      });
-    });
-
-    const parsedResult = JSON.parse(result);
+    // 2️⃣ Ask the shared Python eligibility worker
+    const parsedResult = await checkEligibilityInWorker(user, [scheme]);
     return NextResponse.json(parsedResult);
   } catch (error) {
     console.error("❌ Error in eligibility check:", error);
@@ -1,6 +1,7 @@
 //src/app/api/scheme-details/parse-eligibility/route.ts
 import { PrismaClient } from "@prisma/client";
-import { exec } from "child_process";
+import { spawn } from "child_process";
+import readline from "readline";
 
 const prisma = new PrismaClient();
 
@@ -27,41 +28,83 @@ export async function GET() {
 
   let updatedCount = 0;
 
-  for (const scheme of pending) {
-    await new Promise((resolve) => {
-      const eligibilityText = scheme.eligibility?.replace(/"/g, '\\"') || "";
-      const defaultState = scheme.state ? scheme.state.replace(/"/g, '\\"') : "";
-      const defaultMinistry = scheme.ministry ? scheme.ministry.replace(/"/g, '\\"') : "";
-
-      // Call Python script with eligibility text, state, and ministry
-      exec(
-        `python3 src/scripts/eligibility.py "${eligibilityText}" "${defaultState}" "${defaultMinistry}"`,
-        { maxBuffer: 1024 * 1024 * 5 },
-        async (error, stdout) => {
-          if (error) {
-            console.error("❌ Error parsing eligibility:", error.message);
-            return resolve(null);
-          }
-
-          try {
-            const parsed = JSON.parse(stdout);
-
-            await prisma.scheme.update({
-              where: { id: scheme.id },
-              data: {
-                eligible: [parsed], // Save structured JSON
-              },
-            });
-
-            updatedCount++;
-            resolve(true);
-          } catch (err) {
-            console.error("⚠️ Failed to parse JSON for scheme:", scheme.id, err);
-            resolve(null);
-          }
-        }
-      );
+  // One Python process for the whole batch: JSONL in on stdin, JSONL out on stdout
+  // Parses are memoised across runs, so unchanged boilerplate is not re-parsed
+  const py = spawn("python3", [
+    "src/scripts/eligibility.py",
+    "--stream",
+    "--cache",
+    "src/scripts/.eligibility_cache.sqlite",
+  ]);
+  py.stderr.on("data", (data) => {
+    const text = data.toString();
+    if (text.startsWith('{"cache"')) console.log("📊 Eligibility parse cache:", text.trim());
+    else console.error("❌ Error parsing eligibility:", text);
+  });
+  // Settles when the child is gone: it exited, or could not start (no python3)
+  let spawnError: Error | null = null;
+  let ended = false;
+  const exited = new Promise<void>((resolve) => {
+    py.on("error", (err) => {
+      spawnError = err;
+      ended = true;
+      resolve();
+    });
+    py.on("close", () => {
+      ended = true;
+      resolve();
     });
+  });
+  // EPIPE when the child dies mid-feed; its close ends the feed below
+  py.stdin.on("error", (err) => console.error("❌ Eligibility parser stdin:", err.message));
+
+  // Feed records with backpressure so a large backlog never sits in memory twice
+  const feed = (async () => {
+    for (const scheme of pending) {
+      if (ended) return;
+      const line = JSON.stringify({
+        id: scheme.id,
+        eligibility: scheme.eligibility || "",
+        state: scheme.state || "",
+        ministry: scheme.ministry || "",
+      });
+      if (!py.stdin.write(line + "\n")) {
+        // A dead child never drains, so stop waiting when it exits
+        await Promise.race([new Promise((resolve) => py.stdin.once("drain", resolve)), exited]);
+      }
+    }
+    py.stdin.end();
+  })();
+
+  for await (const line of readline.createInterface({ input: py.stdout })) {
+    try {
+      const result = JSON.parse(line);
+      if (result.error) {
+        console.error("⚠️ Failed to parse eligibility for scheme:", result.id, result.error);
+        continue;
+      }
+
+      await prisma.scheme.update({
+        where: { id: result.id },
+        data: {
+          eligible: [result.parsed], // Save structured JSON
+        },
+      });
+
+      updatedCount++;
+    } catch (err) {
+      console.error("⚠️ Failed to parse JSON for line:", line, err);
+    }
+  }
+
+  await feed;
+  await exited;
+
+  if (spawnError) {
+    return new Response(
+      JSON.stringify({ error: `Failed to start eligibility parser: ${(spawnError as Error).message}` }),
+      { status: 500 }
+    );
   }
 
   return new Response(
@@ -1,19 +1,41 @@
 // src/app/api/scheme-details/route.ts
 import { PrismaClient } from "@prisma/client";
-import { exec } from "child_process";
+import { NextRequest } from "next/server";
+import { spawn } from "child_process";
+import readline from "readline";
+import { categorizeSchemes } from "@/utils/actions/schemes/categorize";
 
 const prisma = new PrismaClient();
 
-export async function GET() {
+// Per-link ETag / Last-Modified and section hashes; unchanged pages are not re-emitted
+const FINGERPRINTS = "src/scripts/.fingerprints.sqlite";
+
+// Confirm the saved links, so a scheme whose update failed is emitted again next crawl
+function acknowledge(links: string[]) {
+  return new Promise<void>((resolve) => {
+    const ack = spawn("python3", ["src/scripts/fingerprints.py", "ack", FINGERPRINTS]);
+    ack.on("error", (err) => {
+      console.error("⚠️ Failed to acknowledge fingerprints:", err);
+      resolve();
+    });
+    ack.stderr.on("data", (data) => console.error("⚠️ Fingerprint ack:", data.toString()));
+    ack.on("close", () => resolve());
+    ack.stdin.end(links.join("\n") + "\n");
+  });
+}
+
+// GET ?recrawl=1 re-checks every scheme (conditional fetches; only changed pages are updated)
+export async function GET(req: NextRequest) {
+  const recrawl = req.nextUrl.searchParams.get("recrawl") === "1";
 
   const incomplete = await prisma.scheme.count({
   where: { detailsFetched: false },
 });
 console.log("DB check incomplete count:", incomplete);
 
-  // STEP 1: Fetch only incomplete schemes
+  // STEP 1: Fetch incomplete schemes (every scheme on a re-crawl)
   const incompleteSchemes = await prisma.scheme.findMany({
-    where: { detailsFetched: false },
+    where: recrawl ? {} : { detailsFetched: false },
     select: {
       id: true,
       link: true,
@@ -43,65 +65,95 @@ console.log("DB check incomplete count:", incomplete);
   console.log(`🟡 Found ${incompleteSchemes.length} incomplete schemes. Starting scraper...`);
 
   let updatedCount = 0;
+  const savedLinks: string[] = [];
+  const savedIds: string[] = [];
 
-  for (const s of incompleteSchemes) {
-    await new Promise((resolve) => {
-      exec(
-        `python3 src/scripts/scraper_details.py "${s.link}"`,
-        { maxBuffer: 1024 * 1024 * 10 },
-        async (error, stdout) => {
-          if (error) {
-            console.error("❌ Error scraping:", s.link, error.message);
-            return resolve(null);
-          }
-
-          try {
-            const data = JSON.parse(stdout);
-
-            // Update DB without touching name and link
-            await prisma.scheme.update({
-              where: { id: s.id },
-              data: {
-                state: data.state || s.state,
-                ministry: data.ministry || s.ministry,
-                tags: data.tags?.length ? data.tags : s.tags,
-                details: data.details || s.details,
-                benefits: data.benefit || s.benefits,
-                eligibility: data.eligibility || s.eligibility,
-                application_process: data.application_process || s.application_process,
-                documents_required: data.documents_required || s.documents_required,
-                faqs: data.faq?.length ? data.faq : s.faqs,
-                sources_and_resources: data.sources_and_references?.length
-                  ? data.sources_and_references
-                  : s.sources_and_resources,
-              },
-            });
-
-            // Check if all required fields are now populated
-            const allFilled =
-              (data.details || s.details) &&
-              (data.benefit || s.benefits) &&
-              (data.eligibility || s.eligibility) &&
-              (data.application_process || s.application_process) &&
-              (data.documents_required || s.documents_required);
-
-            if (allFilled) {
-              await prisma.scheme.update({
-                where: { id: s.id },
-                data: { detailsFetched: true },
-              });
-            }
-
-            updatedCount++;
-            resolve(true);
-          } catch (error) {
-            console.error("❌ Failed to parse scraper output for:", s.link, error);
-            resolve(null);
-          }
-        }
-      );
-    });
+  const byLink = new Map(incompleteSchemes.map((s) => [s.link, s]));
+
+  // One HTTP-first scraper process (Selenium pool only for pages that need it); results stream back as JSON lines
+  const py = spawn("python3", ["src/scripts/scraper_http.py", "--fingerprints", FINGERPRINTS]);
+  py.stderr.on("data", (data) => console.error("❌ Error scraping:", data.toString()));
+  let spawnError: Error | null = null;
+  py.on("error", (err) => {
+    spawnError = err;
+  });
+  // EPIPE if the scraper dies before reading every link; stdout then ends and so does the loop
+  py.stdin.on("error", (err) => console.error("❌ Scraper stdin:", err.message));
+  const exited = new Promise((resolve) => py.on("close", resolve));
+  py.stdin.end(incompleteSchemes.map((s) => s.link).join("\n") + "\n");
+
+  for await (const line of readline.createInterface({ input: py.stdout })) {
+    let data: Record<string, any>;
+    try {
+      data = JSON.parse(line);
+    } catch (error) {
+      console.error("❌ Failed to parse scraper output:", line, error);
+      continue;
+    }
+
+    const s = byLink.get(data.link);
+    if (!s) continue;
+    if (data.error) {
+      console.error("❌ Error scraping:", s.link, data.error);
+      continue;
+    }
+
+    try {
+      // Update DB without touching name and link
+      await prisma.scheme.update({
+        where: { id: s.id },
+        data: {
+          state: data.state || s.state,
+          ministry: data.ministry || s.ministry,
+          tags: data.tags?.length ? data.tags : s.tags,
+          details: data.details || s.details,
+          benefits: data.benefit || s.benefits,
+          eligibility: data.eligibility || s.eligibility,
+          application_process: data.application_process || s.application_process,
+          documents_required: data.documents_required || s.documents_required,
+          faqs: data.faq?.length ? data.faq : s.faqs,
+          sources_and_resources: data.sources_and_references?.length
+            ? data.sources_and_references
+            : s.sources_and_resources,
+          // Fingerprinted crawls list changed sections; re-parse eligibility only when it changed
+          ...(data.changed?.includes("eligibility") && { eligible: [] }),
+        },
+      });
+
+      // Check if all required fields are now populated
+      const allFilled =
+        (data.details || s.details) &&
+        (data.benefit || s.benefits) &&
+        (data.eligibility || s.eligibility) &&
+        (data.application_process || s.application_process) &&
+        (data.documents_required || s.documents_required);
+
+      if (allFilled) {
+        await prisma.scheme.update({
+          where: { id: s.id },
+          data: { detailsFetched: true },
+        });
+      }
+
+      updatedCount++;
+      savedLinks.push(s.link);
+      savedIds.push(s.id);
+    } catch (error) {
+      console.error("❌ Failed to update scheme:", s.link, error);
+    }
+  }
+
+  // The scraper commits its staged fingerprints on exit
+  await exited;
+  if (spawnError) {
+    return new Response(
+      JSON.stringify({ error: `Failed to start scraper_http.py: ${(spawnError as Error).message}` }),
+      { status: 500 }
+    );
   }
+  await acknowledge(savedLinks);
+  // Details feed the categories; don't wait for the nightly run
+  await categorizeSchemes(savedIds);
 
   const totalSchemes = await prisma.scheme.count();
   const fullyFetched = await prisma.scheme.count({ where: { detailsFetched: true } });
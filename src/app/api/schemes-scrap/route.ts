@@ -1,21 +1,33 @@
 // src/app/api/schemes-scrap/route.ts
 import { notifyUsersForNewScheme } from "@/utils/actions/notifications/sendSchemeEmail";
 import { PrismaClient } from "@prisma/client";
-import { exec } from "child_process";
-import { promisify } from "util";
+import { spawn } from "child_process";
+import { appendFile, rm } from "fs/promises";
+import readline from "readline";
 
 const prisma = new PrismaClient();
-const execAsync = promisify(exec);
+
+// Links saved so far; scraper.py skips them when an interrupted run resumes
+const CHECKPOINT = "src/scripts/.scraper_checkpoint";
 
 export async function GET(): Promise<Response> {
   try {
-    const { stdout } = await execAsync("python3 src/scripts/scraper.py", {
-      maxBuffer: 1024 * 1024 * 10,
-    });
+    // Rows stream in as JSON lines; an interrupted run resumes from the checkpoint
+    const py = spawn("python3", [
+      "src/scripts/scraper.py",
+      "--checkpoint",
+      CHECKPOINT,
+    ]);
+    py.stderr.on("data", (data) => console.error("❌ Scraper:", data.toString()));
+    // A spawn failure (no python3) is followed by close with a non-zero code
+    py.on("error", (err) => console.error("❌ Failed to start scraper.py:", err));
+    const exitCode = new Promise<number | null>((resolve) => py.on("close", resolve));
 
-    const schemes = JSON.parse(stdout);
+    let count = 0;
+    for await (const line of readline.createInterface({ input: py.stdout })) {
+      if (!line.trim()) continue;
+      const s = JSON.parse(line);
 
-    for (const s of schemes) {
       const newScheme = await prisma.scheme.upsert({
         where: { link: s.link },
         update: { name: s.name },
@@ -24,10 +36,22 @@ export async function GET(): Promise<Response> {
 
       // ✅ Notify users
       await notifyUsersForNewScheme(newScheme.id);
+      // Checkpoint only once the row is saved, so a crash here re-emits it on resume
+      await appendFile(CHECKPOINT, s.link + "\n");
+      count++;
+    }
+
+    // A failed or empty listing load exits non-zero and keeps the checkpoint
+    const code = await exitCode;
+    if (code !== 0) {
+      throw new Error(`scraper.py exited with code ${code} after ${count} schemes`);
     }
 
+    // Finished cleanly: the next run starts from the top
+    await rm(CHECKPOINT, { force: true });
+
     return new Response(
-      JSON.stringify({ message: "Scraping complete", count: schemes.length }),
+      JSON.stringify({ message: "Scraping complete", count }),
       { status: 200 }
     );
   } catch (error: any) {
@@ -1,7 +1,7 @@
 import { auth } from "@/utils/actions/auth/auth";
 import { prisma } from "@/utils/actions/database/prisma";
 import { NextRequest, NextResponse } from "next/server";
-import { spawn } from "child_process";
+import { checkEligibilityInWorker } from "@/utils/actions/eligibility/eligibilityWorker";
 import { toast } from "sonner";
 
 export async function GET(  request: NextRequest,
@@ -54,37 +54,13 @@ export async function POST(
       return NextResponse.json({ error: "Scheme not found" }, { status: 404 });
     }
 
-    // 4️⃣ Run Python script
-    const pythonResult: { eligible: boolean; reasons: string[] } = await new Promise((resolve) => {
-      const py = spawn("python3", [
-        "src/scripts/user_eligibility.py",
-        JSON.stringify(user),
-        JSON.stringify(scheme.eligible)
-      ]);
-
-      let output = "";
-      let errorOutput = "";
-
-      py.stdout.on("data", (data) => { output += data.toString(); });
-      py.stderr.on("data", (data) => { errorOutput += data.toString(); });
-
-      py.on("close", (code) => {
-        if (code !== 0) {
-          console.error("❌ Python script error:", errorOutput);
-          return resolve({ eligible: false, reasons: ["Python script failed"] });
-        }
-        try {
-          const result = JSON.parse(output.trim());
-          resolve(result);
-        } catch (err: unknown) {
-      // Safely check if `err` is an instance of `Error`
-      if (err instanceof Error) {
-        toast.error(err.message);
-      } else {
-        toast.error("❌ An unexpected error occurred.");
-      }
-    }
-      });
+    // 4️⃣ Ask the shared Python eligibility worker
+    const pythonResult: { eligible: boolean; reasons: string[] } = await checkEligibilityInWorker<{
+      eligible: boolean;
+      reasons: string[];
+    }>(user, scheme.eligible).catch((err) => {
+      console.error("❌ Python worker error:", err);
+      return { eligible: false, reasons: ["Python script failed"] };
     });
 
     // 5️⃣ Optional: check state constraints
@@ -2,39 +2,98 @@
 import { NextRequest, NextResponse } from "next/server";
 import { PrismaClient } from "@prisma/client";
 import { notifyUsersForNewScheme } from "@/utils/actions/notifications/sendSchemeEmail";
+import { categorizeSchemes } from "@/utils/actions/schemes/categorize";
 import { toast } from "sonner";
 
 
 const prisma = new PrismaClient();
 
+type SchemeInput = Record<string, any>;
+
+function schemeData(data: SchemeInput) {
+  return {
+    name: data.name,
+    state: data.state || null,
+    ministry: data.ministry || null,
+    tags: data.tags || [],
+    details: data.details || null,
+    eligibility: data.eligibility || null,
+    benefits: data.benefits || null,
+    application_process: data.application_process || null,
+    documents_required: data.documents_required || null,
+    faqs: data.faqs || [],
+    sources_and_resources: data.sources_and_resources || [],
+    detailsFetched: data.detailsFetched || false,
+    eligible: data.eligible || [],
+  };
+}
+
+const CREATE_ONLY = ["detailsFetched", "eligible"];
+
+/**
+ * Fields to change on an existing scheme: only those present in the payload, and
+ * never detailsFetched / eligible, which belong to the details crawl. A listing
+ * re-post therefore leaves fetched details and parsed criteria alone.
+ */
+function updateData(data: SchemeInput) {
+  return Object.fromEntries(
+    Object.entries(schemeData(data)).filter(([key]) => !CREATE_ONLY.includes(key) && data[key] !== undefined)
+  );
+}
+
+/**
+ * Create or update one scheme keyed on its link, so retried uploads are idempotent.
+ * Users are only notified the first time a link is seen.
+ */
+async function saveScheme(data: SchemeInput) {
+  const existing = await prisma.scheme.findUnique({
+    where: { link: data.link },
+    select: { id: true },
+  });
+
+  const scheme = await prisma.scheme.upsert({
+    where: { link: data.link },
+    create: { ...schemeData(data), link: data.link },
+    update: updateData(data),
+  });
+
+  // ✅ Notify users
+  if (!existing) await notifyUsersForNewScheme(scheme.id);
+
+  return scheme;
+}
+
 export async function POST(req: NextRequest) {
   try {
     const data = await req.json();
+
+    // Batch upload: an array of schemes, one result per item
+    if (Array.isArray(data)) {
+      const results = [];
+      const savedIds: string[] = [];
+      for (const item of data) {
+        if (!item?.name || !item?.link) {
+          results.push({ link: item?.link ?? null, ok: false, error: "Name and Link are required" });
+          continue;
+        }
+        try {
+          const scheme = await saveScheme(item);
+          results.push({ link: item.link, ok: true, id: scheme.id });
+          savedIds.push(scheme.id);
+        } catch (err: unknown) {
+          results.push({ link: item.link, ok: false, error: err instanceof Error ? err.message : "Unexpected error" });
+        }
+      }
+      await categorizeSchemes(savedIds);
+      return NextResponse.json({ message: "Schemes processed", results });
+    }
+
     if (!data.name || !data.link) {
       return NextResponse.json({ message: "Name and Link are required" }, { status: 400 });
     }
 
-    const newScheme = await prisma.scheme.create({
-      data: {
-        name: data.name,
-        state: data.state || null,
-        ministry: data.ministry || null,
-        tags: data.tags || [],
-        details: data.details || null,
-        eligibility: data.eligibility || null,
-        benefits: data.benefits || null,
-        application_process: data.application_process || null,
-        documents_required: data.documents_required || null,
-        faqs: data.faqs || [],
-        sources_and_resources: data.sources_and_resources || [],
-        link: data.link,
-        detailsFetched: data.detailsFetched || false,
-        eligible: data.eligible || [],
-      },
-    });
-
-    // ✅ Notify users
-    await notifyUsersForNewScheme(newScheme.id);
+    const newScheme = await saveScheme(data);
+    await categorizeSchemes([newScheme.id]);
 
     return NextResponse.json({ message: "Scheme added successfully", scheme: newScheme });
   }  catch (err: unknown) {
@@ -44,5 +103,6 @@ export async function POST(req: NextRequest) {
       } else {
         toast.error("❌ An unexpected error occurred.");
       }
+      return NextResponse.json({ error: "Internal server error" }, { status: 500 });
     }
 }
@@ -3,47 +3,33 @@ import { NextResponse } from "next/server";
 
 const prisma = new PrismaClient();
 
-// Define categories and their matching keywords
-const categories: Record<string, string[]> = {
-  education: ["education", "school", "college", "scholarship"],
-  agriculture: ["agriculture", "farmer", "farming", "crop"],
-  health: ["health", "hospital", "insurance", "medical"],
-  women: ["women", "female", "girl"],
-  seniorCitizen: ["senior", "elderly", "old", "retirement"],
-  employment: ["employment", "job", "skill", "training"]
-};
+// Categories are assigned once per crawl by src/scripts/categorize.py (Scheme.categories)
+const DEFAULT_CATEGORIES = ["education", "agriculture", "health", "women", "seniorCitizen", "employment"];
 
 export async function GET() {
   try {
-    // 1️⃣ Fetch all schemes with tags
+    // 1️⃣ Fetch only categorised schemes, with their stored categories
     const schemes = await prisma.scheme.findMany({
+      where: { categories: { isEmpty: false } },
       select: {
         id: true,
         name: true,
         link: true,
-        tags: true
+        tags: true,
+        categories: true
       }
     });
 
-    // 2️⃣ Categorize schemes
-    const categorized: Record<string, typeof schemes> = {
-      education: [],
-      agriculture: [],
-      health: [],
-      women: [],
-      seniorCitizen: [],
-      employment: []
-    };
+    // 2️⃣ Group by the materialised categories (extra configured ones are included too)
+    const categorized: Record<string, Omit<(typeof schemes)[number], "categories">[]> = {};
+    for (const category of DEFAULT_CATEGORIES) categorized[category] = [];
 
-    schemes.forEach((scheme) => {
-      const schemeTags = (scheme.tags || []).map((t) => t.toLowerCase());
-
-      for (const [category, keywords] of Object.entries(categories)) {
-        if (schemeTags.some((tag) => keywords.includes(tag))) {
-          categorized[category].push(scheme);
-        }
+    for (const { categories, ...scheme } of schemes) {
+      for (const category of categories) {
+        if (!categorized[category]) categorized[category] = [];
+        categorized[category].push(scheme);
       }
-    });
+    }
 
     // 3️⃣ Return response
     return NextResponse.json({ categorized });
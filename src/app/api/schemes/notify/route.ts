@@ -1,9 +1,14 @@
 import { NextRequest, NextResponse } from "next/server";
 import { PrismaClient } from "@prisma/client";
+import { spawn } from "child_process";
+import readline from "readline";
 import { sendEmail } from "@/utils/actions/notifications/notifications";
 
 const prisma = new PrismaClient();
 
+// Reverse index of user profiles, rebuilt from the database when missing
+const USER_INDEX = "src/scripts/.user_index.json";
+
 export async function POST(req: NextRequest) {
   try {
     const { schemeId } = await req.json();
@@ -26,39 +31,38 @@ export async function POST(req: NextRequest) {
       : scheme.state
       ? [scheme.state]
       : [];
-    const schemeMinistry = scheme.ministry?.trim().toLowerCase();
-
-    // 2️⃣ Fetch all users
-    const users = await prisma.user.findMany();
-
-    for (const user of users) {
-      const userState = user.state?.trim().toLowerCase();
-
-      // 3️⃣ Determine if notification should be sent
-      let shouldNotify = false;
 
-      for (const s of schemeStates) {
-        const normalizedState = s.trim().toLowerCase();
+    // 2️⃣ Matching user ids come from the index in batches, not from scanning every user
+    const py = spawn("python3", [
+      "src/scripts/user_index.py",
+      "match",
+      USER_INDEX,
+      "--scheme-id",
+      schemeId,
+    ]);
+    py.stderr.on("data", (data) => console.error("❌ User index error:", data.toString()));
+    // A spawn failure (no python3) is followed by close with a non-zero code
+    py.on("error", (err) => console.error("❌ Failed to start user_index.py:", err));
+    const exited = new Promise<number>((resolve) => py.on("close", resolve));
 
-        // If the state entry starts with ministry name, notify everyone
-        if (schemeMinistry && normalizedState.startsWith(schemeMinistry)) {
-          shouldNotify = true;
-          break;
-        }
+    let sent = 0;
+    let failed = 0;
+    for await (const line of readline.createInterface({ input: py.stdout })) {
+      const { userIds, error } = JSON.parse(line);
+      if (error) throw new Error(error);
 
-        // Otherwise check if user state matches scheme state
-        if (userState && normalizedState === userState) {
-          shouldNotify = true;
-          break;
-        }
-      }
+      const users = await prisma.user.findMany({
+        where: { id: { in: userIds }, email: { not: null } },
+        select: { email: true, name: true },
+      });
 
-      // 4️⃣ Send email if needed
-      if (shouldNotify && user.email) {
-        await sendEmail(
-          user.email,
-          `New Scheme: ${scheme.name}`,
-          `
+      // 3️⃣ Send one batch of emails concurrently
+      const results = await Promise.allSettled(
+        users.map((user) =>
+          sendEmail(
+            user.email!,
+            `New Scheme: ${scheme.name}`,
+            `
             <h3>Hi ${user.name},</h3>
             <p>A new government scheme matching your preferences has been added:</p>
             <p><strong>${scheme.name}</strong></p>
@@ -67,11 +71,18 @@ export async function POST(req: NextRequest) {
             <p><a href="${scheme.link || "#"}">View Scheme Details</a></p>
             <p>Regards,<br/>Gov Scheme Portal</p>
           `
-        );
-      }
+          )
+        )
+      );
+      sent += results.filter((r) => r.status === "fulfilled").length;
+      failed += results.filter((r) => r.status === "rejected").length;
+    }
+
+    if ((await exited) !== 0) {
+      throw new Error("user_index.py exited with an error");
     }
 
-    return NextResponse.json({ message: "Notifications sent successfully" });
+    return NextResponse.json({ message: "Notifications sent successfully", sent, failed });
   } catch (err) {
     console.error("Error sending notifications:", err);
     return NextResponse.json({ message: "Internal server error" }, { status: 500 });
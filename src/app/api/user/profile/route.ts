@@ -2,6 +2,7 @@
 import { prisma } from "@/utils/actions/database/prisma";
 import { auth } from "@/utils/actions/auth/auth";
 import { NextRequest, NextResponse } from "next/server";
+import { indexUsers } from "@/utils/actions/notifications/userIndex";
 
 export async function GET(_: NextRequest) {
   const session = await auth();
@@ -62,6 +63,8 @@ export async function PUT(req: NextRequest) {
     });
 
     console.log(`✅ Profile updated for user: ${updatedUser.name} (${updatedUser.id})`);
+    // Keep the notification reverse index in step with profile edits
+    await indexUsers([updatedUser]);
 
     // (Eligibility + Email sending logic remains the same as your code)
     // ...
@@ -0,0 +1,4 @@
+# src/scripts/benchmarks
+# Micro-benchmarks for the Python hot paths over a deterministic synthetic corpus.
+# Run from src/scripts:  python3 -m benchmarks --help
+# CLI startup (imports, driver resolution):  python3 -m benchmarks.startup
@@ -0,0 +1,136 @@
+# src/scripts/benchmarks/__main__.py
+# Runs the benchmark cases, reports throughput and peak memory, and compares
+# against a stored baseline. Baselines are machine-specific: record one with
+# --save on the machine that will run the comparisons.
+#
+#   cd src/scripts && python3 -m benchmarks --scale 1k,10k
+#   cd src/scripts && python3 -m benchmarks --scale 1k --save
+import gc
+import os
+import sys
+import json
+import time
+import statistics
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.cases import CASES
+from benchmarks.corpus import SCALES
+
+BASELINE_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25     # fail when 25% slower / bigger than the baseline
+MEMORY_FLOOR = 64 * 1024     # peaks below this are too small to compare
+
+
+def run_case(name: str, scale: str, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Best/median wall time over `repeat` runs, then one traced run for peak memory."""
+    fn, items = CASES[name](SCALES[scale])
+    fn()                                        # warm-up: imports, caches, allocator
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "case": name,
+        "scale": scale,
+        "items": items,
+        "best": round(best, 6),
+        "median": round(statistics.median(times), 6),
+        "itemsPerSecond": round(items / best, 1) if best else None,
+        "peakBytes": peak,
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Human-readable regressions of results against baseline["results"]."""
+    regressions = []
+    for r in results:
+        base = baseline.get("results", {}).get(f"{r['case']}@{r['scale']}")
+        if not base:
+            continue
+        if r["best"] > base["best"] * (1 + threshold):
+            regressions.append(f"{r['case']}@{r['scale']}: {r['best']:.4f}s vs baseline "
+                               f"{base['best']:.4f}s (+{r['best'] / base['best'] - 1:.0%})")
+        if base["peakBytes"] >= MEMORY_FLOOR and r["peakBytes"] > base["peakBytes"] * (1 + threshold):
+            regressions.append(f"{r['case']}@{r['scale']}: peak {r['peakBytes']} B vs baseline "
+                               f"{base['peakBytes']} B (+{r['peakBytes'] / base['peakBytes'] - 1:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks", description="Python hot-path benchmarks")
+    parser.add_argument("--scale", default="1k", help=f"comma-separated scales from {', '.join(SCALES)}")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against / save to")
+    parser.add_argument("--save", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scale.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    results, skipped = [], []
+    for name in args.case or list(CASES):
+        for scale in scales:
+            try:
+                result = run_case(name, scale, args.repeat)
+            except ImportError as e:
+                skipped.append({"case": name, "scale": scale, "reason": str(e)})
+                continue
+            results.append(result)
+            if not args.json:
+                print(f"⏱️  {name:<24} {scale:>5}  best {result['best']:.4f}s  "
+                      f"median {result['median']:.4f}s  {result['itemsPerSecond']:>12,.0f} items/s  "
+                      f"peak {result['peakBytes'] / 1024:,.0f} KiB", flush=True)
+
+    regressions = []
+    if args.save:
+        # Keep entries for cases/scales not run this time
+        baseline = {"version": BASELINE_VERSION, "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline["results"].update({f"{r['case']}@{r['scale']}": r for r in results})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    if args.json:
+        print(json.dumps({"results": results, "skipped": skipped, "regressions": regressions}, indent=2))
+    else:
+        for s in skipped:
+            print(f"⚠️  skipped {s['case']}@{s['scale']}: {s['reason']}")
+        if args.save:
+            print(f"✅ Baseline saved to {args.baseline}")
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# src/scripts/benchmarks/cases.py
+# One entry per hot function. A case builds its inputs for a scale outside the
+# timed region and returns (callable, items): one call processes `items` items.
+from typing import Callable, Dict, Tuple
+
+from benchmarks.corpus import generate_schemes, generate_users
+
+CHECK_CATALOG = 100         # schemes each user is checked against in check_eligibility
+
+
+def parse_eligibility_case(n: int) -> Tuple[Callable, int]:
+    from eligibility import parse_eligibility
+
+    records = [(s["eligibility"], s["state"] or None, s["ministry"]) for s in generate_schemes(n)]
+    return (lambda: [parse_eligibility(*r) for r in records]), n
+
+
+def parse_eligibility_text_case(n: int) -> Tuple[Callable, int]:
+    from scraper_save_eligibility import parse_eligibility_text
+
+    texts = [s["eligibility"] for s in generate_schemes(n)]
+    return (lambda: [parse_eligibility_text(t) for t in texts]), n
+
+
+def is_state_match_case(n: int) -> Tuple[Callable, int]:
+    from user_eligibility import is_state_match
+
+    users = generate_users(n)
+    criteria = [e for s in generate_schemes(n) for e in s["eligible"]] or [{"state": []}]
+    pairs = [(u["state"], criteria[i % len(criteria)]["state"]) for i, u in enumerate(users)]
+    return (lambda: [is_state_match(*p) for p in pairs]), n
+
+
+def check_eligibility_case(n: int) -> Tuple[Callable, int]:
+    from user_eligibility import check_eligibility
+
+    users = generate_users(n)
+    schemes = generate_schemes(CHECK_CATALOG)
+    return (lambda: [check_eligibility(u, schemes) for u in users]), n
+
+
+def check_eligibility_snapshot_case(n: int) -> Tuple[Callable, int]:
+    import os
+    import tempfile
+    from scheme_snapshot import SchemeSnapshot, export_snapshot
+    from user_eligibility import check_eligibility
+
+    users = generate_users(n)
+    fd, path = tempfile.mkstemp(suffix=".snap")
+    os.close(fd)
+    export_snapshot(generate_schemes(CHECK_CATALOG), path)
+    snapshot = SchemeSnapshot.open(path)
+    os.unlink(path)             # the mapping stays valid
+    return (lambda: [check_eligibility(u, snapshot) for u in users]), n
+
+
+CASES: Dict[str, Callable[[int], Tuple[Callable, int]]] = {
+    "parse_eligibility": parse_eligibility_case,
+    "parse_eligibility_text": parse_eligibility_text_case,
+    "is_state_match": is_state_match_case,
+    "check_eligibility": check_eligibility_case,
+    "check_eligibility_snapshot": check_eligibility_snapshot_case,
+}
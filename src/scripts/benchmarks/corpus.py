@@ -0,0 +1,113 @@
+# src/scripts/benchmarks/corpus.py
+# Deterministic synthetic schemes and user profiles. The same (count, seed)
+# always yields the same corpus, so timings are comparable across runs.
+import random
+from typing import List, Dict
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+DEFAULT_SEED = 42
+
+STATES = [
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+    "Andaman and Nicobar Islands", "Chandigarh", "Dadra and Nagar Haveli and Daman and Diu",
+    "Delhi", "Jammu and Kashmir", "Ladakh", "Lakshadweep", "Puducherry",
+]
+MINISTRIES = [
+    "Ministry of Agriculture and Farmers Welfare", "Ministry of Education",
+    "Ministry of Social Justice and Empowerment", "Ministry of Women and Child Development",
+    "Ministry of Labour and Employment", "Ministry of Minority Affairs",
+    "Ministry of Micro, Small and Medium Enterprises", "Ministry of Rural Development",
+]
+OCCUPATIONS = ["farmer", "student", "worker", "entrepreneur", "teacher", "artisan", "fisherman", "unemployed"]
+EDUCATIONS = ["10th", "12th", "graduate", "postgraduate", "diploma", "iti", "phd"]
+CASTES = ["SC", "ST", "OBC", "EWS", "General"]
+GENDERS = ["male", "female", "other"]
+
+BOILERPLATE = [
+    "The applicant should have a valid Aadhaar card linked to a bank account.",
+    "The applicant should not be a beneficiary of any other similar scheme.",
+    "Only one member of a family is eligible under the scheme.",
+    "The applicant must not be an income tax payer.",
+    "Documents submitted must be self-attested.",
+]
+
+
+def _prose(rng: random.Random, state: str) -> str:
+    """One eligibility paragraph mixing the phrasings the parsers look for with boilerplate."""
+    parts = []
+    if rng.random() < 0.6:
+        parts.append(f"The applicant should be a resident of {state}.")
+    age = rng.random()
+    if age < 0.4:
+        low = rng.randint(14, 30)
+        parts.append(f"The applicant must be between {low} to {low + rng.randint(5, 30)} years of age.")
+    elif age < 0.6:
+        parts.append(f"The applicant should be {rng.randint(18, 60)} years and above.")
+    if rng.random() < 0.5:
+        parts.append(f"The applicant should be a {rng.choice(OCCUPATIONS)}.")
+    if rng.random() < 0.3:
+        parts.append(rng.choice(["Women applicants only.", "Girl students are eligible.",
+                                 "Transgender persons may apply."]))
+    if rng.random() < 0.3:
+        parts.append(f"The applicant should have passed {rng.choice(['10th', '12th', 'graduation', 'diploma'])}.")
+    if rng.random() < 0.3:
+        parts.append(f"The applicant should belong to {rng.choice(['SC', 'ST', 'OBC', 'EWS'])} category.")
+    if rng.random() < 0.3:
+        parts.append(f"Annual family income less than ₹{rng.choice([1, 2, 2.5, 3, 8])} lakh; "
+                     f"family income upto {rng.choice(['1,00,000', '2,50,000', '8,00,000'])}.")
+    if rng.random() < 0.15:
+        parts.append(rng.choice(["Widow or divorced women may apply.", "Persons with disability (Divyang) are eligible.",
+                                 "Applicants from minority communities (Muslim, Christian, Sikh) are eligible."]))
+    parts.extend(rng.sample(BOILERPLATE, rng.randint(1, 3)))
+    return " ".join(parts)
+
+
+def _criterion(rng: random.Random, state: str) -> Dict:
+    low = rng.choice([None, None, 14, 18, 21, 40, 60])
+    return {
+        "minAge": low,
+        "maxAge": None if low is None or rng.random() < 0.4 else low + rng.randint(5, 30),
+        "gender": rng.choice([None, None, None, "female", "male"]),
+        "occupation": rng.sample(OCCUPATIONS, rng.choice([0, 1, 1, 2])),
+        "education": rng.choice([None, *EDUCATIONS]),
+        "state": rng.choice([[], [state], [state], rng.sample(STATES, 2)]),
+        "castecategory": rng.choice([None, None, *CASTES]),
+        "income": rng.choice([None, None, 100000, 250000, 800000]),
+    }
+
+
+def generate_schemes(count: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    rng = random.Random(seed)
+    schemes = []
+    for i in range(count):
+        central = rng.random() < 0.3
+        state = rng.choice(STATES)
+        schemes.append({
+            "id": f"scheme-{i:06d}",
+            "name": f"Synthetic Scheme {i}",
+            "state": "" if central else state,
+            "ministry": rng.choice(MINISTRIES),
+            "eligibility": _prose(rng, state),
+            "eligible": [_criterion(rng, state) for _ in range(rng.choice([0, 1, 1, 1, 2, 3]))],
+        })
+    return schemes
+
+
+def generate_users(count: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    rng = random.Random(seed + 1)
+    return [
+        {
+            "id": f"user-{i:06d}",
+            "state": rng.choice([rng.choice(STATES), rng.choice(STATES).lower(), ""]),
+            "age": rng.choice([None, rng.randint(10, 85)]),
+            "gender": rng.choice(GENDERS + [""]),
+            "occupation": rng.choice(OCCUPATIONS + [""]),
+            "education": rng.choice(EDUCATIONS + [""]),
+            "castecategory": rng.choice(CASTES + [None]),
+            "income": rng.choice([None, rng.randrange(20_000, 2_000_000, 1_000)]),
+        }
+        for i in range(count)
+    ]
@@ -0,0 +1,122 @@
+# src/scripts/benchmarks/startup.py
+# Startup cost of the scraper CLIs, which the routes spawn once per scheme:
+# interpreter + import time per script (with the heaviest top-level imports
+# from `python -X importtime`), the cost of a light path (--help), and
+# chromedriver resolution from the cache vs. through webdriver_manager.
+#
+#   cd src/scripts && python3 -m benchmarks.startup
+#   cd src/scripts && python3 -m benchmarks.startup --resolve     # also time a full (network) resolution
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+from typing import Dict, List
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["scraper", "scraper_details", "scraper_save_eligibility", "scraper_http", "ingest_pipeline"]
+DEFAULT_REPEAT = 5
+TOP_IMPORTS = 3
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=SCRIPTS_DIR, capture_output=True, text=True)
+
+
+def _wall(args: List[str], repeat: int) -> float:
+    """Median wall time of a fresh interpreter running args."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def import_profile(module: str) -> Dict:
+    """Total import time and the heaviest top-level imports of `module`, from -X importtime (microseconds)."""
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"}
+    # Children are listed before their parent; nesting is 2 spaces per level after the second bar
+    children, heaviest, total = [], [], 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == "imported package":
+            continue
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1:
+            children.append((name.strip(), int(cumulative)))
+        elif level == 0:
+            if name.strip() == module:
+                heaviest, total = children, int(cumulative)
+            children = []
+    heaviest.sort(key=lambda t: -t[1])
+    return {"importSeconds": round(total / 1e6, 4),
+            "heaviest": [{"module": n, "seconds": round(us / 1e6, 4)} for n, us in heaviest[:TOP_IMPORTS]]}
+
+
+def driver_resolution(full: bool) -> Dict:
+    """Seconds to resolve chromedriver from the cache, and (with full) through webdriver_manager."""
+    code = ("import time, json, driver_cache as d; s = time.perf_counter(); p = d.resolve_driver_path(refresh={refresh}); "
+            "print(json.dumps({{'path': p, 'seconds': time.perf_counter() - s}}))")
+    report = {}
+    for label, refresh in (("manager", True), ("cache", False)) if full else (("cache", False),):
+        env = dict(os.environ)
+        if label == "cache":
+            env.setdefault("CHROMEDRIVER_OFFLINE", "1")     # never fall through to the network here
+        result = subprocess.run([sys.executable, "-c", code.format(refresh=refresh)], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            report[label] = {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+        else:
+            entry = json.loads(result.stdout)
+            report[label] = {"seconds": round(entry["seconds"], 4), "path": entry["path"]}
+    return report
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.startup", description="CLI startup-time report")
+    parser.add_argument("--script", action="append", choices=SCRIPTS, help="report only these scripts")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per wall-time measurement")
+    parser.add_argument("--resolve", action="store_true",
+                        help="also time a full driver resolution through webdriver_manager (may use the network)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = _wall(["-c", "pass"], args.repeat)
+    scripts = []
+    for name in args.script or SCRIPTS:
+        entry = {"script": f"{name}.py", **import_profile(name)}
+        entry["helpSeconds"] = round(_wall([f"{name}.py", "--help"], args.repeat), 4)
+        scripts.append(entry)
+        if args.json:
+            continue
+        if "error" in entry:
+            print(f"⚠️  {entry['script']:<28} import failed: {entry['error']}")
+            continue
+        heaviest = ", ".join(f"{h['module']} {h['seconds'] * 1000:.0f}ms" for h in entry["heaviest"])
+        print(f"⏱️  {entry['script']:<28} import {entry['importSeconds'] * 1000:7.1f}ms  "
+              f"--help {entry['helpSeconds'] * 1000:7.1f}ms  (heaviest: {heaviest or '-'})", flush=True)
+
+    drivers = driver_resolution(args.resolve)
+    report = {"interpreterSeconds": round(baseline, 4), "scripts": scripts, "driverResolution": drivers}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"⏱️  {'python3 -c pass':<28} {baseline * 1000:7.1f}ms (interpreter baseline)")
+    for label, entry in drivers.items():
+        if "error" in entry:
+            print(f"⚠️  driver via {label:<7} {entry['error']}")
+        else:
+            print(f"⏱️  driver via {label:<7} {entry['seconds'] * 1000:9.1f}ms  {entry['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
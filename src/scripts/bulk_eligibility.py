@@ -0,0 +1,222 @@
+# src/scripts/bulk_eligibility.py
+# Vectorised all-users x all-schemes eligibility, used to fill User.eligibleSchemes.
+# Scores are identical to user_eligibility.check_eligibility; users are processed
+# in chunks so working memory is (criteria x chunk), not (criteria x users).
+import json
+import sys
+from typing import List, Dict, Optional, Iterable, Iterator
+
+import numpy as np
+
+from eligibility_index import normalize_values, normalize_states, user_state_key, ELIGIBLE_SCHEMES_K
+
+DEFAULT_CHUNK = 1024
+
+
+def _codes(values: Iterable[str], vocab: Dict[str, int]) -> np.ndarray:
+    """Vocabulary codes for user values; unknown values map to the all-False sentinel column."""
+    unknown = len(vocab)
+    return np.fromiter((vocab.get(v, unknown) for v in values), dtype=np.int64)
+
+
+class SchemeMatrix:
+    """
+    Parsed scheme criteria encoded column-wise:
+    one row per criterion, boolean membership matrices for the categorical
+    fields (plus a trailing all-False sentinel column) and float age bounds.
+    """
+
+    def __init__(self, schemes: List[Dict]):
+        rows = []                                   # (scheme position, criterion)
+        for position, scheme in enumerate(schemes):
+            for elig in scheme.get("eligible") or []:
+                if isinstance(elig, dict):
+                    rows.append((position, elig))
+
+        self.num_schemes = len(schemes)
+        states = [normalize_states(e.get("state")) for _, e in rows]
+        educations = [normalize_values(e.get("education")) for _, e in rows]
+        occupations = [normalize_values(e.get("occupation")) for _, e in rows]
+        genders = [normalize_values(e.get("gender")) if e.get("gender") else None for _, e in rows]
+
+        self.state_vocab = self._vocab(s or [] for s in states)
+        self.edu_vocab = self._vocab(educations)
+        self.occ_vocab = self._vocab(occupations)
+        self.gender_vocab = self._vocab(g or [] for g in genders)
+
+        self.state_any = np.array([s is None for s in states], dtype=bool)
+        self.state = self._membership(states, self.state_vocab)
+        self.education = self._membership(educations, self.edu_vocab)
+        self.occupation = self._membership(occupations, self.occ_vocab)
+        self.has_gender = np.array([g is not None for g in genders], dtype=bool)
+        self.gender = self._membership(genders, self.gender_vocab)
+        self.min_age = np.array([np.nan if e.get("minAge") is None else e["minAge"] for _, e in rows], dtype=float)
+        self.max_age = np.array([np.nan if e.get("maxAge") is None else e["maxAge"] for _, e in rows], dtype=float)
+
+        # Criteria are grouped by scheme, so a per-scheme max is one reduceat over these row offsets.
+        positions = np.array([p for p, _ in rows], dtype=np.int64)
+        self.crit_schemes, self.crit_offsets = np.unique(positions, return_index=True)
+
+    @staticmethod
+    def _vocab(value_lists: Iterable[List[str]]) -> Dict[str, int]:
+        vocab: Dict[str, int] = {}
+        for values in value_lists:
+            for v in values:
+                vocab.setdefault(v, len(vocab))
+        return vocab
+
+    @staticmethod
+    def _membership(value_lists: List[Optional[List[str]]], vocab: Dict[str, int]) -> np.ndarray:
+        matrix = np.zeros((len(value_lists), len(vocab) + 1), dtype=bool)
+        for row, values in enumerate(value_lists):
+            for v in values or []:
+                matrix[row, vocab[v]] = True
+        return matrix
+
+    def scores(self, users: List[Dict]) -> np.ndarray:
+        """Best score per (scheme, user) for one chunk of users; 0 means not eligible."""
+        result = np.zeros((self.num_schemes, len(users)), dtype=np.int8)
+        if not len(self.crit_schemes) or not users:
+            return result
+
+        def norm(field):
+            return [(u.get(field) or "").strip().lower() for u in users]
+
+        user_state = [user_state_key(u) for u in users]
+        state_known = np.array([bool(s) for s in user_state], dtype=bool)
+        ages = np.array([np.nan if u.get("age") is None else u["age"] for u in users], dtype=float)
+        age_known = ~np.isnan(ages)
+
+        # criteria x users
+        ok = (self.state_any[:, None] | self.state[:, _codes(user_state, self.state_vocab)]) & state_known
+        ok &= self.education[:, _codes(norm("education"), self.edu_vocab)] | \
+            self.occupation[:, _codes(norm("occupation"), self.occ_vocab)]
+        ok &= ~self.has_gender[:, None] | self.gender[:, _codes(norm("gender"), self.gender_vocab)]
+        with np.errstate(invalid="ignore"):
+            ok &= ~(age_known & (ages < self.min_age[:, None]))
+            ok &= ~(age_known & (ages > self.max_age[:, None]))
+
+        score = (2 + self.has_gender[:, None].astype(np.int8) + age_known.astype(np.int8)) * ok
+        result[self.crit_schemes] = np.maximum.reduceat(score.astype(np.int8), self.crit_offsets, axis=0)
+        return result
+
+    def top_k(self, users: List[Dict], k: Optional[int] = 5) -> List[List[int]]:
+        """
+        Scheme positions per user, best score first and catalog order on ties
+        (the same order check_eligibility returns). k=None returns every eligible scheme.
+        """
+        scores = self.scores(users).T.astype(np.int64)                 # users x schemes
+        # Unique sortable key: higher score first, then lower position first.
+        key = scores * (self.num_schemes + 1) + (self.num_schemes - np.arange(self.num_schemes))
+        key[scores == 0] = -1
+        if k is not None and k < self.num_schemes:
+            top = np.argpartition(-key, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self.num_schemes), key.shape)
+        top_keys = np.take_along_axis(key, top, axis=1)
+        order = np.argsort(-top_keys, axis=1)
+        ranked = np.take_along_axis(top, order, axis=1)
+        ranked_keys = np.take_along_axis(top_keys, order, axis=1)
+        return [row[row_keys > 0].tolist() for row, row_keys in zip(ranked, ranked_keys)]
+
+
+def bulk_eligibility(users: Iterable[Dict], schemes: List[Dict], k: Optional[int] = 5,
+                     chunk_size: int = DEFAULT_CHUNK) -> Iterator[tuple]:
+    """Yield (user, [scheme, ...]) for every user, chunk by chunk."""
+    matrix = SchemeMatrix(schemes)
+    chunk: List[Dict] = []
+
+    def flush():
+        for user, positions in zip(chunk, matrix.top_k(chunk, k)):
+            yield user, [schemes[p] for p in positions]
+
+    for user in users:
+        chunk.append(user)
+        if len(chunk) >= chunk_size:
+            yield from flush()
+            chunk = []
+    if chunk:
+        yield from flush()
+
+
+# -----------------------------
+# Populate User.eligibleSchemes
+# -----------------------------
+async def _pages(model, chunk_size: int):
+    """Every row of a Prisma model, one page at a time, paged by id cursor."""
+    cursor = None
+    while True:
+        page = await model.find_many(
+            order={"id": "asc"}, take=chunk_size, **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        if page:
+            yield page
+        if len(page) < chunk_size:
+            return
+        cursor = page[-1].id
+
+
+async def populate_db(k: Optional[int] = ELIGIBLE_SCHEMES_K, chunk_size: int = DEFAULT_CHUNK):
+    """
+    Write User.eligibleSchemes for every user. Only scheme ids and criteria are
+    kept (the Python client cannot project, so schemes are read a page at a time),
+    and users are read, scored and written one page at a time.
+    """
+    from prisma import Prisma
+
+    db = Prisma()
+    await db.connect()
+
+    schemes = []
+    async for page in _pages(db.scheme, chunk_size):
+        schemes.extend({"id": s.id, "eligible": s.eligible} for s in page)
+    # top_k breaks ties by catalog position; in id order that is eligibility_index.rank_scheme_ids,
+    # the order eligibility_delta writes
+    schemes.sort(key=lambda s: s["id"])
+    matrix = SchemeMatrix(schemes)
+
+    updated_count = 0
+    async for page in _pages(db.user, chunk_size):
+        users = [{"state": u.state, "education": u.education, "occupation": u.occupation,
+                  "age": u.age, "gender": u.gender} for u in page]
+        async with db.batch_() as batcher:
+            for user, positions in zip(page, matrix.top_k(users, k)):
+                batcher.user.update(
+                    where={"id": user.id},
+                    data={"eligibleSchemes": {"set": [schemes[p]["id"] for p in positions]}},
+                )
+        updated_count += len(page)
+
+    await db.disconnect()
+    print(f"✅ Updated eligibleSchemes for {updated_count} users")
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Bulk users x schemes eligibility")
+    parser.add_argument("users", nargs="?", help="users JSON array file")
+    parser.add_argument("schemes", nargs="?", help="schemes JSON array file")
+    parser.add_argument("--k", type=int, help="schemes per user (0 = all eligible; default: 5, "
+                                              "or every eligible scheme with --db)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="users per vectorised pass")
+    parser.add_argument("--db", action="store_true", help="read users/schemes from Prisma and write User.eligibleSchemes")
+    args = parser.parse_args()
+    k = (args.k or None) if args.k is not None else (ELIGIBLE_SCHEMES_K if args.db else 5)
+
+    if args.db:
+        asyncio.run(populate_db(k, args.chunk))
+        sys.exit(0)
+
+    if not args.users or not args.schemes:
+        parser.error("users and schemes files are required without --db")
+
+    with open(args.users) as f:
+        users_data = json.load(f)
+    with open(args.schemes) as f:
+        schemes_data = json.load(f)
+
+    # One JSON line per user: {"userId": ..., "eligibleSchemes": [scheme ids]}
+    for user, eligible in bulk_eligibility(users_data, schemes_data, k, args.chunk):
+        print(json.dumps({"userId": user.get("id"), "eligibleSchemes": [s.get("id") for s in eligible]}))
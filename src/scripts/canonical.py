@@ -0,0 +1,354 @@
+# src/scripts/canonical.py
+# Canonical states / union territories and central ministries.
+# Every spelling we have seen (aliases, old names, abbreviations) maps to one
+# small integer ID, so parsing emits IDs and matching compares integers:
+#
+#   state_id("TN") == state_id("Tamil Nadu") == state_id("tamilnadu")
+#   find_states("resident of Orissa or J&K")  -> [ODISHA, JAMMU_AND_KASHMIR]
+#
+# Whole values (a user's state, a scheme's state field) are looked up in a dict
+# of normalised spellings, abbreviations included. Free text is scanned with a
+# token trie (longest match) over full names only, so "up to 18 years" is not
+# Uttar Pradesh.
+#
+# IDs are stored with parsed schemes: append new entries, never renumber.
+#
+#   python3 canonical.py "Pondicherry"            resolve a value
+#   python3 canonical.py --scan "text ..."        list the states/ministries mentioned
+#   python3 canonical.py --list                   dump the tables as JSON
+import re
+import sys
+import json
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# -----------------------------
+# Tables: (id, name, free-text aliases, whole-value-only abbreviations)
+# -----------------------------
+STATES = [
+    (1, "Andhra Pradesh", [], ["AP"]),
+    (2, "Arunachal Pradesh", [], ["AR"]),
+    (3, "Assam", [], ["AS"]),
+    (4, "Bihar", [], ["BR"]),
+    (5, "Chhattisgarh", ["Chattisgarh", "Chhatisgarh", "Chattisgadh"], ["CG", "CT"]),
+    (6, "Goa", [], ["GA"]),
+    (7, "Gujarat", ["Gujrat"], ["GJ"]),
+    (8, "Haryana", [], ["HR"]),
+    (9, "Himachal Pradesh", [], ["HP"]),
+    (10, "Jharkhand", [], ["JH"]),
+    (11, "Karnataka", [], ["KA"]),
+    (12, "Kerala", ["Keralam"], ["KL"]),
+    (13, "Madhya Pradesh", [], ["MP"]),
+    (14, "Maharashtra", ["Maharastra"], ["MH"]),
+    (15, "Manipur", [], ["MN"]),
+    (16, "Meghalaya", [], ["ML"]),
+    (17, "Mizoram", [], ["MZ"]),
+    (18, "Nagaland", [], ["NL"]),
+    (19, "Odisha", ["Orissa"], ["OD", "OR"]),
+    (20, "Punjab", [], ["PB"]),
+    (21, "Rajasthan", [], ["RJ"]),
+    (22, "Sikkim", [], ["SK"]),
+    (23, "Tamil Nadu", ["Tamilnadu", "Tamizh Nadu"], ["TN"]),
+    (24, "Telangana", ["Telengana"], ["TS", "TG"]),
+    (25, "Tripura", [], ["TR"]),
+    (26, "Uttar Pradesh", [], ["UP"]),
+    (27, "Uttarakhand", ["Uttaranchal", "Uttrakhand"], ["UK", "UA"]),
+    (28, "West Bengal", ["Paschim Banga", "Paschimbanga"], ["WB"]),
+    # Union territories
+    (29, "Andaman and Nicobar Islands", ["Andaman and Nicobar", "Andaman Nicobar", "A&N Islands"], ["AN", "A&N"]),
+    (30, "Chandigarh", [], ["CH"]),
+    (31, "Dadra and Nagar Haveli and Daman and Diu",
+     ["Dadra and Nagar Haveli", "Daman and Diu", "Dadra Nagar Haveli", "Daman Diu"], ["DNHDD", "DN", "DD"]),
+    (32, "Delhi", ["NCT of Delhi", "National Capital Territory of Delhi", "New Delhi"], ["DL", "NCT"]),
+    (33, "Jammu and Kashmir", ["J&K", "Jammu Kashmir"], ["JK", "J and K"]),
+    (34, "Ladakh", [], ["LA"]),
+    (35, "Lakshadweep", ["Lakshadweep Islands"], ["LD"]),
+    (36, "Puducherry", ["Pondicherry", "Pondichery"], ["PY"]),
+]
+
+MINISTRIES = [
+    (1, "Ministry of Agriculture and Farmers Welfare", ["Ministry of Agriculture"], ["MoA&FW", "MoAFW"]),
+    (2, "Ministry of Ayush", [], ["AYUSH"]),
+    (3, "Ministry of Chemicals and Fertilizers", ["Ministry of Chemicals and Fertilisers"], []),
+    (4, "Ministry of Civil Aviation", [], ["MoCA"]),
+    (5, "Ministry of Coal", [], []),
+    (6, "Ministry of Commerce and Industry", [], []),
+    (7, "Ministry of Communications", [], []),
+    (8, "Ministry of Consumer Affairs, Food and Public Distribution", ["Ministry of Consumer Affairs"], []),
+    (9, "Ministry of Cooperation", [], []),
+    (10, "Ministry of Corporate Affairs", [], ["MCA"]),
+    (11, "Ministry of Culture", [], []),
+    (12, "Ministry of Defence", ["Ministry of Defense"], ["MoD"]),
+    (13, "Ministry of Development of North Eastern Region", [], ["DoNER", "MDoNER"]),
+    (14, "Ministry of Earth Sciences", [], ["MoES"]),
+    (15, "Ministry of Education", ["Ministry of Human Resource Development"], ["MoE", "MHRD"]),
+    (16, "Ministry of Electronics and Information Technology", ["Ministry of Electronics and IT"], ["MeitY"]),
+    (17, "Ministry of Environment, Forest and Climate Change", ["Ministry of Environment and Forests"], ["MoEFCC"]),
+    (18, "Ministry of External Affairs", [], ["MEA"]),
+    (19, "Ministry of Finance", [], ["MoF"]),
+    (20, "Ministry of Fisheries, Animal Husbandry and Dairying", [], ["MoFAHD"]),
+    (21, "Ministry of Food Processing Industries", [], ["MoFPI"]),
+    (22, "Ministry of Health and Family Welfare", ["Ministry of Health"], ["MoHFW"]),
+    (23, "Ministry of Heavy Industries", [], ["MHI"]),
+    (24, "Ministry of Home Affairs", [], ["MHA"]),
+    (25, "Ministry of Housing and Urban Affairs", [], ["MoHUA"]),
+    (26, "Ministry of Information and Broadcasting", [], ["MIB", "MoIB"]),
+    (27, "Ministry of Jal Shakti", ["Ministry of Water Resources"], []),
+    (28, "Ministry of Labour and Employment", ["Ministry of Labor and Employment"], ["MoLE"]),
+    (29, "Ministry of Law and Justice", [], []),
+    (30, "Ministry of Micro, Small and Medium Enterprises", [], ["MSME", "MoMSME"]),
+    (31, "Ministry of Mines", [], []),
+    (32, "Ministry of Minority Affairs", [], ["MoMA"]),
+    (33, "Ministry of New and Renewable Energy", [], ["MNRE"]),
+    (34, "Ministry of Panchayati Raj", [], ["MoPR"]),
+    (35, "Ministry of Parliamentary Affairs", [], []),
+    (36, "Ministry of Personnel, Public Grievances and Pensions", [], []),
+    (37, "Ministry of Petroleum and Natural Gas", [], ["MoPNG"]),
+    (38, "Ministry of Ports, Shipping and Waterways", ["Ministry of Shipping"], ["MoPSW"]),
+    (39, "Ministry of Power", [], []),
+    (40, "Ministry of Railways", [], []),
+    (41, "Ministry of Road Transport and Highways", [], ["MoRTH"]),
+    (42, "Ministry of Rural Development", [], ["MoRD"]),
+    (43, "Ministry of Science and Technology", [], ["MoST"]),
+    (44, "Ministry of Skill Development and Entrepreneurship", [], ["MSDE"]),
+    (45, "Ministry of Social Justice and Empowerment", [], ["MoSJE"]),
+    (46, "Ministry of Statistics and Programme Implementation", [], ["MoSPI"]),
+    (47, "Ministry of Steel", [], []),
+    (48, "Ministry of Textiles", [], []),
+    (49, "Ministry of Tourism", [], []),
+    (50, "Ministry of Tribal Affairs", [], ["MoTA"]),
+    (51, "Ministry of Women and Child Development", [], ["MWCD", "WCD"]),
+    (52, "Ministry of Youth Affairs and Sports", [], ["MYAS"]),
+]
+
+# Scheme state values that mean "every state"
+ALL_STATES = ["all", "all states", "all india", "pan india", "india", "all states and uts",
+              "all states and union territories"]
+
+# Words dropped around a whole value: "Government of Kerala", "State of Goa", "Goa State"
+VALUE_PREFIXES = [("government", "of"), ("govt", "of"), ("state", "of"), ("ut", "of"),
+                  ("union", "territory", "of"), ("the",)]
+VALUE_SUFFIXES = [("state",), ("ut",), ("government",)]
+# Words allowed between states in a list ("Tamil Nadu, Kerala and the UT of Puducherry")
+LIST_WORDS = {"and", "or", "either", "the", "state", "states", "of", "ut", "uts", "union", "territory",
+              "territories", "government", "govt"}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+_END = ""       # trie terminal key; never a token
+
+
+def tokens(text: str) -> List[str]:
+    """Lower-case word tokens, with "&" read as "and" and dots dropped ("U.P." -> "up")."""
+    text = (text or "").lower().replace("&", " and ").replace(".", "").replace("'", "")
+    return TOKEN_RE.findall(text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(tokens(text))
+
+
+def _strip_affixes(words: List[str]) -> List[str]:
+    changed = True
+    while changed and words:
+        changed = False
+        for prefix in VALUE_PREFIXES:
+            if len(words) > len(prefix) and tuple(words[:len(prefix)]) == prefix:
+                words, changed = words[len(prefix):], True
+        for suffix in VALUE_SUFFIXES:
+            if len(words) > len(suffix) and tuple(words[-len(suffix):]) == suffix:
+                words, changed = words[:-len(suffix)], True
+    return words
+
+
+class Vocabulary:
+    """One table compiled into an exact-value dict and a free-text token trie."""
+
+    def __init__(self, table: List[Tuple], strip_words: Tuple[str, ...] = ()):
+        self.names: Dict[int, str] = {}
+        self.exact: Dict[str, int] = {}
+        self.trie: Dict = {}
+        self.strip_words = strip_words
+        for entry_id, name, aliases, codes in table:
+            if entry_id in self.names:
+                raise ValueError(f"Duplicate id {entry_id} for {name!r}")
+            self.names[entry_id] = name
+            for alias in [name, *aliases]:
+                self._add_exact(alias, entry_id)
+                self._add_trie(tokens(alias), entry_id)
+                # also the spelling without the leading "Ministry of"
+                short = self._short(tokens(alias))
+                if short:
+                    self._add_exact(" ".join(short), entry_id)
+            for code in codes:
+                self._add_exact(code, entry_id)
+
+    def _short(self, words: List[str]) -> Optional[List[str]]:
+        n = len(self.strip_words)
+        if n and len(words) > n and tuple(words[:n]) == self.strip_words:
+            return words[n:]
+        return None
+
+    def _add_exact(self, alias: str, entry_id: int):
+        key = normalize(alias)
+        if self.exact.get(key, entry_id) != entry_id:
+            raise ValueError(f"Alias {alias!r} maps to both {self.exact[key]} and {entry_id}")
+        self.exact[key] = entry_id
+
+    def _add_trie(self, words: List[str], entry_id: int):
+        node = self.trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_END] = entry_id
+
+    def lookup(self, value: str) -> int:
+        """ID of a whole value, 0 when unknown."""
+        words = tokens(value)
+        found = self.exact.get(" ".join(words))
+        if found is None:
+            found = self.exact.get(" ".join(_strip_affixes(words)), 0)
+        return found
+
+    def _match_at(self, words: List[str], i: int) -> Tuple[int, int]:
+        """Longest (id, end) starting at words[i], or (0, i)."""
+        node, best = self.trie, (0, i)
+        for j in range(i, len(words)):
+            node = node.get(words[j])
+            if node is None:
+                break
+            if _END in node:
+                best = (node[_END], j + 1)
+        return best
+
+    def scan(self, text: str, leading: bool = False) -> List[int]:
+        """
+        IDs mentioned in free text, in order of first mention. With leading, only
+        the list at the start of the text ("tamil nadu or puducherry and ...")
+        is read: scanning stops at the first word that is neither a name nor a
+        list word.
+        """
+        words, found, i = tokens(text), [], 0
+        if not leading:
+            # Jump between words that can start a name instead of stepping through every word
+            roots = self.trie
+            starts = [j for j, word in enumerate(words) if word in roots]
+            for j in starts:
+                if j < i:
+                    continue
+                entry_id, i = self._match_at(words, j)
+                if entry_id and entry_id not in found:
+                    found.append(entry_id)
+            return found
+        while i < len(words):
+            entry_id, end = self._match_at(words, i)
+            if entry_id:
+                if entry_id not in found:
+                    found.append(entry_id)
+                i = end
+            elif words[i] not in LIST_WORDS:
+                break
+            else:
+                i += 1
+        return found
+
+    def digest(self) -> str:
+        return hashlib.sha256(json.dumps([sorted(self.names.items()), sorted(self.exact.items())],
+                                         ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+STATE_VOCAB = Vocabulary(STATES)
+MINISTRY_VOCAB = Vocabulary(MINISTRIES, strip_words=("ministry", "of"))
+_ALL_STATES = frozenset(ALL_STATES)
+
+# Changes whenever any table (or the list words the parser relies on) changes
+TABLES_DIGEST = hashlib.sha256(json.dumps([
+    STATE_VOCAB.digest(), MINISTRY_VOCAB.digest(), ALL_STATES, VALUE_PREFIXES, VALUE_SUFFIXES, sorted(LIST_WORDS),
+]).encode("utf-8")).hexdigest()[:16]
+
+
+# -----------------------------
+# States
+# -----------------------------
+@lru_cache(maxsize=4096)
+def state_id(value: str) -> int:
+    """ID of a state / UT value ("TN", "Tamil Nadu", "Govt. of Tamil Nadu"), 0 when unknown."""
+    return STATE_VOCAB.lookup(value) if isinstance(value, str) else 0
+
+
+def state_name(sid: int) -> Optional[str]:
+    return STATE_VOCAB.names.get(sid)
+
+
+@lru_cache(maxsize=4096)
+def state_key(value: str) -> str:
+    """
+    String matching key: the canonical lower-case name of a known state, else
+    the normalised value, so unknown values still match their exact spelling.
+    """
+    sid = state_id(value)
+    return STATE_VOCAB.names[sid].lower() if sid else normalize(value)
+
+
+def canonical_state(value: str) -> str:
+    """Canonical name of a known state, else the value unchanged."""
+    sid = state_id(value)
+    return STATE_VOCAB.names[sid] if sid else value
+
+
+def is_all_states(value: str) -> bool:
+    return isinstance(value, str) and normalize(value) in _ALL_STATES
+
+
+def find_states(text: str, leading: bool = False) -> List[int]:
+    return STATE_VOCAB.scan(text, leading)
+
+
+# -----------------------------
+# Ministries
+# -----------------------------
+@lru_cache(maxsize=1024)
+def ministry_id(value: str) -> int:
+    """ID of a ministry value ("MeitY", "Ministry Of Electronics & IT"), 0 when unknown."""
+    return MINISTRY_VOCAB.lookup(value) if isinstance(value, str) else 0
+
+
+def ministry_name(mid: int) -> Optional[str]:
+    return MINISTRY_VOCAB.names.get(mid)
+
+
+def is_ministry(value: str) -> bool:
+    """True for a known ministry or anything that reads like one."""
+    return bool(ministry_id(value)) or normalize(value).startswith(("ministry ", "department "))
+
+
+def find_ministries(text: str) -> List[int]:
+    return MINISTRY_VOCAB.scan(text)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print('Usage: python canonical.py <value> | --scan "<text>" | --list')
+        sys.exit(1)
+
+    if args[0] == "--list":
+        print(json.dumps({
+            "digest": TABLES_DIGEST,
+            "states": [{"id": i, "name": n, "aliases": a, "codes": c} for i, n, a, c in STATES],
+            "ministries": [{"id": i, "name": n, "aliases": a, "codes": c} for i, n, a, c in MINISTRIES],
+        }, indent=2, ensure_ascii=False))
+    elif args[0] == "--scan":
+        text = " ".join(args[1:])
+        print(json.dumps({
+            "states": [{"id": i, "name": state_name(i)} for i in find_states(text)],
+            "ministries": [{"id": i, "name": ministry_name(i)} for i in find_ministries(text)],
+        }, ensure_ascii=False))
+    else:
+        value = " ".join(args)
+        sid, mid = state_id(value), ministry_id(value)
+        print(json.dumps({
+            "value": value,
+            "state": {"id": sid, "name": state_name(sid)} if sid else None,
+            "ministry": {"id": mid, "name": ministry_name(mid)} if mid else None,
+            "allStates": is_all_states(value),
+        }, ensure_ascii=False))
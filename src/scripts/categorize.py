@@ -0,0 +1,227 @@
+# src/scripts/categorize.py
+# Assign Scheme.categories once per crawl instead of on every request.
+# Every category's vocabulary is compiled into one regex, scanned once over a
+# scheme's tags, name and details:
+#   - a tag equal to one of the category's `tags` (the old per-request rule), or
+#   - a keyword in the name or a tag, or
+#   - at least DETAIL_HITS keyword hits in the details
+# puts the scheme in the category. Schemes can be in several categories.
+#
+# Categories are extensible with a JSON config ({"name": {"tags": [...],
+# "keywords": [...]}}) that adds to / replaces the defaults:
+#
+#   python3 categorize.py --db [--config categories.json]     write Scheme.categories (only when changed)
+#   python3 categorize.py --db --ids - < scheme_ids            only these schemes (new / re-fetched ones)
+#   python3 categorize.py --schemes schemes.json               offline: JSON lines {"id", "categories"}
+#
+# /api/schemes/add and /api/scheme-details categorise the schemes they write, and
+# the scheduler re-runs the whole catalog nightly. Existing schemes have no
+# categories until the first full run: run `python3 categorize.py --db` once
+# after deploying the `categories` field.
+import os
+import re
+import sys
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BATCH = 500
+DETAIL_HITS = 2
+
+DEFAULT_CATEGORIES: Dict[str, Dict[str, List[str]]] = {
+    "education": {
+        "tags": ["education", "school", "college", "scholarship"],
+        "keywords": ["education", "educational", "school", "college", "scholarship", "student", "university",
+                     "tuition", "fellowship", "higher studies", "hostel"],
+    },
+    "agriculture": {
+        "tags": ["agriculture", "farmer", "farming", "crop"],
+        "keywords": ["agriculture", "agricultural", "farmer", "farming", "crop", "kisan", "irrigation",
+                     "horticulture", "livestock", "dairy", "fisheries", "seeds"],
+    },
+    "health": {
+        "tags": ["health", "hospital", "insurance", "medical"],
+        "keywords": ["health", "hospital", "medical", "treatment", "healthcare", "health insurance",
+                     "medicine", "disease", "maternity"],
+    },
+    "women": {
+        "tags": ["women", "female", "girl"],
+        "keywords": ["women", "woman", "girl child", "girls", "widow", "mahila", "pregnant", "female"],
+    },
+    "seniorCitizen": {
+        # "old" stays tag-only: "18 years old" in details is not a senior-citizen scheme
+        "tags": ["senior", "elderly", "old", "retirement"],
+        "keywords": ["senior citizen", "elderly", "old age", "retirement", "pensioner", "aged persons"],
+    },
+    "employment": {
+        "tags": ["employment", "job", "skill", "training"],
+        "keywords": ["employment", "job", "skill development", "skilling", "vocational training", "apprenticeship",
+                     "self employment", "unemployed", "placement"],
+    },
+}
+
+
+def load_categories(config_path: Optional[str] = None) -> Dict[str, Dict[str, List[str]]]:
+    """Defaults, with categories from the JSON config (CATEGORIES_CONFIG) added or replaced."""
+    categories = {name: dict(spec) for name, spec in DEFAULT_CATEGORIES.items()}
+    config_path = config_path or os.environ.get("CATEGORIES_CONFIG")
+    if config_path:
+        with open(config_path) as f:
+            for name, spec in json.load(f).items():
+                if not isinstance(spec, dict):
+                    raise ValueError(f"Category {name!r}: expected {{\"tags\": [...], \"keywords\": [...]}}")
+                categories[name] = {"tags": list(spec.get("tags") or []), "keywords": list(spec.get("keywords") or [])}
+    return categories
+
+
+class CategoryMatcher:
+    """All category keywords in one alternation; a hit maps back to every category that lists it."""
+
+    def __init__(self, categories: Dict[str, Dict[str, List[str]]]):
+        self.names = list(categories)
+        self.by_tag: Dict[str, set] = {}
+        self.by_keyword: Dict[str, set] = {}
+        for name, spec in categories.items():
+            for tag in spec.get("tags") or []:
+                self.by_tag.setdefault(tag.strip().lower(), set()).add(name)
+            for keyword in spec.get("keywords") or []:
+                self.by_keyword.setdefault(" ".join(keyword.lower().split()), set()).add(name)
+        # Longest first so "health insurance" wins over "health"; spaces match any whitespace; plurals fold
+        alternation = "|".join(re.escape(k).replace(r"\ ", r"\s+")
+                               for k in sorted(self.by_keyword, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b({alternation})(?:e?s)?\b") if alternation else None
+
+    def _hits(self, text: str) -> Iterable[set]:
+        if not self.pattern or not text:
+            return
+        for match in self.pattern.finditer(text.lower()):
+            yield self.by_keyword[" ".join(match.group(1).split())]
+
+    def categorize(self, scheme: Dict) -> List[str]:
+        """Category names for one scheme, in configuration order."""
+        found = set()
+        tags = [t for t in scheme.get("tags") or [] if isinstance(t, str)]
+        for tag in tags:
+            found |= self.by_tag.get(tag.strip().lower(), set())
+        for hit in self._hits(" | ".join([scheme.get("name") or "", *tags])):
+            found |= hit
+        counts: Dict[str, int] = {}
+        for hit in self._hits(scheme.get("details") or ""):
+            for name in hit:
+                counts[name] = counts.get(name, 0) + 1
+        found |= {name for name, n in counts.items() if n >= DETAIL_HITS}
+        return [name for name in self.names if name in found]
+
+
+def categorize_all(matcher: CategoryMatcher, schemes: Iterable[Dict]) -> Iterable[Tuple[Dict, List[str]]]:
+    for scheme in schemes:
+        yield scheme, matcher.categorize(scheme)
+
+
+def _summary(matcher: CategoryMatcher, counts: Dict[str, int], schemes: int, uncategorized: int) -> Dict:
+    return {"schemes": schemes, "uncategorized": uncategorized,
+            "categories": {name: counts.get(name, 0) for name in matcher.names}}
+
+
+# -----------------------------
+# Prisma source / sink
+# -----------------------------
+async def categorize_db(db, matcher: CategoryMatcher, batch_size: int = DEFAULT_BATCH,
+                        where: Optional[Dict] = None) -> Dict:
+    """Categorise the schemes matching `where` (all by default) over a connected client; write only changes."""
+    counts, total, uncategorized, changed = {}, 0, 0, {}
+    timings = {"read": 0.0, "match": 0.0, "write": 0.0}
+    cursor = None
+    while True:
+        start = time.perf_counter()
+        page = await db.scheme.find_many(
+            where=where or {}, order={"id": "asc"}, take=batch_size,
+            **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        timings["read"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for row in page:
+            categories = matcher.categorize({"name": row.name, "tags": row.tags, "details": row.details})
+            total += 1
+            uncategorized += not categories
+            for name in categories:
+                counts[name] = counts.get(name, 0) + 1
+            if categories != list(row.categories or []):
+                changed[row.id] = categories
+        timings["match"] += time.perf_counter() - start
+
+        if len(page) < batch_size:
+            break
+        cursor = page[-1].id
+
+    # Unchanged rows are not written, so their updatedAt (and every delta watermark) stays put
+    start = time.perf_counter()
+    ids = list(changed)
+    for offset in range(0, len(ids), batch_size):
+        async with db.batch_() as batcher:
+            for scheme_id in ids[offset:offset + batch_size]:
+                batcher.scheme.update_many(where={"id": scheme_id},
+                                           data={"categories": {"set": changed[scheme_id]}})
+    timings["write"] += time.perf_counter() - start
+
+    summary = _summary(matcher, counts, total, uncategorized)
+    summary["written"] = len(ids)
+    summary["seconds"] = {name: round(seconds, 3) for name, seconds in timings.items()}
+    return summary
+
+
+async def sync_db(matcher: CategoryMatcher, batch_size: int = DEFAULT_BATCH, ids: Optional[List[str]] = None) -> Dict:
+    """Categorise every scheme (or just `ids`) and write Scheme.categories where it changed."""
+    from prisma import Prisma
+
+    db = Prisma()
+    await db.connect()
+    try:
+        return await categorize_db(db, matcher, batch_size, {"id": {"in": ids}} if ids is not None else None)
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Materialise Scheme.categories")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", action="store_true", help="read schemes from Prisma and write Scheme.categories")
+    source.add_argument("--schemes", help="schemes JSON array / JSONL (offline; prints {id, categories} lines)")
+    parser.add_argument("--config", help="JSON category config added to / replacing the defaults "
+                                         "(default: $CATEGORIES_CONFIG)")
+    parser.add_argument("--ids", nargs="+", metavar="ID",
+                        help="with --db: only these scheme ids ('-' reads one per line from stdin)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="schemes per page / write batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    matcher = CategoryMatcher(load_categories(args.config))
+    compile_seconds = time.perf_counter() - start
+
+    if args.db:
+        ids = args.ids
+        if ids == ["-"]:
+            ids = [line.strip() for line in sys.stdin if line.strip()]
+        summary = asyncio.run(sync_db(matcher, args.batch, ids))
+        summary["seconds"]["compile"] = round(compile_seconds, 4)
+        summary["seconds"]["total"] = round(time.perf_counter() - start, 3)
+        print(json.dumps(summary))
+        sys.exit(0)
+
+    from user_eligibility import iter_json_records
+
+    counts, total, uncategorized = {}, 0, 0
+    with open(args.schemes, encoding="utf-8") as f:
+        for scheme, categories in categorize_all(matcher, iter_json_records(f)):
+            total += 1
+            uncategorized += not categories
+            for name in categories:
+                counts[name] = counts.get(name, 0) + 1
+            print(json.dumps({"id": scheme.get("id"), "categories": categories}, ensure_ascii=False))
+    summary = _summary(matcher, counts, total, uncategorized)
+    summary["seconds"] = {"compile": round(compile_seconds, 4), "total": round(time.perf_counter() - start, 3)}
+    print(json.dumps({"summary": summary}), file=sys.stderr)
@@ -0,0 +1,123 @@
+# src/scripts/driver_cache.py
+# Resolve the chromedriver binary once and reuse the path across runs.
+# ChromeDriverManager().install() does version resolution (and may hit the
+# network) on every call; the scrapers now go through resolve_driver_path(),
+# which checks, in order:
+#
+#   CHROMEDRIVER_PATH=/usr/bin/chromedriver   explicit binary, never resolved or cached
+#   the cache file (CHROMEDRIVER_CACHE, default src/scripts/.chromedriver.json)
+#     - younger than CHROMEDRIVER_CACHE_TTL seconds (default 7 days), or any age
+#       with CHROMEDRIVER_OFFLINE=1, where a missing cache is an error instead
+#   ChromeDriverManager().install(), whose result is written to the cache
+#
+#   python3 driver_cache.py show | resolve [--refresh] | invalidate
+import os
+import sys
+import json
+import time
+from typing import Dict, Optional
+
+from metrics import METRICS
+
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chromedriver.json")
+DEFAULT_TTL = 7 * 24 * 3600
+
+_resolved: Optional[str] = None       # per-process memo
+
+
+def cache_path() -> str:
+    return os.environ.get("CHROMEDRIVER_CACHE") or DEFAULT_CACHE
+
+
+def is_offline() -> bool:
+    return os.environ.get("CHROMEDRIVER_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def _ttl() -> float:
+    return float(os.environ.get("CHROMEDRIVER_CACHE_TTL") or DEFAULT_TTL)
+
+
+def read_cache() -> Optional[Dict]:
+    """The cached {"path", "resolvedAt"} entry, or None when missing, unreadable or the binary is gone."""
+    try:
+        with open(cache_path()) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not os.path.isfile(entry.get("path") or ""):
+        return None
+    return entry
+
+
+def _write_cache(path: str):
+    # Write-then-rename so concurrent scrapers never read a partial file
+    target = cache_path()
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"path": path, "resolvedAt": time.time()}, f)
+    os.replace(tmp, target)
+
+
+def invalidate() -> bool:
+    """Forget the cached path (e.g. after a Chrome upgrade). Returns True if there was one."""
+    global _resolved
+    _resolved = None
+    try:
+        os.remove(cache_path())
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def resolve_driver_path(refresh: bool = False) -> str:
+    """Path of a chromedriver binary, resolving through webdriver_manager only when the cache cannot answer."""
+    global _resolved
+    explicit = os.environ.get("CHROMEDRIVER_PATH")
+    if explicit:
+        return explicit
+    if _resolved and not refresh:
+        return _resolved
+
+    offline = is_offline()
+    if not refresh or offline:
+        entry = read_cache()
+        if entry and (offline or time.time() - entry.get("resolvedAt", 0) < _ttl()):
+            METRICS.inc("scrape_driver_resolutions_total", source="cache")
+            _resolved = entry["path"]
+            return _resolved
+        if offline:
+            raise RuntimeError(
+                f"CHROMEDRIVER_OFFLINE is set but {cache_path()} has no usable driver; "
+                "run `python3 driver_cache.py resolve` while online or set CHROMEDRIVER_PATH"
+            )
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    with METRICS.timer("scrape_driver_resolve_seconds"):
+        path = ChromeDriverManager().install()
+    METRICS.inc("scrape_driver_resolutions_total", source="manager")
+    _write_cache(path)
+    _resolved = path
+    return path
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "show"
+    if command not in ("show", "resolve", "invalidate"):
+        print("Usage: python driver_cache.py show | resolve [--refresh] | invalidate")
+        sys.exit(1)
+
+    if command == "invalidate":
+        removed = invalidate()
+        print(f"✅ Removed {cache_path()}" if removed else f"ℹ️ No cache at {cache_path()}")
+    elif command == "resolve":
+        start = time.perf_counter()
+        path = resolve_driver_path(refresh="--refresh" in sys.argv[2:])
+        print(json.dumps({"path": path, "seconds": round(time.perf_counter() - start, 3)}))
+    else:
+        entry = read_cache()
+        if entry:
+            entry["ageSeconds"] = round(time.time() - entry["resolvedAt"])
+            entry["expired"] = entry["ageSeconds"] >= _ttl()
+        print(json.dumps({"cache": cache_path(), "entry": entry, "offline": is_offline(),
+                          "explicit": os.environ.get("CHROMEDRIVER_PATH")}))
@@ -1,6 +1,87 @@
+import os
 import sys
 import json
 import re
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+
+from metrics import METRICS
+import canonical
+from canonical import canonical_state, find_states, state_id, state_name, ministry_id
+
+# -------------------------
+# Vocabulary (compiled once at import)
+# -------------------------
+GENDER_FEMALE = ["women", "female", "girl"]
+GENDER_MALE = ["men", "male", "boy"]
+GENDER_OTHER = ["transgender", "third gender"]
+OCCUPATIONS = ["farmer", "student", "worker", "entrepreneur", "teacher",
+               "doctor", "artisan", "weaver", "fisherman", "self-employed"]
+EDUCATION_RULES = [                      # first matching rule wins
+    (["graduate"], "graduate"),
+    (["postgraduate", "pg"], "postgraduate"),
+    (["matric", "10th"], "10th"),
+    (["12th", "intermediate"], "12th"),
+    (["illiterate"], "none"),
+]
+CATEGORIES = {"sc": "SC", "st": "ST", "obc": "OBC", "ews": "EWS", "general": "General"}
+MARITAL_RULES = [                        # first matching rule wins
+    (["widow"], "widow"),
+    (["unmarried", "single"], "single"),
+    (["married"], "married"),
+]
+DISABILITY_WORDS = ["disability", "handicapped", "divyang"]
+MINORITY_WORDS = ["muslim", "christian", "sikh", "buddhist", "parsi", "minority"]
+
+# Occupations and categories must match as whole words (\b...\b); everything else is a plain substring.
+WORD_KEYWORDS = frozenset(OCCUPATIONS) | frozenset(CATEGORIES)
+KEYWORDS = tuple(sorted(
+    set(GENDER_FEMALE + GENDER_MALE + GENDER_OTHER + DISABILITY_WORDS + MINORITY_WORDS)
+    | {w for words, _ in EDUCATION_RULES + MARITAL_RULES for w in words}
+    | WORD_KEYWORDS
+))
+WORD_CHAR_RE = re.compile(r"\w")
+
+AGE_RANGE_RE = re.compile(r'(\d{1,2})\s*(?:-|to|–)\s*(\d{1,2})\s*years?')
+MIN_AGE_RE = re.compile(r'(\d{1,2})\s*\+?\s*years?\s*(?:and above|or more)?')
+INCOME_RE = re.compile(r'family income (?:less than|upto|up to|not exceeding)\s*₹?\s?([\d,]+)')
+RESIDENT_RE = re.compile(r'resident of ([a-z\s]+)')
+SENTENCE_END_RE = re.compile(r'[.;:\n]')
+
+
+def _has_word(lower_text: str, word: str) -> bool:
+    """Whole-word match (like a \\b-bounded regex), using str.find to jump between candidates."""
+    size, length = len(lower_text), len(word)
+    i = lower_text.find(word)
+    while i != -1:
+        end = i + length
+        if not (i > 0 and WORD_CHAR_RE.match(lower_text, i - 1)) and \
+           not (end < size and WORD_CHAR_RE.match(lower_text, end)):
+            return True
+        i = lower_text.find(word, i + 1)
+    return False
+
+
+def find_keywords(lower_text: str) -> set:
+    """
+    Return every vocabulary keyword present in lower_text.
+    Whole-word keywords are confirmed only where the substring actually occurs,
+    instead of one regex scan per keyword over the whole text.
+    """
+    return {
+        k for k in KEYWORDS
+        if k in lower_text and (k not in WORD_KEYWORDS or _has_word(lower_text, k))
+    }
+
+
+def _first_rule(rules, found):
+    for words, value in rules:
+        if any(w in found for w in words):
+            return value
+    return None
+
 
 def parse_eligibility(text: str, default_state=None, default_ministry=None):
     """
@@ -21,117 +102,439 @@ def parse_eligibility(text: str, default_state=None, default_ministry=None):
         "disability": None,        # physical/mental disability if mentioned
         "minority": None,          # religion/minority group if mentioned
         "other": [],               # fallback text snippets
-        "ministry": default_ministry  # optional: fallback ministry
+        "ministry": default_ministry,  # optional: fallback ministry
+        "stateIds": [],            # canonical.py id per state (0 = unrecognised)
+        "ministryId": ministry_id(default_ministry) or None,
     }
 
-    if not text:
+    if not text or text.isspace():
         # if no eligibility text, just return state/ministry defaults
         if default_state:
-            eligibility["state"] = [default_state]
+            eligibility["state"] = [canonical_state(default_state)]
+            eligibility["stateIds"] = [state_id(default_state)]
         return eligibility
 
     lower_text = text.lower()
+    found = find_keywords(lower_text)
 
     # -------------------------
     # Age Parsing
     # -------------------------
-    age_matches = re.findall(r'(\d{1,2})\s*(?:-|to|–)\s*(\d{1,2})\s*years?', lower_text)
-    if age_matches:
-        eligibility["minAge"], eligibility["maxAge"] = map(int, age_matches[0])
-    else:
-        min_match = re.search(r'(\d{1,2})\s*\+?\s*years?\s*(?:and above|or more)?', lower_text)
-        if min_match:
-            eligibility["minAge"] = int(min_match.group(1))
+    if "year" in lower_text:   # both patterns need "year"; skip the digit scans otherwise
+        age_match = AGE_RANGE_RE.search(lower_text)   # only the first range is used
+        if age_match:
+            eligibility["minAge"], eligibility["maxAge"] = map(int, age_match.groups())
+        else:
+            min_match = MIN_AGE_RE.search(lower_text)
+            if min_match:
+                eligibility["minAge"] = int(min_match.group(1))
 
     # -------------------------
     # Gender
     # -------------------------
-    if any(w in lower_text for w in ["women", "female", "girl"]):
+    if any(w in found for w in GENDER_FEMALE):
         eligibility["gender"] = "female"
-    elif any(w in lower_text for w in ["men", "male", "boy"]):
+    elif any(w in found for w in GENDER_MALE):
         eligibility["gender"] = "male"
-    elif "transgender" in lower_text or "third gender" in lower_text:
+    elif any(w in found for w in GENDER_OTHER):
         eligibility["gender"] = "other"
 
     # -------------------------
     # Occupation
     # -------------------------
-    occupations = ["farmer", "student", "worker", "entrepreneur", "teacher",
-                   "doctor", "artisan", "weaver", "fisherman", "self-employed"]
-    for occ in occupations:
-        if re.search(rf"\b{occ}\b", lower_text):
-            eligibility["occupation"].append(occ)
+    eligibility["occupation"] = [occ for occ in OCCUPATIONS if occ in found]
 
     # -------------------------
     # Education
     # -------------------------
-    if "graduate" in lower_text:
-        eligibility["education"] = "graduate"
-    elif "postgraduate" in lower_text or "pg" in lower_text:
-        eligibility["education"] = "postgraduate"
-    elif "matric" in lower_text or "10th" in lower_text:
-        eligibility["education"] = "10th"
-    elif "12th" in lower_text or "intermediate" in lower_text:
-        eligibility["education"] = "12th"
-    elif "illiterate" in lower_text:
-        eligibility["education"] = "none"
+    eligibility["education"] = _first_rule(EDUCATION_RULES, found)
 
     # -------------------------
     # Caste / Category
     # -------------------------
-    categories = {"sc": "SC", "st": "ST", "obc": "OBC", "ews": "EWS", "general": "General"}
-    for key, value in categories.items():
-        if re.search(rf"\b{key}\b", lower_text):
+    for key, value in CATEGORIES.items():   # last match wins
+        if key in found:
             eligibility["castecategory"] = value
 
     # -------------------------
     # Income
     # -------------------------
-    income_match = re.search(r'family income (?:less than|upto|up to|not exceeding)\s*₹?\s?([\d,]+)', lower_text)
+    income_match = INCOME_RE.search(lower_text)
     if income_match:
         eligibility["income"] = int(income_match.group(1).replace(",", ""))
 
     # -------------------------
     # Marital Status
     # -------------------------
-    if "widow" in lower_text:
-        eligibility["maritalStatus"] = "widow"
-    elif "unmarried" in lower_text or "single" in lower_text:
-        eligibility["maritalStatus"] = "single"
-    elif "married" in lower_text:
-        eligibility["maritalStatus"] = "married"
+    eligibility["maritalStatus"] = _first_rule(MARITAL_RULES, found)
 
     # -------------------------
     # Disability
     # -------------------------
-    if any(w in lower_text for w in ["disability", "handicapped", "divyang"]):
+    if any(w in found for w in DISABILITY_WORDS):
         eligibility["disability"] = True
 
     # -------------------------
     # Minority (religion)
     # -------------------------
-    if any(w in lower_text for w in ["muslim", "christian", "sikh", "buddhist", "parsi", "minority"]):
+    if any(w in found for w in MINORITY_WORDS):
         eligibility["minority"] = True
 
     # -------------------------
     # State / Region
     # -------------------------
-    state_match = re.findall(r'resident of ([a-z\s]+)', lower_text)
-    if state_match:
-        eligibility["state"] = [s.strip().title() for s in state_match]
+    states = []
+    for match in RESIDENT_RE.finditer(lower_text):
+        # Read the list of known states after "resident of" (to the end of the sentence);
+        # keep the raw phrase when none is recognised
+        end = SENTENCE_END_RE.search(lower_text, match.end(1))
+        segment = lower_text[match.start(1):end.start() if end else None]
+        sid = state_id(segment)     # the usual "resident of <state>." is one cached lookup
+        ids = [sid] if sid else find_states(segment, leading=True)
+        for name in [state_name(i) for i in ids] or [match.group(1).strip().title()]:
+            if name not in states:
+                states.append(name)
+    if states:
+        eligibility["state"] = states
     elif default_state:
-        eligibility["state"] = [default_state]  # fallback to scheme.state
+        eligibility["state"] = [canonical_state(default_state)]  # fallback to scheme.state
+    eligibility["stateIds"] = [state_id(s) for s in eligibility["state"]]
 
     # -------------------------
     # Fallback
     # -------------------------
-    if not any(v for k, v in eligibility.items() if k not in ["state", "ministry"] and v not in [None, [], False]):
+    if not any(v for k, v in eligibility.items()
+               if k not in ["state", "ministry", "stateIds", "ministryId"] and v not in [None, [], False]):
         eligibility["other"].append(text.strip())
 
     return eligibility
 
 
+# -------------------------
+# Parse cache
+# -------------------------
+# Bump when parse_eligibility's output format changes in a way the rule digest cannot see.
+PARSER_VERSION = 2
+DEFAULT_MEMORY_ENTRIES = 4096
+DEFAULT_DISK_ENTRIES = 200_000
+
+
+def _code_digest(code) -> str:
+    """Stable fingerprint of a code object and its nested comprehensions (no addresses or line numbers)."""
+    consts = [_code_digest(c) if hasattr(c, "co_code") else repr(c) for c in code.co_consts]
+    return hashlib.sha256(repr((code.co_code, consts, code.co_names)).encode("utf-8")).hexdigest()
+
+
+# Any change to the vocabulary, the patterns or the parsing code yields a new
+# digest, and cached results from an older digest are never served.
+RULES_DIGEST = hashlib.sha256(json.dumps([
+    PARSER_VERSION,
+    GENDER_FEMALE, GENDER_MALE, GENDER_OTHER, OCCUPATIONS, EDUCATION_RULES, CATEGORIES,
+    MARITAL_RULES, DISABILITY_WORDS, MINORITY_WORDS, sorted(WORD_KEYWORDS),
+    [r.pattern for r in (AGE_RANGE_RE, MIN_AGE_RE, INCOME_RE, RESIDENT_RE, SENTENCE_END_RE, WORD_CHAR_RE)],
+    [_code_digest(f.__code__) for f in (_has_word, find_keywords, _first_rule, parse_eligibility)],
+    canonical.TABLES_DIGEST,
+    [_code_digest(f.__code__) for f in (canonical.tokens, canonical._strip_affixes, canonical.Vocabulary.lookup,
+                                        canonical.Vocabulary._match_at, canonical.Vocabulary.scan)],
+], ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(text, default_state=None, default_ministry=None) -> str:
+    """
+    Content address of one parse. Text is normalised by stripping the ends only:
+    every match the parser makes is interior, whitespace-only text parses like
+    empty text, but the fallback and the resident state keep the original
+    spelling, so case and inner whitespace are significant.
+    """
+    payload = json.dumps([RULES_DIGEST, (text or "").strip(), default_state, default_ministry],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    Memoised parse_eligibility: an in-process LRU in front of an optional SQLite
+    store bounded to max_disk entries (least recently used rows are evicted on
+    each commit).
+    Rows written under another RULES_DIGEST are dropped when the store is opened.
+    """
+
+    def __init__(self, path=None, max_memory=DEFAULT_MEMORY_ENTRIES, max_disk=DEFAULT_DISK_ENTRIES):
+        self.memory = OrderedDict()
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.counts = {"memoryHits": 0, "diskHits": 0, "misses": 0, "evicted": 0, "invalidated": 0}
+        self.parse_seconds = 0.0
+        self._touched = {}
+        self.conn = None
+        if path:
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS parsed (
+                       key TEXT PRIMARY KEY,
+                       digest TEXT NOT NULL,
+                       value TEXT NOT NULL,
+                       used REAL NOT NULL
+                   )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS parsed_used ON parsed (used)")
+            self.counts["invalidated"] = self.conn.execute(
+                "DELETE FROM parsed WHERE digest != ?", (RULES_DIGEST,)
+            ).rowcount
+            self.conn.commit()
+
+    def parse(self, text, default_state=None, default_ministry=None):
+        key = cache_key(text, default_state, default_ministry)
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory.move_to_end(key)
+            self.counts["memoryHits"] += 1
+            METRICS.inc("parse_cache_lookups_total", result="memory")
+            if self.conn is not None:
+                self._touched[key] = time.time()
+            return json.loads(value)
+
+        if self.conn is not None:
+            row = self.conn.execute("SELECT value FROM parsed WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.counts["diskHits"] += 1
+                METRICS.inc("parse_cache_lookups_total", result="disk")
+                self._touched[key] = time.time()
+                self._remember(key, row[0])
+                return json.loads(row[0])
+
+        self.counts["misses"] += 1
+        METRICS.inc("parse_cache_lookups_total", result="miss")
+        start = time.perf_counter()
+        parsed = parse_eligibility(text, default_state, default_ministry)
+        self.parse_seconds += time.perf_counter() - start
+        value = json.dumps(parsed, ensure_ascii=False)
+        self._remember(key, value)
+        if self.conn is not None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parsed (key, digest, value, used) VALUES (?, ?, ?, ?)",
+                (key, RULES_DIGEST, value, time.time()),
+            )
+            if self.counts["misses"] % 1000 == 0:
+                self.commit()
+        return parsed
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        if len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def commit(self):
+        """Flush recency updates and evict the least recently used rows over max_disk."""
+        if self.conn is None:
+            return
+        if self._touched:
+            self.conn.executemany("UPDATE parsed SET used = ? WHERE key = ?",
+                                  [(used, key) for key, used in self._touched.items()])
+            self._touched = {}
+        excess = self.conn.execute("SELECT COUNT(*) FROM parsed").fetchone()[0] - self.max_disk
+        if excess > 0:
+            self.counts["evicted"] += self.conn.execute(
+                "DELETE FROM parsed WHERE key IN (SELECT key FROM parsed ORDER BY used LIMIT ?)", (excess,)
+            ).rowcount
+        self.conn.commit()
+
+    def stats(self) -> dict:
+        hits = self.counts["memoryHits"] + self.counts["diskHits"]
+        lookups = hits + self.counts["misses"]
+        per_parse = self.parse_seconds / self.counts["misses"] if self.counts["misses"] else 0.0
+        return {
+            **self.counts,
+            "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+            "parseSeconds": round(self.parse_seconds, 6),
+            "savedSecondsEstimate": round(per_parse * hits, 6),
+            "rulesDigest": RULES_DIGEST,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def _parse_line(line: str, parse=parse_eligibility) -> dict:
+    """One JSONL record -> {"id", "parsed"}, or {"id", "error"} when it cannot be parsed."""
+    record = {}
+    try:
+        record = json.loads(line)
+        with METRICS.timer("parse_seconds", parser=getattr(parse, "__qualname__", "parse")):
+            parsed = parse(
+                record.get("eligibility") or "",
+                record.get("state") or None,
+                record.get("ministry") or None,
+            )
+        return {"id": record.get("id"), "parsed": parsed}
+    except Exception as e:
+        METRICS.inc("parse_errors_total")
+        return {"id": record.get("id") if isinstance(record, dict) else None, "error": str(e)}
+
+
+def parse_stream(lines, out, parse=parse_eligibility):
+    """
+    Parse a JSONL stream of {id, eligibility, state, ministry} records,
+    writing one {"id", "parsed"} line per input line. Holds one record at a time.
+    `parse` may be a ParseCache.parse to memoise repeated texts.
+    """
+    count = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        out.write(json.dumps(_parse_line(line, parse), ensure_ascii=False) + "\n")
+        count += 1
+    out.flush()
+    return count
+
+
+# -------------------------
+# Parallel driver
+# -------------------------
+DEFAULT_CHUNK_SIZE = 256
+
+
+def _parse_chunk(lines, parse=parse_eligibility):
+    """Worker: parse a chunk of records and serialise the output lines off the main process."""
+    return [json.dumps(_parse_line(line, parse), ensure_ascii=False) for line in lines]
+
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        line = line.strip()
+        if line:
+            chunk.append(line)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _crashed_record(line: str) -> str:
+    try:
+        record_id = json.loads(line).get("id")
+    except Exception:
+        record_id = None
+    return json.dumps({"id": record_id, "error": "worker crashed while parsing this record"})
+
+
+def parse_parallel(lines, out, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, parse=parse_eligibility):
+    """
+    parse_stream across a process pool. Chunks of records are parsed by `workers`
+    processes (CPU count by default) and written in input order.
+
+    If a worker dies the pool is restarted and every unfinished chunk becomes a
+    suspect that is re-run on its own. A suspect that crashes alone is split into
+    single records, and a single record that crashes alone is written as an
+    {"id", "error"} line, so no record is lost or reordered.
+    Returns the number of records written.
+    """
+    from collections import deque
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    chunks = _chunks(lines, chunk_size)
+    pending = deque()                 # [lines, future or None, suspect], in input order
+    count = 0
+
+    def settled(results=None, error=None):
+        future = Future()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(results)
+        return future
+
+    def submit(chunk):
+        # A pool that broke since the last result() refuses new work the same way
+        try:
+            return pool.submit(_parse_chunk, chunk, parse)
+        except BrokenProcessPool as e:
+            return settled(error=e)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            # New work is only scheduled while no suspect is waiting to run alone
+            while len(pending) < max_in_flight and not any(e[2] for e in pending):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append([chunk, submit(chunk), False])
+            if not pending:
+                break
+
+            head = pending[0]
+            if head[1] is None:
+                head[1] = submit(head[0])
+            try:
+                results = head[1].result()
+            except BrokenProcessPool:
+                METRICS.inc("parse_worker_crashes_total")
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                if head[2]:
+                    # It was the only task running, so it caused the crash
+                    pending.popleft()
+                    if len(head[0]) > 1:
+                        pending.extendleft([[line], None, True] for line in reversed(head[0]))
+                    else:
+                        pending.appendleft([head[0], settled([_crashed_record(head[0][0])]), False])
+                else:
+                    for entry in pending:
+                        if not (entry[1].done() and entry[1].exception() is None):
+                            entry[1], entry[2] = None, True
+                continue
+
+            pending.popleft()
+            for result in results:
+                out.write(result + "\n")
+            count += len(results)
+        out.flush()
+        return count
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
 if __name__ == "__main__":
+    import metrics
+
+    metrics.start_from_env()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--stream":
+        # JSONL records on stdin, one parsed record per line on stdout.
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Parse JSONL eligibility records")
+        parser.add_argument("--stream", action="store_true")
+        parser.add_argument("--cache", help="memoise parses in this SQLite store; hit/miss stats go to stderr")
+        parser.add_argument("--workers", type=int, help="parse in this many processes (0 = CPU count)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per worker task")
+        args = parser.parse_args()
+        if args.cache and args.workers is not None:
+            parser.error("--cache and --workers cannot be combined; the cache lives in one process")
+
+        if args.cache:
+            cache = ParseCache(args.cache)
+            try:
+                parse_stream(sys.stdin, sys.stdout, cache.parse)
+            finally:
+                cache.close()
+            print(json.dumps({"cache": cache.stats()}), file=sys.stderr)
+        elif args.workers is not None:
+            parse_parallel(sys.stdin, sys.stdout, args.workers or None, args.chunk_size)
+        else:
+            parse_stream(sys.stdin, sys.stdout)
+        sys.exit(0)
+
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No eligibility text provided"}))
         sys.exit(1)
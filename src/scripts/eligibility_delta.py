@@ -0,0 +1,310 @@
+# src/scripts/eligibility_delta.py
+# Incremental maintenance of User.eligibleSchemes.
+# Keeps an EligibilityIndex of scheme criteria and a UserIndex of profiles in a
+# state directory, reads only rows whose updatedAt passed the last watermark,
+# and re-evaluates only the users a change can affect:
+#   - a user whose profile changed;
+#   - for a scheme whose `eligible` changed, every user its old or new criteria match.
+# Affected users are queued in SQLite before the indexes move on, so an
+# interrupted run resumes from the queue and re-running is a no-op.
+import os
+import json
+import sqlite3
+from typing import List, Dict, Optional, Iterable
+
+from eligibility_index import EligibilityIndex, ELIGIBLE_SCHEMES_K, rank_scheme_ids
+from user_index import UserIndex, PROFILE_FIELDS
+
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".eligibility_delta")
+DEFAULT_BATCH = 500
+
+
+def _same_criteria(old, new) -> bool:
+    return json.dumps(old or [], sort_keys=True) == json.dumps(new or [], sort_keys=True)
+
+
+class DeltaEngine:
+    """
+    State directory layout:
+      state.sqlite  watermarks(source, updated_at), pending(user_id), written(user_id, schemes)
+      schemes.json  EligibilityIndex of {id, eligible}; results are ranked by rank_scheme_ids,
+                    so insertion (updatedAt) order does not affect ties
+      users.json    UserIndex of the profile fields check_eligibility reads
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        self.schemes_path = os.path.join(state_dir, "schemes.json")
+        self.users_path = os.path.join(state_dir, "users.json")
+        self.schemes = EligibilityIndex.load(self.schemes_path) if os.path.exists(self.schemes_path) \
+            else EligibilityIndex()
+        self.users = UserIndex.load(self.users_path) if os.path.exists(self.users_path) else UserIndex()
+
+        self.conn = sqlite3.connect(os.path.join(state_dir, "state.sqlite"))
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS watermarks (source TEXT PRIMARY KEY, updated_at TEXT NOT NULL);
+               CREATE TABLE IF NOT EXISTS pending (user_id TEXT PRIMARY KEY);
+               CREATE TABLE IF NOT EXISTS written (user_id TEXT PRIMARY KEY, schemes TEXT NOT NULL);"""
+        )
+
+    # -----------------------------
+    # Watermarks
+    # -----------------------------
+    def watermark(self, source: str) -> Optional[str]:
+        row = self.conn.execute("SELECT updated_at FROM watermarks WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, source: str, updated_at: Optional[str]):
+        if updated_at is None:
+            return
+        self.conn.execute(
+            "INSERT INTO watermarks (source, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET updated_at = excluded.updated_at",
+            (source, updated_at),
+        )
+
+    # -----------------------------
+    # Change folding
+    # -----------------------------
+    def known_scheme_ids(self) -> set:
+        return set(self.schemes.positions)
+
+    def known_user_ids(self) -> set:
+        return set(self.users.profiles)
+
+    def _matched_users(self, criteria) -> set:
+        matched = set()
+        for elig in criteria or []:
+            if isinstance(elig, dict):
+                matched |= self.users.match_criterion(elig, strict=False, scored=True)
+        return matched
+
+    def apply_changes(self, users: Iterable[Dict] = (), schemes: Iterable[Dict] = (),
+                      deleted_users: Iterable[str] = (), deleted_schemes: Iterable[str] = ()) -> Dict:
+        """
+        Fold changed rows into the indexes and queue every user whose list could change.
+        Rows identical to what is already indexed are ignored, so replaying a window is harmless.
+        Call save() afterwards to persist the indexes.
+        """
+        affected = set()
+        stats = {"usersChanged": 0, "schemesChanged": 0, "usersDeleted": 0, "schemesDeleted": 0}
+
+        # Users first, so scheme changes below are matched against current profiles
+        for user in users:
+            uid = str(user["id"])
+            before = self.users.profiles.get(uid)
+            self.users.upsert(user)
+            if self.users.profiles[uid] != before:
+                affected.add(uid)
+                stats["usersChanged"] += 1
+        for uid in deleted_users:
+            if self.users.remove(str(uid)):
+                self.conn.execute("DELETE FROM written WHERE user_id = ?", (str(uid),))
+                self.conn.execute("DELETE FROM pending WHERE user_id = ?", (str(uid),))
+                affected.discard(str(uid))
+                stats["usersDeleted"] += 1
+
+        for scheme in schemes:
+            key = str(scheme["id"])
+            position = self.schemes.positions.get(key)
+            old = self.schemes.schemes[position].get("eligible") if position is not None else []
+            new = [e for e in scheme.get("eligible") or [] if isinstance(e, dict)]
+            if position is not None and _same_criteria(old, new):
+                continue
+            affected |= self._matched_users(old)
+            self.schemes.upsert({"id": key, "eligible": new})
+            affected |= self._matched_users(new)
+            stats["schemesChanged"] += 1
+        for key in deleted_schemes:
+            position = self.schemes.positions.get(str(key))
+            if position is None:
+                continue
+            affected |= self._matched_users(self.schemes.schemes[position].get("eligible"))
+            self.schemes.remove(str(key))
+            stats["schemesDeleted"] += 1
+
+        self.conn.executemany("INSERT OR IGNORE INTO pending (user_id) VALUES (?)", ((u,) for u in affected))
+        self.conn.commit()
+        stats["queued"] = len(affected)
+        return stats
+
+    def save(self):
+        self.schemes.save(self.schemes_path)
+        self.users.save(self.users_path)
+
+    # -----------------------------
+    # Recompute
+    # -----------------------------
+    def recompute(self, user_id: str) -> Optional[List[str]]:
+        """Every eligible scheme id for one indexed user, best first, ties by scheme id (rank_scheme_ids)."""
+        profile = self.users.profiles.get(user_id)
+        if profile is None:
+            return None
+        state, education, occupation, gender, _, age, _ = profile
+        user = {"state": state, "education": education, "occupation": occupation, "gender": gender, "age": age}
+        scored = ((self.schemes.schemes[position]["id"], score) for position, score in self.schemes.scores(user))
+        return rank_scheme_ids(scored, ELIGIBLE_SCHEMES_K)
+
+    def pending_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    async def flush(self, write, batch_size: int = DEFAULT_BATCH) -> Dict:
+        """
+        Drain the pending queue in batches: recompute each user, call
+        `await write({user_id: [scheme ids]})` with the lists that differ from the
+        last written ones, then dequeue the batch. Safe to interrupt at any point.
+        """
+        stats = {"evaluated": 0, "written": 0}
+        while True:
+            batch = [row[0] for row in self.conn.execute(
+                "SELECT user_id FROM pending ORDER BY user_id LIMIT ?", (batch_size,))]
+            if not batch:
+                return stats
+
+            marks = ",".join("?" * len(batch))
+            written = {uid: json.loads(schemes) for uid, schemes in self.conn.execute(
+                f"SELECT user_id, schemes FROM written WHERE user_id IN ({marks})", batch)}
+            updates = {}
+            for uid in batch:
+                eligible = self.recompute(uid)
+                if eligible is not None and eligible != written.get(uid):
+                    updates[uid] = eligible
+            stats["evaluated"] += len(batch)
+
+            if updates:
+                await write(updates)
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO written (user_id, schemes) VALUES (?, ?)",
+                    ((uid, json.dumps(ids)) for uid, ids in updates.items()),
+                )
+                stats["written"] += len(updates)
+            self.conn.execute(f"DELETE FROM pending WHERE user_id IN ({marks})", batch)
+            self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+# -----------------------------
+# Prisma source / sink
+# -----------------------------
+async def _changed_rows(model, since: Optional[str], chunk: int):
+    """Rows with updatedAt >= since (every row without a watermark), paged in updatedAt order."""
+    from datetime import datetime
+
+    where = {"updatedAt": {"gte": datetime.fromisoformat(since)}} if since else {}
+    cursor = None
+    while True:
+        page = await model.find_many(
+            where=where,
+            order=[{"updatedAt": "asc"}, {"id": "asc"}],
+            take=chunk,
+            **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        for row in page:
+            yield row
+        if len(page) < chunk:
+            return
+        cursor = page[-1].id
+
+
+async def _all_ids(model, chunk: int) -> set:
+    ids, cursor = set(), None
+    while True:
+        page = await model.find_many(
+            order={"id": "asc"}, take=chunk, **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        ids.update(row.id for row in page)
+        if len(page) < chunk:
+            return ids
+        cursor = page[-1].id
+
+
+async def sync_db(engine: DeltaEngine, batch_size: int = DEFAULT_BATCH) -> Dict:
+    from prisma import Prisma
+
+    db = Prisma()
+    await db.connect()
+    try:
+        user_mark, scheme_mark = engine.watermark("users"), engine.watermark("schemes")
+        users, schemes = [], []
+        async for u in _changed_rows(db.user, user_mark, batch_size):
+            users.append({"id": u.id, **{field: getattr(u, field) for field in PROFILE_FIELDS}})
+            user_mark = u.updatedAt.isoformat()
+        async for s in _changed_rows(db.scheme, scheme_mark, batch_size):
+            schemes.append({"id": s.id, "eligible": s.eligible})
+            scheme_mark = s.updatedAt.isoformat()
+
+        # Deletions do not touch updatedAt; a count mismatch triggers an id reconcile
+        deleted_users, deleted_schemes = [], []
+        known_users = engine.known_user_ids() | {u["id"] for u in users}
+        if await db.user.count() != len(known_users):
+            deleted_users = list(known_users - await _all_ids(db.user, batch_size))
+        known_schemes = engine.known_scheme_ids() | {s["id"] for s in schemes}
+        if await db.scheme.count() != len(known_schemes):
+            deleted_schemes = list(known_schemes - await _all_ids(db.scheme, batch_size))
+
+        stats = engine.apply_changes(users, schemes, deleted_users, deleted_schemes)
+        engine.save()
+        engine.set_watermark("users", user_mark)
+        engine.set_watermark("schemes", scheme_mark)
+        engine.conn.commit()
+
+        async def write(updates):
+            async with db.batch_() as batcher:
+                for uid, eligible in updates.items():
+                    batcher.user.update_many(where={"id": uid}, data={"eligibleSchemes": {"set": eligible}})
+
+        stats.update(await engine.flush(write, batch_size))
+        return stats
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Incrementally maintain User.eligibleSchemes")
+    parser.add_argument("--state", default=DEFAULT_STATE_DIR, help="state directory (indexes, queue, watermarks)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="rows per page / users per write batch")
+    parser.add_argument("--db", action="store_true", help="read changes from Prisma and write User.eligibleSchemes")
+    parser.add_argument("--users", help="users JSON array snapshot (offline mode)")
+    parser.add_argument("--schemes", help="schemes JSON array snapshot (offline mode)")
+    args = parser.parse_args()
+
+    engine = DeltaEngine(args.state)
+    try:
+        if args.db:
+            print(json.dumps(asyncio.run(sync_db(engine, args.batch))))
+            sys.exit(0)
+
+        if not args.users and not args.schemes:
+            parser.error("--db or snapshot files are required")
+
+        # Offline: snapshots replace the indexed state; rows missing from a given snapshot are deletions
+        users_data, schemes_data = [], []
+        if args.users:
+            with open(args.users) as f:
+                users_data = json.load(f)
+        if args.schemes:
+            with open(args.schemes) as f:
+                schemes_data = json.load(f)
+        summary = engine.apply_changes(
+            users_data, schemes_data,
+            engine.known_user_ids() - {str(u["id"]) for u in users_data} if args.users else (),
+            engine.known_scheme_ids() - {str(s["id"]) for s in schemes_data} if args.schemes else (),
+        )
+        engine.save()
+
+        # One JSON line per changed user: {"userId": ..., "eligibleSchemes": [scheme ids]}
+        async def emit(updates):
+            for uid, eligible in updates.items():
+                print(json.dumps({"userId": uid, "eligibleSchemes": eligible}))
+
+        summary.update(asyncio.run(engine.flush(emit, args.batch)))
+        print(json.dumps({"summary": summary}), file=sys.stderr)
+    finally:
+        engine.close()
@@ -0,0 +1,298 @@
+# src/scripts/eligibility_index.py
+# Inverted index over parsed scheme `eligible` criteria.
+# Gives the same top-5 as user_eligibility.check_eligibility, but only scores
+# criteria that survive the state / education-occupation / gender postings.
+import os
+import json
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from canonical import state_key, is_all_states
+
+INDEX_VERSION = 2
+TOP_K = 5
+# User.eligibleSchemes holds every eligible scheme, best first (None = no cut-off);
+# bulk_eligibility and eligibility_delta both write it with this
+ELIGIBLE_SCHEMES_K: Optional[int] = None
+
+
+def rank_scheme_ids(scored: Iterable[Tuple[str, int]], k: Optional[int] = ELIGIBLE_SCHEMES_K) -> List[str]:
+    """
+    Scheme ids from (id, score) pairs, best score first and ascending id on ties.
+    This is the User.eligibleSchemes order: both writers use it, so a tie never
+    depends on the order the schemes were read or indexed in.
+    """
+    return [scheme_id for scheme_id, _ in sorted(scored, key=lambda item: (-item[1], item[0]))[:k]]
+
+
+def normalize_values(value) -> List[str]:
+    """Normalise a str / list field the way check_eligibility does."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [v.strip().lower() for v in value if isinstance(v, str)]
+
+
+def normalize_states(value) -> Optional[List[str]]:
+    """Return canonical state keys (see canonical.state_key), or None when the criterion applies to every state."""
+    if isinstance(value, str):
+        states = [s.strip() for s in value.split(",") if s.strip()]
+    elif isinstance(value, list):
+        states = [s.strip() for s in value if isinstance(s, str) and s.strip()]
+    else:
+        states = []
+    if not states or any(is_all_states(s) for s in states):
+        return None
+    return [state_key(s) for s in states]
+
+
+def user_state_key(user: Dict) -> str:
+    """The user's state as a canonical key, "" when missing."""
+    state = (user.get("state") or "").strip()
+    return state_key(state) if state else ""
+
+
+def _scheme_key(scheme: Dict, position: int) -> str:
+    return str(scheme.get("id") or scheme.get("link") or f"#{position}")
+
+
+class EligibilityIndex:
+    """
+    Posting lists keyed by canonical state, education, occupation and gender,
+    plus sorted min/max age bounds. Each posting holds criterion ids; a
+    criterion is one dict in a scheme's `eligible` list.
+    """
+
+    def __init__(self):
+        self.schemes: List[Optional[Dict]] = []      # catalog order; None for removed
+        self.positions: Dict[str, int] = {}          # scheme key -> position
+        self.criteria: Dict[int, list] = {}          # cid -> [position, minAge, maxAge, has_gender]
+        self.scheme_criteria: Dict[int, List[int]] = {}
+        self.state_any: set = set()
+        self.by_state: Dict[str, set] = {}
+        self.by_education: Dict[str, set] = {}
+        self.by_occupation: Dict[str, set] = {}
+        self.gender_any: set = set()
+        self.by_gender: Dict[str, set] = {}
+        self.min_ages: List[tuple] = []              # sorted (minAge, cid)
+        self.max_ages: List[tuple] = []              # sorted (maxAge, cid)
+        self._next_cid = 0
+
+    # -----------------------------
+    # Building / incremental updates
+    # -----------------------------
+    @classmethod
+    def build(cls, schemes: Iterable[Dict]) -> "EligibilityIndex":
+        index = cls()
+        for scheme in schemes:
+            index.upsert(scheme)
+        return index
+
+    def upsert(self, scheme: Dict):
+        """Add a scheme, or replace the criteria of one already indexed (keeps its position)."""
+        key = _scheme_key(scheme, len(self.schemes))
+        position = self.positions.get(key)
+        if position is None:
+            position = len(self.schemes)
+            self.schemes.append(scheme)
+            self.positions[key] = position
+        else:
+            self._drop_criteria(position)
+            self.schemes[position] = scheme
+
+        cids = []
+        for elig in scheme.get("eligible") or []:
+            if isinstance(elig, dict):
+                cids.append(self._add_criterion(position, elig))
+        self.scheme_criteria[position] = cids
+
+    def remove(self, scheme_key: str) -> bool:
+        position = self.positions.pop(scheme_key, None)
+        if position is None:
+            return False
+        self._drop_criteria(position)
+        self.schemes[position] = None
+        return True
+
+    def _add_criterion(self, position: int, elig: Dict) -> int:
+        cid = self._next_cid
+        self._next_cid += 1
+
+        states = normalize_states(elig.get("state"))
+        genders = normalize_values(elig.get("gender")) if elig.get("gender") else None
+        min_age, max_age = elig.get("minAge"), elig.get("maxAge")
+        self.criteria[cid] = [position, min_age, max_age, genders is not None]
+
+        if states is None:
+            self.state_any.add(cid)
+        for s in states or []:
+            self.by_state.setdefault(s, set()).add(cid)
+        for e in normalize_values(elig.get("education")):
+            self.by_education.setdefault(e, set()).add(cid)
+        for o in normalize_values(elig.get("occupation")):
+            self.by_occupation.setdefault(o, set()).add(cid)
+        if genders is None:
+            self.gender_any.add(cid)
+        for g in genders or []:
+            self.by_gender.setdefault(g, set()).add(cid)
+        if min_age is not None:
+            self.min_ages.insert(bisect_left(self.min_ages, (min_age, cid)), (min_age, cid))
+        if max_age is not None:
+            self.max_ages.insert(bisect_left(self.max_ages, (max_age, cid)), (max_age, cid))
+        return cid
+
+    def _drop_criteria(self, position: int):
+        dropped = set(self.scheme_criteria.pop(position, []))
+        if not dropped:
+            return
+        for cid in dropped:
+            del self.criteria[cid]
+        self.state_any -= dropped
+        self.gender_any -= dropped
+        for postings in (self.by_state, self.by_education, self.by_occupation, self.by_gender):
+            for value in list(postings):
+                postings[value] -= dropped
+                if not postings[value]:
+                    del postings[value]
+        self.min_ages = [b for b in self.min_ages if b[1] not in dropped]
+        self.max_ages = [b for b in self.max_ages if b[1] not in dropped]
+
+    # -----------------------------
+    # Matching
+    # -----------------------------
+    def _age_filter(self, candidates: set, age) -> set:
+        # Excluded criteria are a suffix of min_ages (min > age) and a prefix of max_ages (max < age).
+        too_young = len(self.min_ages) - bisect_right(self.min_ages, (age, float("inf")))
+        too_old = bisect_left(self.max_ages, (age, -1))
+        if too_young + too_old < len(candidates):
+            excluded = {cid for _, cid in self.min_ages[len(self.min_ages) - too_young:]}
+            excluded.update(cid for _, cid in self.max_ages[:too_old])
+            return candidates - excluded
+        return {
+            cid for cid in candidates
+            if not ((self.criteria[cid][1] is not None and age < self.criteria[cid][1]) or
+                    (self.criteria[cid][2] is not None and age > self.criteria[cid][2]))
+        }
+
+    def match(self, user: Dict, k: Optional[int] = TOP_K) -> List[Dict]:
+        """Same result as check_eligibility(user, schemes) over the indexed catalog."""
+        return [self.schemes[position] for position, _ in self.scores(user)[:k]]
+
+    def scores(self, user: Dict) -> List[tuple]:
+        """Return (position, best score) for every eligible scheme, best first, catalog order on ties."""
+        user_state = user_state_key(user)
+        if not user_state:
+            return []
+        user_edu = (user.get("education") or "").strip().lower()
+        user_occ = (user.get("occupation") or "").strip().lower()
+        user_age = user.get("age")
+        user_gender = (user.get("gender") or "").strip().lower()
+
+        by_edu_or_occ = self.by_education.get(user_edu, set()) | self.by_occupation.get(user_occ, set())
+        if not by_edu_or_occ:
+            return []
+        # Filter the (small) edu/occ candidates rather than building unions of the broad postings
+        in_state = self.by_state.get(user_state, set())
+        in_gender = self.by_gender.get(user_gender, set())
+        candidates = {
+            cid for cid in by_edu_or_occ
+            if (cid in self.state_any or cid in in_state) and (cid in self.gender_any or cid in in_gender)
+        }
+        if user_age is not None and candidates:
+            candidates = self._age_filter(candidates, user_age)
+
+        best: Dict[int, int] = {}
+        for cid in candidates:
+            position, _, _, has_gender = self.criteria[cid]
+            score = 2 + (user_age is not None) + has_gender
+            if score > best.get(position, 0):
+                best[position] = score
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def to_dict(self) -> Dict:
+        def dump(postings):
+            return {value: sorted(cids) for value, cids in postings.items()}
+
+        return {
+            "version": INDEX_VERSION,
+            "schemes": self.schemes,
+            "positions": self.positions,
+            "criteria": {str(cid): c for cid, c in self.criteria.items()},
+            "scheme_criteria": {str(p): cids for p, cids in self.scheme_criteria.items()},
+            "state_any": sorted(self.state_any),
+            "by_state": dump(self.by_state),
+            "by_education": dump(self.by_education),
+            "by_occupation": dump(self.by_occupation),
+            "gender_any": sorted(self.gender_any),
+            "by_gender": dump(self.by_gender),
+            "min_ages": self.min_ages,
+            "max_ages": self.max_ages,
+            "next_cid": self._next_cid,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EligibilityIndex":
+        if data.get("version") == 1:
+            # Version 1 keyed states by their raw lower-case spelling; re-index under canonical keys
+            return cls.build(s for s in data["schemes"] if s is not None)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {data.get('version')}")
+
+        def load(postings):
+            return {value: set(cids) for value, cids in postings.items()}
+
+        index = cls()
+        index.schemes = data["schemes"]
+        index.positions = data["positions"]
+        index.criteria = {int(cid): c for cid, c in data["criteria"].items()}
+        index.scheme_criteria = {int(p): cids for p, cids in data["scheme_criteria"].items()}
+        index.state_any = set(data["state_any"])
+        index.by_state = load(data["by_state"])
+        index.by_education = load(data["by_education"])
+        index.by_occupation = load(data["by_occupation"])
+        index.gender_any = set(data["gender_any"])
+        index.by_gender = load(data["by_gender"])
+        index.min_ages = [tuple(b) for b in data["min_ages"]]
+        index.max_ages = [tuple(b) for b in data["max_ages"]]
+        index._next_cid = data["next_cid"]
+        return index
+
+    def save(self, path: str):
+        # Write-then-rename so a concurrent reader never sees a half-written index
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EligibilityIndex":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "match", "update"):
+        print("Usage: python eligibility_index.py build schemes.json index.json")
+        print("       python eligibility_index.py match index.json user.json")
+        print("       python eligibility_index.py update index.json scheme.json")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "build":
+        with open(sys.argv[2]) as f:
+            EligibilityIndex.build(json.load(f)).save(sys.argv[3])
+    elif command == "match":
+        index = EligibilityIndex.load(sys.argv[2])
+        with open(sys.argv[3]) as f:
+            print(json.dumps(index.match(json.load(f)), indent=2))
+    elif command == "update":
+        index = EligibilityIndex.load(sys.argv[2])
+        with open(sys.argv[3]) as f:
+            index.upsert(json.load(f))
+        index.save(sys.argv[2])
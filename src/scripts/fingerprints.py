@@ -0,0 +1,147 @@
+# src/scripts/fingerprints.py
+# Per-link crawl fingerprints: HTTP validators (ETag / Last-Modified) plus a hash
+# of every extracted section, so a re-crawl can skip unchanged pages and report
+# only the sections that actually changed.
+#
+# A crawl stages fingerprints; they only count once the consumer has saved the
+# scheme and acknowledged its link, so a failed save is re-emitted next crawl:
+#
+#   python3 scraper_http.py --fingerprints .fingerprints.sqlite < links > schemes.jsonl
+#   python3 fingerprints.py ack .fingerprints.sqlite < saved_links
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+COMMIT_EVERY = 100
+
+
+def section_hashes(scheme: Dict) -> Dict[str, str]:
+    """sha256 of every extracted section (everything except link / bookkeeping keys)."""
+    return {
+        field: hashlib.sha256(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+        for field, value in scheme.items()
+        if field not in ("link", "changed", "error")
+    }
+
+
+class FingerprintStore:
+    """
+    SQLite-backed fingerprints keyed by scheme link: `fingerprints` holds the
+    acknowledged ones (what the database has), `pending` those staged by a crawl.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        for table in ("fingerprints", "pending"):
+            self.conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                       link TEXT PRIMARY KEY,
+                       etag TEXT,
+                       last_modified TEXT,
+                       sections TEXT NOT NULL,
+                       updated_at REAL NOT NULL
+                   )"""
+            )
+        self._uncommitted = 0
+
+    def get(self, link: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, sections FROM fingerprints WHERE link = ?", (link,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "sections": json.loads(row[2])}
+
+    def conditional_headers(self, link: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a conditional fetch of link."""
+        stored = self.get(link)
+        headers = {}
+        if stored and stored["etag"]:
+            headers["If-None-Match"] = stored["etag"]
+        if stored and stored["last_modified"]:
+            headers["If-Modified-Since"] = stored["last_modified"]
+        return headers
+
+    def changed_sections(self, scheme: Dict) -> List[str]:
+        """Sections whose hash differs from the stored fingerprint (all of them for a new link)."""
+        hashes = section_hashes(scheme)
+        stored = self.get(scheme["link"])
+        old = stored["sections"] if stored else {}
+        return [field for field, digest in hashes.items() if old.get(field) != digest]
+
+    def _upsert(self, table: str, scheme: Dict, etag: Optional[str], last_modified: Optional[str]):
+        self.conn.execute(
+            f"""INSERT INTO {table} (link, etag, last_modified, sections, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(link) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    sections = excluded.sections,
+                    updated_at = excluded.updated_at""",
+            (scheme["link"], etag, last_modified, json.dumps(section_hashes(scheme)), time.time()),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def record(self, scheme: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Fingerprint a scheme that is already saved."""
+        self._upsert("fingerprints", scheme, etag, last_modified)
+
+    def stage(self, scheme: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Fingerprint an emitted scheme; it takes effect when acknowledge() confirms the save."""
+        self._upsert("pending", scheme, etag, last_modified)
+
+    def acknowledge(self, links: Iterable[str]) -> int:
+        """Promote the staged fingerprints of saved links. Returns how many were promoted."""
+        links = [(link,) for link in links]
+        before = self.conn.total_changes
+        self.conn.executemany(
+            """INSERT INTO fingerprints (link, etag, last_modified, sections, updated_at)
+               SELECT link, etag, last_modified, sections, updated_at FROM pending WHERE link = ?
+               ON CONFLICT(link) DO UPDATE SET
+                   etag = excluded.etag,
+                   last_modified = excluded.last_modified,
+                   sections = excluded.sections,
+                   updated_at = excluded.updated_at""",
+            links,
+        )
+        promoted = self.conn.total_changes - before
+        self.conn.executemany("DELETE FROM pending WHERE link = ?", links)
+        self.commit()
+        return promoted
+
+    def forget(self, link: str):
+        """Drop a link's fingerprint so the next crawl treats it as new."""
+        self.conn.execute("DELETE FROM fingerprints WHERE link = ?", (link,))
+        self.conn.execute("DELETE FROM pending WHERE link = ?", (link,))
+        self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl fingerprint store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ack = commands.add_parser("ack", help="confirm that these links were saved")
+    ack.add_argument("store", help="SQLite fingerprint store")
+    ack.add_argument("links", nargs="*", help="saved scheme links (default: one per line on stdin)")
+    args = parser.parse_args()
+
+    store = FingerprintStore(args.store)
+    try:
+        promoted = store.acknowledge(args.links or (line.strip() for line in sys.stdin if line.strip()))
+    finally:
+        store.close()
+    print(json.dumps({"acknowledged": promoted}))
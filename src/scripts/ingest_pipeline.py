@@ -0,0 +1,556 @@
+# src/scripts/ingest_pipeline.py
+# End-to-end catalog ingest in one process:
+#
+#   listing (scraper.py) -> details (HTTP, browser fallback) -> parse (eligibility.py) -> save (API / Prisma)
+#
+# Stages run concurrently and hand schemes to each other through bounded asyncio
+# queues, so page fetches, parsing and DB writes overlap instead of running as
+# four serial passes. A full queue blocks its producer (backpressure): a slow DB
+# holds at most --queue-size schemes per stage in memory. Saved links are
+# appended to --checkpoint, so an interrupted run resumes where it stopped.
+#
+#   python3 ingest_pipeline.py --api http://localhost:3000/api/schemes/add --checkpoint src/scripts/.ingest_checkpoint
+#   python3 ingest_pipeline.py --links links.txt --db
+#   python3 ingest_pipeline.py --links - < links.txt          # records as JSON lines on stdout
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import CancelledError as FutureCancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from eligibility import parse_eligibility
+from metrics import METRICS
+from scraper import load_links, scrape_listing, DEFAULT_STOP_AFTER_KNOWN
+from scraper_details import make_driver, extract_scheme_details
+from scraper_http import fetch_scheme, needs_fallback, REQUEST_TIMEOUT
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_FETCH_CONCURRENCY = 16
+DEFAULT_BROWSERS = 2
+DEFAULT_PARSE_BATCH = 32
+DEFAULT_SAVE_BATCH = 20
+DEFAULT_SAVE_CONCURRENCY = 4
+
+# scraper_details field -> Scheme column
+DB_FIELDS = {"benefit": "benefits", "faq": "faqs", "sources_and_references": "sources_and_resources"}
+# detailsFetched once all of these are present (as in the scheme-details route)
+REQUIRED_FIELDS = ("details", "benefits", "eligibility", "application_process", "documents_required")
+
+# Rows without a listing name can only update a scheme that already exists
+NOT_IN_DB = "No listing name and the scheme is not in the database"
+
+_DONE = object()      # end of stream; each worker that sees it passes it on to its siblings
+
+
+def to_record(item: Dict, scheme: Dict) -> Dict:
+    """Scraped sections -> Scheme columns, plus the listing name when there is one."""
+    record = {"link": item["link"]}
+    if item.get("name"):
+        record["name"] = item["name"]
+    for field, value in scheme.items():
+        if field not in ("link", "changed", "error"):
+            record[DB_FIELDS.get(field, field)] = value
+    record["detailsFetched"] = all(record.get(field) for field in REQUIRED_FIELDS)
+    return record
+
+
+def _parse_batch(records: List[Dict]) -> List[Dict]:
+    """Worker: {"parsed"} or {"error"} for each record's eligibility text."""
+    results = []
+    for record in records:
+        try:
+            parsed = parse_eligibility(record.get("eligibility") or "",
+                                       record.get("state") or None, record.get("ministry") or None)
+            results.append({"parsed": parsed})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+# -----------------------------
+# Sinks
+# -----------------------------
+class StdoutSink:
+    """Write records as JSON lines (no DB); useful for dry runs and piping."""
+
+    async def connect(self):
+        pass
+
+    async def save(self, records: List[Dict]) -> Dict[str, Optional[str]]:
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+        return {record["link"]: None for record in records}
+
+    async def close(self):
+        pass
+
+
+class ApiSink:
+    """
+    POST batches to the schemes/add route, which upserts on link and notifies users of new schemes.
+    The route requires a name even to update a scheme, so rows without a listing name
+    (--links) take it from the scheme list at `names_url` (GET /api/schemes by default).
+    """
+
+    def __init__(self, api_url: str, batch_size: int, concurrency: int, names_url: Optional[str] = None):
+        from scraper_save_eligibility import SchemeUploader
+
+        self.uploader = SchemeUploader(api_url, batch_size=batch_size, concurrency=concurrency)
+        self.names_url = names_url or api_url.rstrip("/").removesuffix("/add")
+        self._names: Optional[Dict[str, str]] = None
+        self._names_lock = asyncio.Lock()
+
+    async def connect(self):
+        pass
+
+    def _fetch_names(self) -> Dict[str, str]:
+        response = self.uploader.session.get(self.names_url, timeout=self.uploader.timeout)
+        response.raise_for_status()
+        return {s["link"]: s["name"] for s in response.json() if s.get("link") and s.get("name")}
+
+    async def _name_records(self, records: List[Dict]):
+        """(records with a name, {link: error} for rows whose name cannot be found)."""
+        import requests
+
+        if all(record.get("name") for record in records):
+            return records, {}
+        async with self._names_lock:
+            if self._names is None:
+                try:
+                    self._names = await asyncio.to_thread(self._fetch_names)
+                except (requests.RequestException, ValueError) as e:     # retried for the next batch
+                    return ([r for r in records if r.get("name")],
+                            {r["link"]: f"Fetching scheme names failed: {e}" for r in records if not r.get("name")})
+        named, errors = [], {}
+        for record in records:
+            if record.get("name"):
+                named.append(record)
+            elif record["link"] in self._names:
+                named.append({**record, "name": self._names[record["link"]]})
+            else:
+                errors[record["link"]] = NOT_IN_DB
+        return named, errors
+
+    async def save(self, records: List[Dict]) -> Dict[str, Optional[str]]:
+        named, errors = await self._name_records(records)
+        if named:
+            failed = await asyncio.to_thread(self.uploader.send_batch, named)
+            errors.update((f["link"], f"{f['status']} {f['error']}") for f in failed)
+        return {record["link"]: errors.get(record["link"]) for record in records}
+
+    async def close(self):
+        self.uploader.close()
+
+
+class PrismaSink:
+    """
+    Upsert on link straight into Mongo, then fill Scheme.categories for the saved
+    schemes. Rows without a listing name can only update an existing scheme.
+    Unlike the API, this does not send new-scheme notifications.
+    """
+
+    def __init__(self):
+        from prisma import Prisma
+        from categorize import CategoryMatcher, load_categories
+
+        self.db = Prisma()
+        self.matcher = CategoryMatcher(load_categories())
+
+    async def connect(self):
+        await self.db.connect()
+
+    async def save(self, records: List[Dict]) -> Dict[str, Optional[str]]:
+        from prisma import Json
+
+        errors: Dict[str, Optional[str]] = {}
+        try:
+            # Batched writes report no counts, so check which name-less rows have a scheme to update
+            nameless = [r["link"] for r in records if not r.get("name")]
+            if nameless:
+                found = {s.link for s in await self.db.scheme.find_many(where={"link": {"in": nameless}})}
+                errors = {link: NOT_IN_DB for link in nameless if link not in found}
+            to_save = [r for r in records if r["link"] not in errors]
+            if not to_save:
+                return errors
+            async with self.db.batch_() as batcher:
+                for record in to_save:
+                    data = {k: v for k, v in record.items() if k not in ("link", "eligible")}
+                    data["eligible"] = [Json(e) for e in record.get("eligible") or []]
+                    if data.get("name"):
+                        batcher.scheme.upsert(where={"link": record["link"]},
+                                              data={"create": {**data, "link": record["link"]}, "update": data})
+                    else:
+                        batcher.scheme.update_many(where={"link": record["link"]}, data=data)
+        except Exception as e:
+            return {record["link"]: str(e) for record in records}
+        try:
+            from categorize import categorize_db
+
+            await categorize_db(self.db, self.matcher, where={"link": {"in": [r["link"] for r in to_save]}})
+        except Exception as e:      # saved; the nightly categorize.py run catches up
+            print(f"⚠️ Categorizing saved schemes failed: {e}", file=sys.stderr)
+        return {record["link"]: errors.get(record["link"]) for record in records}
+
+    async def close(self):
+        await self.db.disconnect()
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+class IngestPipeline:
+    def __init__(self, sink, fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+                 browsers: int = DEFAULT_BROWSERS, parse_workers: int = 0,
+                 parse_batch: int = DEFAULT_PARSE_BATCH, save_batch: int = DEFAULT_SAVE_BATCH,
+                 save_concurrency: int = DEFAULT_SAVE_CONCURRENCY, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 checkpoint: Optional[str] = None):
+        self.sink = sink
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.browsers = max(0, browsers)
+        self.parse_workers = max(0, parse_workers)
+        self.parse_batch = max(1, parse_batch)
+        self.save_batch = max(1, save_batch)
+        self.save_concurrency = max(1, save_concurrency)
+        self.queue_size = max(1, queue_size)
+        self.checkpoint_path = checkpoint
+        self.done_links = load_links(checkpoint)
+
+        self.stats = {"resumed": len(self.done_links), "listed": 0, "fetched": 0, "fallback": 0, "parsed": 0,
+                      "saved": 0, "failed": 0, "queuePeak": {}}
+        self._pool = None
+
+    async def _put(self, queue: asyncio.Queue, name: str, item):
+        await queue.put(item)
+        depth = queue.qsize()
+        if depth > self.stats["queuePeak"].get(name, 0):
+            self.stats["queuePeak"][name] = depth
+
+    def _fail(self, stage: str, link: str, error: str):
+        self.stats["failed"] += 1
+        METRICS.inc("pipeline_items_total", stage=stage, outcome="error")
+        # stderr: with the stdout sink, stdout carries only the JSONL records
+        print(json.dumps({"link": link, "stage": stage, "error": error}, ensure_ascii=False), file=sys.stderr, flush=True)
+
+    async def _workers(self, count: int, inbox: asyncio.Queue, handle):
+        """Run `count` workers calling `await handle(item)` until the end of the stream."""
+
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    inbox.put_nowait(_DONE)
+                    return
+                await handle(item)
+
+        await asyncio.gather(*(worker() for _ in range(count)))
+
+    async def from_listing(self, out: asyncio.Queue, known=frozenset(),
+                           stop_after_known: int = DEFAULT_STOP_AFTER_KNOWN):
+        """Run the Selenium listing scrape in a thread; each row blocks until the details queue has room."""
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+
+        def emit(row):
+            if stop.is_set():
+                raise FutureCancelledError()
+            self.stats["listed"] += 1
+            asyncio.run_coroutine_threadsafe(self._put(out, "details", row), loop).result()
+
+        def run():
+            driver = make_driver()
+            try:
+                scrape_listing(driver, emit, self.done_links, known, stop_after_known)
+            except FutureCancelledError:
+                pass
+            finally:
+                driver.quit()
+
+        try:
+            with METRICS.timer("pipeline_stage_seconds", stage="listing"):
+                await asyncio.to_thread(run)
+        finally:
+            stop.set()
+
+    async def from_links(self, out: asyncio.Queue, lines):
+        """Plain links or JSON lines with "link" (and optionally "name")."""
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line) if line.startswith("{") else {"link": line}
+            if not item.get("link"):
+                continue
+            if item["link"] in self.done_links:
+                continue
+            self.stats["listed"] += 1
+            await self._put(out, "details", item)
+
+    async def details_stage(self, inbox: asyncio.Queue, out: asyncio.Queue, fallback: Optional[asyncio.Queue]):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.fetch_concurrency)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+            async def handle(item):
+                scheme, _ = await fetch_scheme(session, item["link"])
+                if fallback is not None and needs_fallback(scheme):
+                    METRICS.inc("scrape_fallback_total")
+                    await self._put(fallback, "browser", item)
+                elif "error" in scheme:
+                    self._fail("details", item["link"], scheme["error"])
+                else:
+                    self.stats["fetched"] += 1
+                    await self._put(out, "parse", (item, scheme))
+
+            await self._workers(self.fetch_concurrency, inbox, handle)
+
+    async def browser_stage(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        """Warm browsers for pages the HTTP fetch could not render; one retry on a fresh browser after a crash."""
+        from selenium.common.exceptions import WebDriverException
+
+        async def worker():
+            driver = None
+            try:
+                while True:
+                    item = await inbox.get()
+                    if item is _DONE:
+                        inbox.put_nowait(_DONE)
+                        return
+                    for attempt in range(2):
+                        try:
+                            if driver is None:
+                                driver = await asyncio.to_thread(make_driver)
+                            scheme = await asyncio.to_thread(extract_scheme_details, driver, item["link"])
+                            self.stats["fallback"] += 1
+                            await self._put(out, "parse", (item, scheme))
+                            break
+                        except WebDriverException as e:
+                            METRICS.inc("scrape_driver_crashes_total")
+                            if driver is not None:
+                                await asyncio.to_thread(driver.quit)
+                            driver = None
+                            if attempt == 1:
+                                self._fail("details", item["link"], str(e))
+                        except Exception as e:
+                            self._fail("details", item["link"], str(e))
+                            break
+            finally:
+                if driver is not None:
+                    await asyncio.to_thread(driver.quit)
+
+        await asyncio.gather(*(worker() for _ in range(self.browsers)))
+
+    async def _parse(self, records: List[Dict]) -> List[Dict]:
+        if self._pool is None:
+            return _parse_batch(records)
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._pool
+            try:
+                return await loop.run_in_executor(pool, _parse_batch, records)
+            except BrokenProcessPool:
+                METRICS.inc("parse_worker_crashes_total")
+                if self._pool is pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return [{"error": "parse worker crashed"} for _ in records]
+
+    async def parse_stage(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        """Parse eligibility text in batches, in a process pool when parse_workers > 0."""
+        if self.parse_workers:
+            self._pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+
+        async def worker():
+            while True:
+                batch = [await inbox.get()]
+                while batch[-1] is not _DONE and len(batch) < self.parse_batch and not inbox.empty():
+                    batch.append(inbox.get_nowait())
+                finished = batch[-1] is _DONE
+                if finished:
+                    batch.pop()
+                    inbox.put_nowait(_DONE)
+                if batch:
+                    start = time.perf_counter()
+                    results = await self._parse([scheme for _, scheme in batch])
+                    METRICS.observe("pipeline_stage_seconds", time.perf_counter() - start, stage="parse")
+                    for (item, scheme), result in zip(batch, results):
+                        if "error" in result:
+                            self._fail("parse", item["link"], result["error"])
+                            continue
+                        self.stats["parsed"] += 1
+                        record = to_record(item, scheme)
+                        record["eligible"] = [result["parsed"]]
+                        await self._put(out, "save", record)
+                if finished:
+                    return
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, self.parse_workers))))
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    async def save_stage(self, inbox: asyncio.Queue, checkpoint):
+
+        async def worker():
+            while True:
+                batch = [await inbox.get()]
+                while batch[-1] is not _DONE and len(batch) < self.save_batch:
+                    batch.append(await inbox.get())
+                finished = batch[-1] is _DONE
+                if finished:
+                    batch.pop()
+                    inbox.put_nowait(_DONE)
+                if batch:
+                    with METRICS.timer("pipeline_stage_seconds", stage="save"):
+                        outcomes = await self.sink.save(batch)
+                    for link, error in outcomes.items():
+                        if error:
+                            self._fail("save", link, error)
+                            continue
+                        self.stats["saved"] += 1
+                        METRICS.inc("pipeline_items_total", stage="save", outcome="ok")
+                        if checkpoint:
+                            checkpoint.write(link + "\n")
+                    if checkpoint:
+                        checkpoint.flush()
+                if finished:
+                    return
+
+        await asyncio.gather(*(worker() for _ in range(self.save_concurrency)))
+
+    async def run(self, source) -> Dict:
+        """
+        Run every stage until `source(queue)` is exhausted and all queued schemes are saved.
+        Cancelling the task stops every stage; links saved so far are in the checkpoint.
+        """
+        details_q = asyncio.Queue(self.queue_size)
+        browser_q = asyncio.Queue(self.queue_size) if self.browsers else None
+        parse_q = asyncio.Queue(self.queue_size)
+        save_q = asyncio.Queue(self.queue_size)
+        checkpoint = open(self.checkpoint_path, "a") if self.checkpoint_path else None
+        start = time.perf_counter()
+
+        # Each link closes its downstream queue once every upstream producer has finished
+        async def feed():
+            try:
+                await source(details_q)
+            finally:
+                await details_q.put(_DONE)
+
+        async def fetch():
+            await self.details_stage(details_q, parse_q, browser_q)
+            if browser_q is not None:
+                await browser_q.put(_DONE)
+
+        async def details():
+            # The browser stage runs alongside the HTTP fetch so a full fallback queue drains
+            stages = [fetch()] + ([self.browser_stage(browser_q, parse_q)] if browser_q is not None else [])
+            await asyncio.gather(*stages)
+            await parse_q.put(_DONE)
+
+        async def parse():
+            await self.parse_stage(parse_q, save_q)
+            await save_q.put(_DONE)
+
+        tasks = [asyncio.create_task(coro) for coro in
+                 (feed(), details(), parse(), self.save_stage(save_q, checkpoint))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if checkpoint:
+                checkpoint.close()
+            self.stats["seconds"] = round(time.perf_counter() - start, 3)
+
+        # Finished without failures: the next run starts from scratch
+        if self.checkpoint_path and not self.stats["failed"] and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return self.stats
+
+
+async def main(pipeline: IngestPipeline, source) -> Dict:
+    loop = asyncio.get_running_loop()
+    # Listing thread, browsers and API uploads all block a thread each
+    loop.set_default_executor(ThreadPoolExecutor(
+        max_workers=pipeline.browsers + pipeline.save_concurrency + 4))
+    # SIGTERM (e.g. from the spawning route) cancels like Ctrl-C
+    try:
+        import signal
+
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+    await pipeline.sink.connect()
+    try:
+        await pipeline.run(source)
+    except asyncio.CancelledError:
+        pipeline.stats["interrupted"] = True
+    finally:
+        await pipeline.sink.close()
+    return pipeline.stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import metrics
+
+    metrics.start_from_env()
+
+    parser = argparse.ArgumentParser(description="Listing -> details -> parse -> save, as one streaming pipeline")
+    parser.add_argument("--links", help="ingest these links (file or - for stdin) instead of scraping the listing")
+    parser.add_argument("--known", help="file of already-ingested links; the listing scrape skips them")
+    parser.add_argument("--stop-after-known", type=int, default=DEFAULT_STOP_AFTER_KNOWN)
+    parser.add_argument("--checkpoint", help="append saved links here; an interrupted run resumes from it")
+    sink_group = parser.add_mutually_exclusive_group()
+    sink_group.add_argument("--api", help="schemes/add endpoint to POST batches to")
+    parser.add_argument("--names-url", help="scheme list giving names for --links rows with --api "
+                                            "(default: the --api URL without /add)")
+    sink_group.add_argument("--db", action="store_true", help="upsert into the Scheme collection via Prisma")
+    parser.add_argument("--fetch-concurrency", type=int, default=DEFAULT_FETCH_CONCURRENCY, help="HTTP requests in flight")
+    parser.add_argument("--browsers", type=int, default=DEFAULT_BROWSERS, help="warm browsers for fallback pages")
+    parser.add_argument("--no-fallback", action="store_true", help="never start a browser for details")
+    parser.add_argument("--parse-workers", type=int, default=0, help="parse processes (0 = parse in the event loop)")
+    parser.add_argument("--parse-batch", type=int, default=DEFAULT_PARSE_BATCH, help="schemes per parse task")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_SAVE_BATCH, help="schemes per save request")
+    parser.add_argument("--save-concurrency", type=int, default=DEFAULT_SAVE_CONCURRENCY, help="save requests in flight")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="schemes buffered between stages")
+    args = parser.parse_args()
+
+    if args.api:
+        sink = ApiSink(args.api, args.batch_size, args.save_concurrency, args.names_url)
+    elif args.db:
+        sink = PrismaSink()
+    else:
+        sink = StdoutSink()
+    pipeline = IngestPipeline(
+        sink, args.fetch_concurrency, 0 if args.no_fallback else args.browsers, args.parse_workers,
+        args.parse_batch, args.batch_size, args.save_concurrency, args.queue_size, args.checkpoint,
+    )
+
+    lines = None
+    if args.links:
+        lines = sys.stdin if args.links == "-" else open(args.links)
+        source = lambda queue: pipeline.from_links(queue, lines)
+    else:
+        source = lambda queue: pipeline.from_listing(queue, load_links(args.known), args.stop_after_known)
+
+    try:
+        asyncio.run(main(pipeline, source))
+    except KeyboardInterrupt:
+        pipeline.stats["interrupted"] = True
+    finally:
+        if lines is not None and lines is not sys.stdin:
+            lines.close()
+    summary = pipeline.stats
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    sys.exit(130 if summary.get("interrupted") else 1 if summary["failed"] else 0)
@@ -0,0 +1,174 @@
+# src/scripts/metrics.py
+# Process-wide counters and latency histograms for the scrape -> parse -> save
+# scripts, exported as JSON or Prometheus text. Instrumentation is always on
+# (a lock and a perf_counter per observation); output is opt-in per run:
+#
+#   METRICS_OUT=run.json       write a JSON summary at exit ("-" for stderr)
+#   METRICS_OUT=run.prom       ... or Prometheus text format (by extension)
+#   METRICS_INTERVAL=10        also stream {"metrics": ...} JSON lines to stderr every 10 s
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Seconds; covers a 100 us parse up to a 60 s page load
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _prom_labels(key: Tuple, extra: Tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)       # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation, capped at the largest one seen."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+
+    def inc(self, name: str, n: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the duration of the with-block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(key), "value": value}
+                for (name, key), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name, "labels": dict(key), "count": h.count,
+                    "sum": round(h.sum, 6), "mean": round(h.sum / h.count, 6) if h.count else None,
+                    "p50": round(h.quantile(0.5), 6), "p95": round(h.quantile(0.95), 6), "max": round(h.max, 6),
+                }
+                for (name, key), h in sorted(self.histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, key), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_prom_labels(key)} {value}")
+            for (name, key), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, n in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_prom_labels(key, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_prom_labels(key)} {h.sum}")
+                lines.append(f"{name}_count{_prom_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the summary to path ("-" is stderr); .prom / .txt paths get Prometheus text."""
+        prometheus = path.endswith((".prom", ".txt"))
+        text = self.to_prometheus() if prometheus else json.dumps({"metrics": self.snapshot()}) + "\n"
+        if path == "-":
+            sys.stderr.write(text)
+            sys.stderr.flush()
+            return
+        with open(path, "w") as f:
+            f.write(text)
+
+
+METRICS = Metrics()
+
+
+def _stream(metrics: Metrics, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        print(json.dumps({"metrics": metrics.snapshot()}), file=sys.stderr, flush=True)
+
+
+def start_from_env(metrics: Metrics = METRICS):
+    """
+    Honour METRICS_OUT / METRICS_INTERVAL for this process: start the streaming
+    thread and register the final write at exit. Call once from a script's main.
+    """
+    out = os.environ.get("METRICS_OUT")
+    interval = float(os.environ.get("METRICS_INTERVAL") or 0)
+    stop = threading.Event()
+    if interval > 0:
+        threading.Thread(target=_stream, args=(metrics, interval, stop), daemon=True).start()
+
+    def finish():
+        stop.set()
+        if out:
+            metrics.write(out)
+
+    atexit.register(finish)
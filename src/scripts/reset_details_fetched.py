@@ -1,6 +1,16 @@
-import os
+# src/scripts/reset_details_fetched.py
+# Bulk housekeeping for the Scheme collection. Every operation pushes its
+# predicate into the query and updates with update_many, so a large catalog is
+# handled in a few round trips instead of one read of every document plus one
+# update per row.
+#
+#   python3 reset_details_fetched.py [reset-details [--dry-run]]
+#   python3 reset_details_fetched.py clear-eligible [file|-] [--all-unfetched] [--chunk N] [--dry-run]
+#   python3 reset_details_fetched.py list-stale [--chunk N]
 import sys
 import json
+from typing import AsyncIterator, Dict, Iterable, Iterator, List
+
 from prisma import Prisma
 
 # Required fields to check
@@ -12,27 +22,142 @@ REQUIRED_FIELDS = [
     "documents_required",
 ]
 
-async def main():
-    db = Prisma()
-    await db.connect()
+DEFAULT_CHUNK = 500       # ids per update_many / rows per page
+
+
+def _empty(field: str) -> Dict:
+    """On MongoDB `{field: None}` only matches an explicit null; a never-written field is `isSet: False`."""
+    return {"OR": [{field: None}, {field: {"isSet": False}}, {field: ""}]}
+
+
+# Marked as fetched but every required section is still empty (null, unset or "")
+MISSING_DETAILS: Dict = {
+    "AND": [_empty(field) for field in REQUIRED_FIELDS] + [{"detailsFetched": True}],
+}
+
+
+def _chunks(values: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def read_changed_links(lines: Iterable[str]) -> List[str]:
+    """
+    Scheme links from plain lines or JSON lines. JSON lines carrying a "changed"
+    list (scraper_http.py --fingerprints output) only count when "eligibility"
+    changed, since that is what the parsed criteria were built from.
+    """
+    links = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            row = json.loads(line)
+            if "changed" in row and "eligibility" not in row["changed"]:
+                continue
+            line = row.get("link") or ""
+        if line and line not in seen:
+            seen.add(line)
+            links.append(line)
+    return links
+
+
+# -----------------------------
+# Operations
+# -----------------------------
+async def reset_details(db: Prisma, dry_run: bool = False) -> int:
+    """detailsFetched = false for schemes with no details, so the next crawl refetches them."""
+    if dry_run:
+        return await db.scheme.count(where=MISSING_DETAILS)
+    return await db.scheme.update_many(where=MISSING_DETAILS, data={"detailsFetched": False})
 
-    # Fetch all schemes
-    schemes = await db.scheme.find_many()
 
-    updated_count = 0
-    for scheme in schemes:
-        # Check if all required fields are not None
-        if all(getattr(scheme, field) is None for field in REQUIRED_FIELDS):
-            if not scheme.detailsfetched:  # Only update if not already true
-                await db.scheme.update(
-                    where={"id": scheme.id},
-                    data={"detailsfetched": False},
-                )
-                updated_count += 1
+async def clear_eligible(db: Prisma, links: List[str] = (), all_unfetched: bool = False,
+                         chunk_size: int = DEFAULT_CHUNK, dry_run: bool = False) -> int:
+    """
+    eligible = [] for the given links (one update_many per chunk), and with
+    all_unfetched for every scheme whose details are due for a refetch.
+    """
+    wheres = [{"link": {"in": chunk}} for chunk in _chunks(list(links), chunk_size)]
+    if all_unfetched:
+        wheres.append({"detailsFetched": False})
+
+    total = 0
+    for where in wheres:
+        if dry_run:
+            total += await db.scheme.count(where=where)
+        else:
+            total += await db.scheme.update_many(where=where, data={"eligible": {"set": []}})
+    return total
+
+
+async def iter_stale_links(db: Prisma, chunk_size: int = DEFAULT_CHUNK) -> AsyncIterator[str]:
+    """Links of schemes with detailsFetched = false, paged by id cursor."""
+    cursor = None
+    while True:
+        page = await db.scheme.find_many(
+            where={"detailsFetched": False},
+            order={"id": "asc"},
+            take=chunk_size,
+            **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        for scheme in page:
+            yield scheme.link
+        if len(page) < chunk_size:
+            return
+        cursor = page[-1].id
+
+
+async def main(args):
+    db = Prisma()
+    await db.connect()
+    try:
+        prefix = "Would update" if getattr(args, "dry_run", False) else "Updated"
+        if args.command == "clear-eligible":
+            links = []
+            if args.input:
+                source = sys.stdin if args.input == "-" else open(args.input)
+                with source:
+                    links = read_changed_links(source)
+            count = await clear_eligible(db, links, args.all_unfetched, args.chunk, args.dry_run)
+            print(f"✅ {prefix} {count} schemes with eligible = []", file=sys.stderr)
+        elif args.command == "list-stale":
+            async for link in iter_stale_links(db, args.chunk):
+                print(link, flush=True)
+        else:
+            count = await reset_details(db, args.dry_run)
+            print(f"✅ {prefix} {count} schemes with detailsFetched = false")
+    finally:
+        await db.disconnect()
 
-    await db.disconnect()
-    print(f"✅ Updated {updated_count} schemes with detailsfetched = false")
 
 if __name__ == "__main__":
+    import argparse
     import asyncio
-    asyncio.run(main())
+
+    parser = argparse.ArgumentParser(description="Bulk maintenance for scheme documents")
+    sub = parser.add_subparsers(dest="command")
+
+    reset = sub.add_parser("reset-details", help="detailsFetched = false where every required field is empty")
+    reset.add_argument("--dry-run", action="store_true", help="only count matching schemes")
+
+    clear = sub.add_parser("clear-eligible", help="eligible = [] for changed schemes")
+    clear.add_argument("input", nargs="?",
+                       help="links or scraper_http JSON lines ('-' for stdin)")
+    clear.add_argument("--all-unfetched", action="store_true",
+                       help="also clear every scheme with detailsFetched = false")
+    clear.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="links per update_many")
+    clear.add_argument("--dry-run", action="store_true", help="only count matching schemes")
+
+    stale = sub.add_parser("list-stale", help="print links with detailsFetched = false, one per line")
+    stale.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="rows per page")
+
+    args = parser.parse_args()
+    if args.command is None:
+        args.dry_run = False
+    if args.command == "clear-eligible" and not args.input and not args.all_unfetched:
+        parser.error("clear-eligible needs an input of links or --all-unfetched")
+
+    asyncio.run(main(args))
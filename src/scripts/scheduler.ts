@@ -2,6 +2,10 @@
 // Script to schedule the scraper to run daily at 2 AM
 import cron from "node-cron";
 import fetch from "node-fetch";
+import { execFile } from "child_process";
+import { promisify } from "util";
+
+const run = promisify(execFile);
 
 // Schedule to run every day at 2 AM
 cron.schedule("0 2 * * *", async () => {
@@ -13,6 +17,31 @@ cron.schedule("0 2 * * *", async () => {
   } catch (err) {
     console.error("Error running scraper:", err);
   }
+
+  // Re-check every scheme page; only pages whose content changed are re-saved
+  try {
+    const res = await fetch("http://localhost:3000/api/scheme-details?recrawl=1");
+    const data = await res.json() as { updatedThisRun: number };
+    console.log("Details re-crawl finished. Schemes updated:", data.updatedThisRun);
+  } catch (err) {
+    console.error("Error re-crawling scheme details:", err);
+  }
+
+  // Recompute Scheme.categories (written only where they changed)
+  try {
+    const { stdout } = await run("python3", ["src/scripts/categorize.py", "--db"]);
+    console.log("Categories updated:", stdout.trim());
+  } catch (err) {
+    console.error("Error updating categories:", err);
+  }
+
+  // Re-index only the schemes the crawl changed
+  try {
+    const { stdout } = await run("python3", ["src/scripts/search_index.py", "update", "--db"]);
+    console.log("Search index updated:", stdout.trim());
+  } catch (err) {
+    console.error("Error updating search index:", err);
+  }
 });
 
 console.log("Scheduler is running...");
@@ -0,0 +1,353 @@
+# src/scripts/scheme_snapshot.py
+# Compact binary snapshot of parsed scheme criteria for user_eligibility.py.
+# The loader memory-maps the file instead of json.load-ing the catalog: arrays
+# are read in place through memoryviews, so opening is near-instant, a check
+# only touches the pages of the criteria it scores, and worker processes that
+# map the same file share one copy in the page cache.
+#
+# Layout: b"SCHSNAP\0", u32 header length, JSON header, then 8-byte aligned
+# little-endian sections listed in the header as name -> [format, offset, count]:
+#   strings_offsets/strings   interned state, education, occupation and gender values (utf-8)
+#   ids_offsets/ids           scheme ids, one per scheme in catalog order
+#   records_offsets/records   each scheme as compact JSON, decoded only when returned
+#   crit_scheme               scheme position of each criterion (criteria grouped by scheme)
+#   min_age/max_age/income    float64 columns, NaN when the criterion has no bound
+#   flags                     bit 0: any state, bit 1: gender restricted
+#   state_offsets/states      string ids per criterion (CSR), likewise gender_offsets/genders
+#   education_offsets/...     inverted postings: criterion ids per education / occupation string id
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from eligibility_index import normalize_values, normalize_states, user_state_key
+
+MAGIC = b"SCHSNAP\0"
+SNAPSHOT_VERSION = 2
+TOP_K = 5
+
+ANY_STATE = 1
+HAS_GENDER = 2
+
+NAN = float("nan")
+
+
+def _bound(value) -> float:
+    return NAN if value is None else float(value)
+
+
+def _data_start(header_len: int) -> int:
+    """Sections start at the first 8-byte boundary after the header; header offsets are relative to it."""
+    end = len(MAGIC) + 4 + header_len
+    return end + (-end % 8)
+
+
+def has_magic(path: str, magic: bytes) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(magic)) == magic
+    except OSError:
+        return False
+
+
+def is_snapshot(path: str) -> bool:
+    return has_magic(path, MAGIC)
+
+
+# -----------------------------
+# Section files (shared with search_index.py)
+# -----------------------------
+def write_sections(path: str, magic: bytes, header: Dict, sections: Dict) -> Dict:
+    """
+    Write magic, the JSON header and each array / bytes section 8-byte aligned,
+    recording name -> [format, offset, count] under header["sections"]. Returns the header.
+    """
+    if sys.byteorder != "little":
+        raise ValueError("Section files are little-endian; this platform is not")
+    header = dict(header, sections={})
+    raws, cursor = [], 0
+    for name, data in sections.items():
+        cursor += -cursor % 8
+        header["sections"][name] = [data.typecode if isinstance(data, array) else "B", cursor, len(data)]
+        raws.append((cursor, data.tobytes() if isinstance(data, array) else bytes(data)))
+        cursor += len(raws[-1][1])
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    # Write-then-rename: processes that mapped the old file keep reading it intact
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        data_start = _data_start(len(header_bytes))
+        for offset, raw in raws:
+            f.seek(data_start + offset)
+            f.write(raw)
+    os.replace(tmp, path)
+    return header
+
+
+class MappedSections:
+    """
+    Read-only map of a write_sections() file: `header`, and each section as an
+    attribute `_<name>` (a memoryview cast to its array format).
+    """
+    label = "section file"
+
+    def __init__(self, path: str, magic: bytes, version: int):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(magic)] != magic:
+            self._mm.close()
+            raise ValueError(f"Not a {self.label}: {path}")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(magic))
+        self.header = json.loads(self._mm[len(magic) + 4:len(magic) + 4 + header_len])
+        if self.header.get("version") != version:
+            self._mm.close()
+            raise ValueError(f"Unsupported {self.label} version: {self.header.get('version')}")
+        if sys.byteorder != "little":
+            self._mm.close()
+            raise ValueError("Section files are little-endian; this platform is not")
+
+        self._view = memoryview(self._mm)
+        data_start = _data_start(header_len)
+        for name, (fmt, offset, count) in self.header["sections"].items():
+            offset += data_start
+            section = self._view[offset:offset + count * struct.calcsize(fmt)]
+            setattr(self, "_" + name, section.cast(fmt) if fmt != "B" else section)
+
+    def close(self):
+        # Views into the map must be released before it can close
+        for name in self.header["sections"]:
+            getattr(self, "_" + name).release()
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -----------------------------
+# Export
+# -----------------------------
+class _Interner:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+
+def blob(values: Iterable[bytes], offset_format: str):
+    offsets, data = array(offset_format, [0]), bytearray()
+    for value in values:
+        data += value
+        offsets.append(len(data))
+    return offsets, data
+
+
+def _postings(lists: List[List[int]], size: int):
+    """Invert per-criterion value ids into criterion ids per value (CSR)."""
+    buckets = [[] for _ in range(size)]
+    for cid, values in enumerate(lists):
+        for value in set(values):
+            buckets[value].append(cid)
+    offsets, ids = array("I", [0]), array("I")
+    for bucket in buckets:
+        ids.extend(bucket)
+        offsets.append(len(ids))
+    return offsets, ids
+
+
+def _forward(lists: List[List[int]]):
+    offsets, values = array("I", [0]), array("I")
+    for row in lists:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def export_snapshot(schemes: Iterable[Dict], path: str) -> Dict:
+    """Write the snapshot for a catalog (same order and criteria check_eligibility sees). Returns the header."""
+    if sys.byteorder != "little":
+        raise ValueError("Scheme snapshots are little-endian; this platform is not")
+    intern = _Interner()
+    ids, records = [], []
+    crit_scheme, min_age, max_age, income, flags = array("I"), array("d"), array("d"), array("d"), array("B")
+    states, educations, occupations, genders = [], [], [], []
+
+    for position, scheme in enumerate(schemes):
+        ids.append(str(scheme.get("id") or "").encode("utf-8"))
+        records.append(json.dumps(scheme, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        for elig in scheme.get("eligible") or []:
+            if not isinstance(elig, dict):
+                continue
+            crit_states = normalize_states(elig.get("state"))
+            crit_flags = ANY_STATE if crit_states is None else 0
+            if elig.get("gender"):
+                crit_flags |= HAS_GENDER
+            crit_scheme.append(position)
+            min_age.append(_bound(elig.get("minAge")))
+            max_age.append(_bound(elig.get("maxAge")))
+            income.append(_bound(elig.get("income")))
+            flags.append(crit_flags)
+            states.append([intern(s) for s in crit_states or []])
+            educations.append([intern(e) for e in normalize_values(elig.get("education"))])
+            occupations.append([intern(o) for o in normalize_values(elig.get("occupation"))])
+            genders.append([intern(g) for g in normalize_values(elig.get("gender"))] if crit_flags & HAS_GENDER else [])
+
+    strings_offsets, strings = blob((s.encode("utf-8") for s in intern.ids), "I")
+    ids_offsets, ids_blob = blob(ids, "I")
+    records_offsets, records_blob = blob(records, "Q")
+    state_offsets, state_values = _forward(states)
+    gender_offsets, gender_values = _forward(genders)
+    education_offsets, education_postings = _postings(educations, len(intern.ids))
+    occupation_offsets, occupation_postings = _postings(occupations, len(intern.ids))
+
+    sections = {
+        "strings_offsets": strings_offsets, "strings": strings,
+        "ids_offsets": ids_offsets, "ids": ids_blob,
+        "records_offsets": records_offsets, "records": records_blob,
+        "crit_scheme": crit_scheme, "min_age": min_age, "max_age": max_age, "income": income, "flags": flags,
+        "state_offsets": state_offsets, "states": state_values,
+        "gender_offsets": gender_offsets, "genders": gender_values,
+        "education_offsets": education_offsets, "education": education_postings,
+        "occupation_offsets": occupation_offsets, "occupation": occupation_postings,
+    }
+    header = {"version": SNAPSHOT_VERSION, "schemes": len(ids), "criteria": len(crit_scheme),
+              "strings": len(intern.ids)}
+    return write_sections(path, MAGIC, header, sections)
+
+
+# -----------------------------
+# Memory-mapped loader
+# -----------------------------
+class SchemeSnapshot(MappedSections):
+    """
+    Read-only view of an exported snapshot. check_eligibility / match return the
+    same schemes, in the same order, as user_eligibility.check_eligibility on the
+    JSON catalog the snapshot was exported from.
+    """
+    label = "scheme snapshot"
+
+    def __init__(self, path: str):
+        super().__init__(path, MAGIC, SNAPSHOT_VERSION)
+
+        # The string table is small (distinct criterion values); decode it once
+        strings, offsets = self._strings, self._strings_offsets
+        self.string_ids = {
+            bytes(strings[offsets[i]:offsets[i + 1]]).decode("utf-8"): i for i in range(self.header["strings"])
+        }
+
+    @classmethod
+    def open(cls, path: str) -> "SchemeSnapshot":
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.header["schemes"]
+
+    def scheme_id(self, position: int) -> str:
+        start, end = self._ids_offsets[position], self._ids_offsets[position + 1]
+        return bytes(self._ids[start:end]).decode("utf-8")
+
+    def scheme(self, position: int) -> Dict:
+        start, end = self._records_offsets[position], self._records_offsets[position + 1]
+        return json.loads(bytes(self._records[start:end]))
+
+    def criterion(self, cid: int) -> Dict:
+        """Decoded columns of one criterion (for inspection; None for missing bounds)."""
+        names = {i: s for s, i in self.string_ids.items()}
+
+        def bound(column):
+            value = column[cid]
+            return None if value != value else value
+
+        flags = self._flags[cid]
+        return {
+            "scheme": self._crit_scheme[cid],
+            "state": None if flags & ANY_STATE else
+            [names[i] for i in self._states[self._state_offsets[cid]:self._state_offsets[cid + 1]]],
+            "gender": [names[i] for i in self._genders[self._gender_offsets[cid]:self._gender_offsets[cid + 1]]]
+            if flags & HAS_GENDER else None,
+            "minAge": bound(self._min_age), "maxAge": bound(self._max_age), "income": bound(self._income),
+        }
+
+    def _posting(self, kind: str, value: str):
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            return ()
+        offsets, ids = getattr(self, f"_{kind}_offsets"), getattr(self, f"_{kind}")
+        return ids[offsets[string_id]:offsets[string_id + 1]]
+
+    def scores(self, user: Dict) -> List[tuple]:
+        """(position, best score) for every eligible scheme, best first, catalog order on ties."""
+        user_state = user_state_key(user)
+        if not user_state:
+            return []
+        user_edu = (user.get("education") or "").strip().lower()
+        user_occ = (user.get("occupation") or "").strip().lower()
+        user_age = user.get("age")
+        user_gender = (user.get("gender") or "").strip().lower()
+
+        candidates = set(self._posting("education", user_edu))
+        candidates.update(self._posting("occupation", user_occ))
+        if not candidates:
+            return []
+        state_id = self.string_ids.get(user_state)
+        gender_id = self.string_ids.get(user_gender)
+        flags, min_age, max_age = self._flags, self._min_age, self._max_age
+        state_offsets, states = self._state_offsets, self._states
+        gender_offsets, genders = self._gender_offsets, self._genders
+
+        best: Dict[int, int] = {}
+        for cid in candidates:
+            crit_flags = flags[cid]
+            if not crit_flags & ANY_STATE and state_id not in states[state_offsets[cid]:state_offsets[cid + 1]]:
+                continue
+            # NaN bounds compare False, i.e. "no bound"
+            if user_age is not None and (user_age < min_age[cid] or user_age > max_age[cid]):
+                continue
+            if crit_flags & HAS_GENDER and gender_id not in genders[gender_offsets[cid]:gender_offsets[cid + 1]]:
+                continue
+            score = 2 + (user_age is not None) + bool(crit_flags & HAS_GENDER)
+            position = self._crit_scheme[cid]
+            if score > best.get(position, 0):
+                best[position] = score
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))
+
+    def match(self, user: Dict, k: Optional[int] = TOP_K) -> List[Dict]:
+        return [self.scheme(position) for position, _ in self.scores(user)[:k]]
+
+    check_eligibility = match
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "info", "match"):
+        print("Usage: python scheme_snapshot.py export schemes.json schemes.snap")
+        print("       python scheme_snapshot.py info schemes.snap")
+        print("       python scheme_snapshot.py match schemes.snap user.json")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "export":
+        with open(sys.argv[2]) as f:
+            header = export_snapshot(json.load(f), sys.argv[3])
+        print(f"✅ Wrote {header['schemes']} schemes, {header['criteria']} criteria, "
+              f"{header['strings']} strings to {sys.argv[3]} ({os.path.getsize(sys.argv[3])} bytes)")
+    elif command == "info":
+        with SchemeSnapshot.open(sys.argv[2]) as snapshot:
+            header = dict(snapshot.header)
+            header["sections"] = {name: count for name, (_, _, count) in header["sections"].items()}
+            print(json.dumps(header, indent=2))
+    else:
+        with open(sys.argv[3]) as f:
+            user_data = json.load(f)
+        with SchemeSnapshot.open(sys.argv[2]) as snapshot:
+            print(json.dumps(snapshot.match(user_data), indent=2))
@@ -1,75 +1,146 @@
 # script to scrape scheme names and links from https://rules.myscheme.in/
-# and output as JSON array of objects with "name" and "link" fields
+# and output one JSON object per line with "name" and "link" fields
+import os
+import sys
 import json
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+
+from metrics import METRICS
+from scraper_details import make_driver
 
 # --------------------------
 # Configuration
 # --------------------------
 BASE_URL = "https://rules.myscheme.in/"
+TABLE_TIMEOUT = 30          # max wait for the first rows to render
+GROWTH_TIMEOUT = 5          # max wait for more rows after a scroll
+DEFAULT_STOP_AFTER_KNOWN = 20
 
-options = Options()
-options.add_argument("--headless")        # Run headless
-options.add_argument("--no-sandbox")
-options.add_argument("--disable-gpu")
-options.add_argument("--window-size=1920,1080")
+# Rows from index arguments[0] onward, parsed in the browser in one round trip.
+# Unparseable rows come back as null so indexes stay aligned with the table.
+ROWS_JS = """
+const rows = Array.from(document.querySelectorAll("table tbody tr")).slice(arguments[0]);
+return rows.map((tr) => {
+  const tds = tr.querySelectorAll("td");
+  if (tds.length < 3) return null;
+  const nameDiv = tds[1].querySelector("div.col-12.col-lg-9");
+  const link = tds[2].querySelector("a");
+  if (!nameDiv || !link || !link.href) return null;
+  return { name: nameDiv.innerText.trim(), link: link.href.trim() };
+});
+"""
+ROW_COUNT_JS = 'return document.querySelectorAll("table tbody tr").length;'
 
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
 
-# --------------------------
-# Load page
-# --------------------------
-driver.get(BASE_URL)
-time.sleep(5)  # wait for table to load
+def load_links(path):
+    """Links from a file with one link per line, or JSON lines/array of {link}."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        content = f.read().strip()
+    if content.startswith("["):
+        return {s["link"] if isinstance(s, dict) else s for s in json.loads(content)}
+    links = set()
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            line = json.loads(line).get("link", "")
+        if line:
+            links.add(line)
+    return links
 
-# --------------------------
-# Scroll to bottom (if table loads dynamically)
-# --------------------------
-last_height = driver.execute_script("return document.body.scrollHeight")
-while True:
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    new_height = driver.execute_script("return document.body.scrollHeight")
-    if new_height == last_height:
-        break
-    last_height = new_height
 
-# --------------------------
-# Scrape schemes from table
-# --------------------------
-schemes = []
-rows = driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
+def _wait_for_rows(driver, more_than, timeout, stage="growth"):
+    """Block until the table has more than `more_than` rows; False on timeout."""
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
 
-for row in rows:
-    try:
-        tds = row.find_elements(By.TAG_NAME, "td")
-        if len(tds) < 3:
-            continue
+    with METRICS.timer("listing_stage_seconds", stage=stage):
+        try:
+            WebDriverWait(driver, timeout).until(lambda d: d.execute_script(ROW_COUNT_JS) > more_than)
+            return True
+        except TimeoutException:
+            METRICS.inc("listing_wait_timeouts_total", stage=stage)
+            return False
 
-        # Scheme name is in second <td> inside nested <div>
-        name_div = tds[1].find_element(By.CSS_SELECTOR, "div.col-12.col-lg-9")
-        scheme_name = name_div.text.strip()
 
-        # Scheme link is in third <td> inside <a>
-        link_el = tds[2].find_element(By.TAG_NAME, "a")
-        scheme_link = link_el.get_attribute("href").strip()
+def scrape_listing(driver, emit, skip=frozenset(), known=frozenset(),
+                   stop_after_known=DEFAULT_STOP_AFTER_KNOWN):
+    """
+    Scroll the listing table, calling emit({"name", "link"}) for each new row as soon as it renders.
+    Rows whose link is in `skip` (already saved by an interrupted run) or `known`
+    (already ingested) are not emitted. After `stop_after_known` consecutive known
+    rows the scrape stops early. Returns the number of rows emitted.
+    Raises RuntimeError when the table never renders or no row can be parsed,
+    so a broken page is not mistaken for a finished run.
+    """
+    with METRICS.timer("listing_stage_seconds", stage="load"):
+        driver.get(BASE_URL)
+    if not _wait_for_rows(driver, 0, TABLE_TIMEOUT, stage="table"):
+        raise RuntimeError(f"Listing table at {BASE_URL} did not render within {TABLE_TIMEOUT}s")
 
-        schemes.append({
-            "name": scheme_name,
-            "link": scheme_link
-        })
-    except:
-        # skip row if any error
-        continue
+    seen, parsed, emitted, known_streak = 0, 0, 0, 0
+    while True:
+        with METRICS.timer("listing_stage_seconds", stage="extract"):
+            rows = driver.execute_script(ROWS_JS, seen)
+        for row in rows:
+            seen += 1
+            if not row:
+                METRICS.inc("listing_rows_total", outcome="unparseable")
+                continue
+            parsed += 1
+            if row["link"] in known:
+                METRICS.inc("listing_rows_total", outcome="known")
+                known_streak += 1
+                if known and known_streak >= stop_after_known:
+                    return emitted
+                continue
+            known_streak = 0
+            if row["link"] in skip:
+                METRICS.inc("listing_rows_total", outcome="resumed")
+                continue
+            emit(row)
+            METRICS.inc("listing_rows_total", outcome="emitted")
+            emitted += 1
 
-driver.quit()
+        # Scroll and wait for the table to grow instead of sleeping a fixed time
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if not _wait_for_rows(driver, seen, GROWTH_TIMEOUT):
+            if not parsed:
+                raise RuntimeError(f"None of the {seen} listing rows could be parsed")
+            return emitted
 
-# --------------------------
-# Output JSON only
-# --------------------------
-print(json.dumps(schemes, ensure_ascii=False))
+
+if __name__ == "__main__":
+    import argparse
+    import metrics
+
+    metrics.start_from_env()
+
+    parser = argparse.ArgumentParser(description="Stream scheme names and links as JSON lines")
+    parser.add_argument("--checkpoint", help="links already saved by the consumer, which appends each link "
+                                             "after saving its row and removes the file after a complete "
+                                             "run; they are skipped on resume")
+    parser.add_argument("--known", help="file of already-ingested links; they are skipped")
+    parser.add_argument("--stop-after-known", type=int, default=DEFAULT_STOP_AFTER_KNOWN,
+                        help="stop after this many consecutive known rows")
+    args = parser.parse_args()
+
+    skip = load_links(args.checkpoint)
+    known = load_links(args.known)
+
+    # --------------------------
+    # Output JSON lines only
+    # --------------------------
+    def emit(row):
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+
+    # The checkpoint only lists rows the consumer has saved, so it is left for the
+    # consumer to clear; a failed load exits non-zero and keeps it
+    driver = make_driver()
+    try:
+        scrape_listing(driver, emit, skip, known, args.stop_after_known)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        driver.quit()
@@ -1,77 +1,337 @@
 # src/scripts/scraper_details.py
 # Scrape all details from a scheme page on https://rules.myscheme.in/
 
+import os
 import sys
 import json
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import queue
+import threading
+import time
 
+from driver_cache import resolve_driver_path, is_offline
+from metrics import METRICS
 
-def safe_text(driver, selector, timeout=5):
-    """Return text from a single element or empty string if not found."""
-    try:
-        element = WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-        )
-        return element.text.strip()
-    except:
-        return ""
+# selenium is imported where a browser is actually used, so importing this
+# module (and --help / argument errors) does not pay for it
+
+DEFAULT_PAGES_PER_DRIVER = 50   # recycle a browser after this many pages
+
+
+PAGE_READY_TIMEOUT = 10         # one wait per page, not one per selector
+
+# field -> (CSS selector, returns a list?)
+SECTION_SELECTORS = {
+    "state": ("h3.text-raven.text-base", False),
+    "ministry": ("h3.text-raven", False),
+    "tags": ("div[role='button'][title]", True),
+    "details": ("#details .markdown-options", False),
+    "benefit": ("#benefits .markdown-options", False),
+    "eligibility": ("#eligibility .markdown-options", False),
+    "application_process": ("#application-process .markdown-options", False),
+    "documents_required": ("#documents-required .markdown-options", False),
+    "faq": ("#faqs .markdown-options", True),
+    "sources_and_references": ("#sources .markdown-options", True),
+}
+
+# Content sections the scrapers need (as scraper_http.REQUIRED_SECTIONS). The
+# header (state / ministry) renders before them, so it cannot signal readiness.
+READY_SECTIONS = ("details", "eligibility")
 
+# The page is ready once the document has loaded and any ready section has text:
+# the content renders together, and a page lacking a section must not wait out the timeout.
+PAGE_READY_JS = """
+return document.readyState === "complete" && arguments[0].some((selector) => {
+  const el = document.querySelector(selector);
+  return !!el && (el.innerText || "").trim().length > 0;
+});
+"""
 
-def safe_text_list(driver, selector, timeout=5):
-    """Return list of text values from multiple elements or empty list."""
+# Extract every section in one round trip; missing sections come back empty immediately.
+EXTRACT_SECTIONS_JS = """
+const sections = arguments[0];
+const text = (el) => (el.innerText || "").trim();
+const out = {};
+for (const [field, [selector, many]] of Object.entries(sections)) {
+  if (many) {
+    out[field] = Array.from(document.querySelectorAll(selector)).map(text).filter(Boolean);
+  } else {
+    const el = document.querySelector(selector);
+    out[field] = el ? text(el) : "";
+  }
+}
+return out;
+"""
+
+
+def wait_for_page_ready(driver, selectors, timeout=PAGE_READY_TIMEOUT, ready=READY_SECTIONS):
+    """
+    Wait once for one of the `ready` content sections to render (any section when
+    selectors has none of them); returns False on timeout (extraction still runs).
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    ready_selectors = [selectors[field][0] for field in ready if field in selectors]
+    if not ready_selectors:
+        ready_selectors = [", ".join(selector for selector, _ in selectors.values())]
     try:
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-        )
-        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-        return [el.text.strip() for el in elements if el.text.strip()]
-    except:
-        return []
+        WebDriverWait(driver, timeout).until(lambda d: d.execute_script(PAGE_READY_JS, ready_selectors))
+        return True
+    except TimeoutException:
+        return False
 
 
-def scrape_scheme_details(url):
-    """Scrape scheme details from rules.myscheme.in page."""
+def extract_sections(driver, selectors):
+    """Return {field: text or [texts]} for every selector in a single execute_script call."""
+    return driver.execute_script(EXTRACT_SECTIONS_JS, {f: list(v) for f, v in selectors.items()})
+
+
+def load_sections(driver, url, selectors, timings=None):
+    """
+    Load url, wait once for the page, then extract every section.
+    Appends {"link", "load", "ready", "extract", "total", "timedOut"} (seconds) to timings if given.
+    """
+    start = time.perf_counter()
+    driver.get(url)
+    loaded = time.perf_counter()
+    ready = wait_for_page_ready(driver, selectors)
+    waited = time.perf_counter()
+    sections = extract_sections(driver, selectors)
+    done = time.perf_counter()
+
+    METRICS.inc("scrape_pages_total", source="browser")
+    for stage, seconds in (("load", loaded - start), ("ready", waited - loaded),
+                           ("extract", done - waited), ("total", done - start)):
+        METRICS.observe("scrape_stage_seconds", seconds, source="browser", stage=stage)
+    if not ready:
+        METRICS.inc("scrape_ready_timeouts_total")
+    for field, value in sections.items():
+        if not value:
+            METRICS.inc("scrape_empty_sections_total", source="browser", field=field)
+
+    if timings is not None:
+        timings.append({
+            "link": url,
+            "load": round(loaded - start, 3),
+            "ready": round(waited - loaded, 3),
+            "extract": round(done - waited, 3),
+            "total": round(done - start, 3),
+            "timedOut": not ready,
+        })
+    return sections
+
+
+def timing_summary(timings):
+    """Aggregate per-page timings (seconds) for the before/after comparison."""
+    totals = sorted(t["total"] for t in timings)
+    if not totals:
+        return {"pages": 0}
+    return {
+        "pages": len(totals),
+        "timedOut": sum(t["timedOut"] for t in timings),
+        "mean": round(sum(totals) / len(totals), 3),
+        "p50": totals[len(totals) // 2],
+        "p95": totals[min(len(totals) - 1, int(len(totals) * 0.95))],
+        "max": totals[-1],
+    }
+
+
+def make_driver(driver_path=None):
+    """
+    Start a headless Chrome. Without a path the driver comes from driver_cache; if
+    the cached driver no longer matches the installed Chrome it is re-resolved once.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import SessionNotCreatedException
+
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1920,1080")
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(url)
+    with METRICS.timer("scrape_driver_start_seconds"):
+        if driver_path:
+            return webdriver.Chrome(service=Service(driver_path), options=options)
+        try:
+            return webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+        except SessionNotCreatedException:
+            if os.environ.get("CHROMEDRIVER_PATH") or is_offline():
+                raise
+            METRICS.inc("scrape_driver_stale_total")
+            return webdriver.Chrome(service=Service(resolve_driver_path(refresh=True)), options=options)
 
-    scheme = {
-        "link": url,
-        "state": safe_text(driver, "h3.text-raven.text-base"),
-        "ministry": safe_text(driver, "h3.text-raven"),
-        "tags": safe_text_list(driver, "div[role='button'][title]"),
-        "details": safe_text(driver, "#details .markdown-options"),
-        "benefit": safe_text(driver, "#benefits .markdown-options"),
-        "eligibility": safe_text(driver, "#eligibility .markdown-options"),
-        "application_process": safe_text(driver, "#application-process .markdown-options"),
-        "documents_required": safe_text(driver, "#documents-required .markdown-options"),
-        "faq": safe_text_list(driver, "#faqs .markdown-options"),
-        "sources_and_references": safe_text_list(driver, "#sources .markdown-options"),
-    }
 
-    driver.quit()
+def extract_scheme_details(driver, url, timings=None):
+    """Load url in the driver's current tab and extract every section."""
+    scheme = {"link": url}
+    scheme.update(load_sections(driver, url, SECTION_SELECTORS, timings))
     return scheme
 
 
+def scrape_scheme_details(url, timings=None):
+    """Scrape scheme details from rules.myscheme.in page."""
+    driver = make_driver()
+    try:
+        return extract_scheme_details(driver, url, timings)
+    finally:
+        driver.quit()
+
+
+# -----------------------------
+# Multi-URL mode: pool of warm browsers
+# -----------------------------
+def _pool_worker(urls, results, pages_per_driver, timings):
+    """One thread, one browser: reuse its tab for each URL, recycle after N pages or a crash."""
+    from selenium.common.exceptions import WebDriverException
+
+    driver, pages = None, 0
+    try:
+        while True:
+            url = urls.get()
+            if url is None:
+                return
+            for attempt in range(2):
+                try:
+                    if driver is None:
+                        driver, pages = make_driver(), 0
+                    results.put(extract_scheme_details(driver, url, timings))
+                    pages += 1
+                    break
+                except WebDriverException as e:
+                    # Browser crashed or hung: throw it away and retry once on a fresh one
+                    METRICS.inc("scrape_driver_crashes_total")
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+                    if attempt == 1:
+                        METRICS.inc("scrape_errors_total", source="browser")
+                        results.put({"link": url, "error": str(e)})
+                except Exception as e:
+                    METRICS.inc("scrape_errors_total", source="browser")
+                    results.put({"link": url, "error": str(e)})
+                    break
+            if driver is not None and pages >= pages_per_driver:
+                METRICS.inc("scrape_driver_recycles_total")
+                driver.quit()
+                driver = None
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+def scrape_many(urls, workers=None, pages_per_driver=DEFAULT_PAGES_PER_DRIVER, timings=None):
+    """
+    Scrape many scheme pages with `workers` warm browsers (one per core by default).
+    Yields one result dict per URL, in completion order. If reading `urls` fails,
+    the URLs already queued are still scraped, then the error is raised.
+    """
+    workers = workers or os.cpu_count() or 1
+    resolve_driver_path()   # resolve once up front (memoised), not per browser
+    pending = queue.Queue(maxsize=workers * 2)
+    results = queue.Queue()
+
+    threads = [
+        threading.Thread(target=_pool_worker, args=(pending, results, pages_per_driver, timings),
+                         daemon=True)
+        for _ in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    feed_errors = []
+
+    def feed():
+        try:
+            for url in urls:
+                pending.put(url)
+        except Exception as e:
+            feed_errors.append(e)
+        finally:
+            # Always release the workers, or they block on pending.get() forever
+            for _ in threads:
+                pending.put(None)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    while any(t.is_alive() for t in threads) or not results.empty():
+        try:
+            yield results.get(timeout=0.5)
+        except queue.Empty:
+            continue
+    feeder.join()
+    if feed_errors:
+        raise feed_errors[0]
+
+
+def _read_urls(lines):
+    """Accept plain URLs or JSON lines with a "link" field."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            line = json.loads(line).get("link") or ""
+        if line:
+            yield line
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "No URL provided"}))
-        sys.exit(1)
+    import metrics
+
+    metrics.start_from_env()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # python scraper_details.py --batch [--workers N] [--pages-per-driver M] [url ...]
+        # URLs come from the arguments, or one per line on stdin; results are JSONL on stdout.
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Scrape many scheme pages with a browser pool")
+        parser.add_argument("--batch", action="store_true")
+        parser.add_argument("--workers", type=int, default=None, help="browsers to keep warm (default: CPU count)")
+        parser.add_argument("--pages-per-driver", type=int, default=DEFAULT_PAGES_PER_DRIVER)
+        parser.add_argument("--timing", action="store_true", help="report per-page timings on stderr")
+        parser.add_argument("urls", nargs="*")
+        args = parser.parse_args()
+
+        urls = args.urls or _read_urls(sys.stdin)
+        timings = [] if args.timing else None
+        reported = 0
+        for result in scrape_many(urls, args.workers, args.pages_per_driver, timings):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+            if timings is not None:
+                # Workers append concurrently; report whatever is new since the last result
+                new = timings[reported:]
+                reported += len(new)
+                for t in new:
+                    print(json.dumps(t), file=sys.stderr)
+        if timings is not None:
+            print(json.dumps({"summary": timing_summary(timings)}), file=sys.stderr)
+        sys.exit(0)
+
+    # python scraper_details.py URL [--timing]
+    # Arguments are checked before any browser or driver work, so --help and typos stay cheap
+    import argparse
+    from urllib.parse import urlparse
+
+    parser = argparse.ArgumentParser(description="Scrape one scheme page (see --batch for many)")
+    parser.add_argument("url", help="scheme page URL (http or https)")
+    parser.add_argument("--timing", action="store_true", help="report the page timing on stderr")
+    args = parser.parse_args()
+    if urlparse(args.url).scheme not in ("http", "https"):
+        parser.error(f"not an http(s) URL: {args.url}")
 
-    url = sys.argv[1]
+    url = args.url
+    timings = [] if args.timing else None
     try:
-        scheme_details = scrape_scheme_details(url)
+        scheme_details = scrape_scheme_details(url, timings)
         print(json.dumps(scheme_details, ensure_ascii=False, indent=4))
+        if timings:
+            print(json.dumps(timings[0]), file=sys.stderr)
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,246 @@
+# src/scripts/scraper_http.py
+# Lightweight fetcher for https://rules.myscheme.in/ scheme pages.
+# Fetches the server-rendered HTML over a pooled async HTTP session and parses it
+# with lxml, producing the same fields as scraper_details.scrape_scheme_details.
+# Pages whose required sections are missing fall back to the Selenium pool.
+import sys
+import json
+import time
+import asyncio
+
+from metrics import METRICS
+from scraper_details import SECTION_SELECTORS, scrape_many
+
+DEFAULT_CONCURRENCY = 16
+REQUEST_TIMEOUT = 20
+# A page without these sections is treated as client-rendered and sent to Selenium
+REQUIRED_SECTIONS = ("details", "eligibility")
+
+BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "br", "tr", "table", "section",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+
+
+def _inner_text(el) -> str:
+    """Approximate the browser's innerText: block elements start new lines, whitespace collapses."""
+    parts = []
+
+    def walk(node, root=False):
+        if isinstance(node.tag, str) and node.tag not in ("script", "style"):   # skip comments too
+            block = node.tag in BLOCK_TAGS
+            if block:
+                parts.append("\n")
+            if node.text:
+                parts.append(node.text)
+            for child in node:
+                walk(child)
+            if block:
+                parts.append("\n")
+        if node.tail and not root:
+            parts.append(node.tail)
+
+    walk(el, root=True)
+    text = "".join(parts)
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line).strip()
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(w.title() for w in rest)
+
+
+def _find_key(data, keys):
+    """Depth-first search of embedded JSON for the first usable value under any of keys."""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key in keys:
+                value = node.get(key)
+                if isinstance(value, str) and value.strip():
+                    return value.strip()
+                if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+                    return [v.strip() for v in value if v.strip()]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def parse_scheme_html(url: str, page: str, selectors=SECTION_SELECTORS) -> dict:
+    """
+    Extract every section from server-rendered HTML.
+    Sections missing from the markup are looked up in an embedded JSON payload
+    (<script id="__NEXT_DATA__"> or application/json scripts) by field name.
+    """
+    from lxml import html as lxml_html
+
+    doc = lxml_html.fromstring(page)
+    scheme = {"link": url}
+    for field, (selector, many) in selectors.items():
+        elements = doc.cssselect(selector)
+        if many:
+            scheme[field] = [t for t in (_inner_text(el) for el in elements) if t]
+        else:
+            scheme[field] = _inner_text(elements[0]) if elements else ""
+
+    missing = [f for f in selectors if not scheme[f]]
+    if missing:
+        for script in doc.xpath('//script[@id="__NEXT_DATA__" or @type="application/json"]'):
+            try:
+                payload = json.loads(script.text or "")
+            except ValueError:
+                continue
+            for field in missing:
+                if scheme[field]:
+                    continue
+                value = _find_key(payload, [field, _camel(field)])
+                if value is None:
+                    continue
+                many = selectors[field][1]
+                if many:
+                    scheme[field] = value if isinstance(value, list) else [value]
+                else:
+                    scheme[field] = value if isinstance(value, str) else "\n".join(value)
+    return scheme
+
+
+def needs_fallback(scheme: dict, required=REQUIRED_SECTIONS) -> bool:
+    return "error" in scheme or any(not scheme.get(f) for f in required)
+
+
+async def fetch_scheme(session, url: str, headers=None):
+    """
+    Fetch and parse one page over an aiohttp session. Returns (scheme, validators);
+    scheme is None when a conditional request came back 304 Not Modified.
+    """
+    import aiohttp
+
+    start = time.perf_counter()
+    try:
+        async with session.get(url, headers=headers or {}) as response:
+            METRICS.inc("http_responses_total", status=response.status)
+            if response.status == 304:
+                return None, {}
+            if response.status != 200:
+                METRICS.inc("scrape_errors_total", source="http")
+                return {"link": url, "error": f"HTTP {response.status}"}, {}
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            page = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        METRICS.inc("scrape_errors_total", source="http")
+        return {"link": url, "error": str(e) or type(e).__name__}, {}
+    finally:
+        METRICS.observe("scrape_stage_seconds", time.perf_counter() - start, source="http", stage="fetch")
+
+    with METRICS.timer("scrape_stage_seconds", source="http", stage="parse"):
+        scheme = parse_scheme_html(url, page)
+    METRICS.inc("scrape_pages_total", source="http")
+    for field in SECTION_SELECTORS:
+        if not scheme.get(field):
+            METRICS.inc("scrape_empty_sections_total", source="http", field=field)
+    return scheme, validators
+
+
+async def fetch_many(urls, emit, concurrency=DEFAULT_CONCURRENCY, fallback=True, store=None):
+    """
+    Fetch urls over one pooled session with at most `concurrency` requests in flight,
+    calling emit(result) as each page completes. Pages that need a browser are
+    re-scraped through scraper_details.scrape_many at the end.
+
+    With a FingerprintStore, requests are conditional and only schemes whose
+    sections changed are emitted, with a "changed" list of field names. Their
+    fingerprints are staged; the consumer acknowledges the links it saved.
+    Returns {"http": n, "fallback": n, "unchanged": n}.
+    """
+    pending = asyncio.Queue(maxsize=concurrency * 2)
+    fallback_urls, fallback_validators = [], {}
+    stats = {"http": 0, "fallback": 0, "unchanged": 0}
+
+    def emit_if_changed(scheme, validators):
+        if store is not None and "error" not in scheme:
+            changed = store.changed_sections(scheme)
+            if not changed:
+                store.record(scheme, **validators)      # same content as the saved scheme: nothing to confirm
+                stats["unchanged"] += 1
+                METRICS.inc("scrape_unchanged_total", reason="content")
+                return
+            store.stage(scheme, **validators)
+            scheme["changed"] = changed
+        emit(scheme)
+
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+
+        async def worker():
+            while True:
+                url = await pending.get()
+                if url is None:
+                    return
+                headers = store.conditional_headers(url) if store is not None else None
+                scheme, validators = await fetch_scheme(session, url, headers)
+                if scheme is None:
+                    stats["unchanged"] += 1
+                    METRICS.inc("scrape_unchanged_total", reason="not_modified")
+                elif fallback and needs_fallback(scheme):
+                    METRICS.inc("scrape_fallback_total")
+                    fallback_urls.append(url)
+                    # The HTTP validators still apply: an unchanged page is a 304 next time, with no browser
+                    fallback_validators[url] = validators
+                else:
+                    stats["http"] += 1
+                    emit_if_changed(scheme, validators)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for url in urls:
+            await pending.put(url)
+        for _ in workers:
+            await pending.put(None)
+        await asyncio.gather(*workers)
+
+    if fallback_urls:
+        for scheme in await asyncio.to_thread(lambda: list(scrape_many(fallback_urls))):
+            stats["fallback"] += 1
+            emit_if_changed(scheme, fallback_validators.get(scheme.get("link"), {}))
+    if store is not None:
+        store.commit()
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import metrics
+
+    metrics.start_from_env()
+
+    parser = argparse.ArgumentParser(description="HTTP-first scheme details scraper (Selenium fallback)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--no-fallback", action="store_true", help="never start a browser")
+    parser.add_argument("--fingerprints", help="SQLite fingerprint store; only changed schemes are emitted "
+                                               "(acknowledge saved links with `fingerprints.py ack`)")
+    parser.add_argument("urls", nargs="*", help="scheme URLs (default: one per line on stdin)")
+    args = parser.parse_args()
+
+    urls = args.urls or (line.strip() for line in sys.stdin if line.strip())
+
+    def emit(scheme):
+        print(json.dumps(scheme, ensure_ascii=False), flush=True)
+
+    store = None
+    if args.fingerprints:
+        from fingerprints import FingerprintStore
+
+        store = FingerprintStore(args.fingerprints)
+
+    try:
+        stats = asyncio.run(fetch_many(urls, emit, args.concurrency, not args.no_fallback, store))
+    finally:
+        if store is not None:
+            store.close()
+    print(json.dumps({"summary": stats}), file=sys.stderr)
@@ -2,36 +2,28 @@
 import sys
 import json
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import requests
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-# -----------------------------
-# Selenium helper functions
-# -----------------------------
-def safe_text(driver, selector, timeout=5):
-    try:
-        element = WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-        )
-        return element.text.strip()
-    except:
-        return ""
-
-def safe_text_list(driver, selector, timeout=5):
-    try:
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-        )
-        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-        return [el.text.strip() for el in elements if el.text.strip()]
-    except:
-        return []
+from metrics import METRICS
+from canonical import find_states, state_name
+from scraper_details import make_driver, load_sections
+
+# field -> (CSS selector, returns a list?); eligibility text is parsed into `eligible` below
+SECTION_SELECTORS = {
+    "state": ("h3.text-raven.text-base", False),
+    "ministry": ("h3.text-raven", False),
+    "tags": ("div[role='button'][title]", True),
+    "details": ("#details .markdown-options", False),
+    "benefits": ("#benefits .markdown-options", False),
+    "eligibility": ("#eligibility .markdown-options", False),
+    "application_process": ("#application-process .markdown-options", False),
+    "documents_required": ("#documents-required .markdown-options", False),
+    "faqs": ("#faqs .markdown-options", True),
+    "sources_and_resources": ("#sources .markdown-options", True),
+}
 
 # -----------------------------
 # Parse eligibility text
@@ -74,69 +66,259 @@ def parse_eligibility_text(text: str) -> dict:
     eligibility['education'] = [kw for kw in edu_keywords if kw in text_lower]
 
     # --- State / Residence ---
-    states = ['tamil nadu', 'kerala', 'andhra pradesh', 'goa', 'puducherry']
-    eligibility['state'] = [s for s in states if s in text_lower]
+    state_ids = find_states(text_lower)
+    eligibility['state'] = [state_name(i).lower() for i in state_ids]
+    eligibility['stateIds'] = state_ids
 
     return eligibility
 
 # -----------------------------
 # Scrape scheme details
 # -----------------------------
-def scrape_scheme_details(url) -> dict:
+def scrape_scheme_details(url, timings=None) -> dict:
     """Scrape scheme details from rules.myscheme.in page."""
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(url)
-
-    raw_eligibility_text = safe_text(driver, "#eligibility .markdown-options")
-
-    scheme_data = {
-        "link": url,
-        "state": safe_text(driver, "h3.text-raven.text-base"),
-        "ministry": safe_text(driver, "h3.text-raven"),
-        "tags": safe_text_list(driver, "div[role='button'][title]"),
-        "details": safe_text(driver, "#details .markdown-options"),
-        "benefits": safe_text(driver, "#benefits .markdown-options"),
-        "application_process": safe_text(driver, "#application-process .markdown-options"),
-        "documents_required": safe_text(driver, "#documents-required .markdown-options"),
-        "faqs": safe_text_list(driver, "#faqs .markdown-options"),
-        "sources_and_resources": safe_text_list(driver, "#sources .markdown-options"),
-        "eligible": [parse_eligibility_text(raw_eligibility_text)]
-    }
-
-    driver.quit()
+    driver = make_driver()
+    try:
+        sections = load_sections(driver, url, SECTION_SELECTORS, timings)
+    finally:
+        driver.quit()
+
+    raw_eligibility_text = sections.pop("eligibility")
+    scheme_data = {"link": url}
+    scheme_data.update(sections)
+    with METRICS.timer("parse_seconds", parser="parse_eligibility_text"):
+        scheme_data["eligible"] = [parse_eligibility_text(raw_eligibility_text)]
     return scheme_data
 
 # -----------------------------
 # Save scheme to API
 # -----------------------------
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SchemeUploader:
+    """
+    Push scraped schemes to the Next.js API over one pooled session.
+
+    Schemes are sent in batches (a JSON array per request when batch_size > 1)
+    with up to `concurrency` requests in flight. Connection errors, timeouts and
+    429/5xx responses are retried with exponential backoff and jitter. The API
+    upserts on `link`, so a retry never creates a duplicate, and a link is only
+    sent once per uploader.
+    """
+
+    def __init__(self, api_url: str, batch_size: int = 20, concurrency: int = 4,
+                 max_retries: int = 5, backoff: float = 0.5, timeout: float = 30):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = api_url
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._sent_links = set()
+        self.stats = {"sent": 0, "saved": 0, "failed": 0, "duplicates": 0, "retries": 0, "requests": 0}
+        self.failures = []
+
+    def _count(self, key, n=1):
+        METRICS.inc(f"upload_{key}_total", n)
+        with self._lock:
+            self.stats[key] += n
+
+    def _fail(self, links, status, error) -> list:
+        failed = [{"link": link, "status": status, "error": error} for link in links]
+        METRICS.inc("upload_failed_total", len(links))
+        with self._lock:
+            self.stats["failed"] += len(links)
+            self.failures.extend(failed)
+        return failed
+
+    def send_batch(self, batch) -> list:
+        """
+        POST one batch, retrying transient failures. Returns this batch's failures
+        ({"link", "status", "error"}; empty when every scheme was saved); they are
+        also added to `failures` for the run report.
+        """
+        import requests
+
+        links = [s.get("link") for s in batch]
+        payload = batch if self.batch_size > 1 else batch[0]
+        status, error = None, None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+            self._count("requests")
+            try:
+                with METRICS.timer("upload_request_seconds"):
+                    response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.inc("upload_transient_errors_total", reason=type(e).__name__)
+                status, error = None, str(e)
+                continue
+            except requests.RequestException as e:
+                return self._fail(links, None, str(e))
+
+            status = response.status_code
+            if status in RETRY_STATUSES:
+                METRICS.inc("upload_transient_errors_total", reason=str(status))
+                error = response.text[:200]
+                continue
+            if status != 200:
+                return self._fail(links, status, response.text[:200])
+
+            try:
+                results = response.json().get("results") if self.batch_size > 1 else None
+            except ValueError:
+                return self._fail(links, status, f"Invalid JSON response: {response.text[:200]}")
+            if results is None:
+                self._count("saved", len(links))
+                return []
+            failed = []
+            for result in results:
+                if result.get("ok"):
+                    self._count("saved")
+                else:
+                    failed += self._fail([result.get("link")], status, result.get("error"))
+            return failed
+
+        return self._fail(links, status, error)
+
+    def _batches(self, schemes):
+        batch = []
+        for scheme in schemes:
+            link = scheme.get("link")
+            if not link:
+                # The API upserts on link; report the record instead of sending or deduping it
+                self._fail([None], None, "Missing link")
+                continue
+            if link in self._sent_links:
+                self._count("duplicates")
+                continue
+            self._sent_links.add(link)
+            batch.append(scheme)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def upload(self, schemes) -> dict:
+        """Upload an iterable of schemes (consumed lazily) and return a summary report."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = set()
+            for batch in self._batches(schemes):
+                self._count("sent", len(batch))
+                in_flight.add(pool.submit(self.send_batch, batch))
+                if len(in_flight) >= self.concurrency * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()     # send_batch records request failures itself; anything else is a bug
+            for future in wait(in_flight).done:
+                future.result()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, seconds: float) -> dict:
+        summary = dict(self.stats)
+        summary["seconds"] = round(seconds, 3)
+        summary["schemesPerSecond"] = round(summary["saved"] / seconds, 1) if seconds else None
+        summary["failures"] = self.failures
+        return summary
+
+    def close(self):
+        self.session.close()
+
+
+_uploaders = {}
+
+
 def save_scheme_to_api(scheme: dict, api_url: str):
-    """Send scraped scheme to Next.js API."""
-    response = requests.post(api_url, json=scheme)
-    if response.status_code == 200:
+    """Send scraped scheme to Next.js API (pooled connection, retried on transient errors)."""
+    uploader = _uploaders.get(api_url)
+    if uploader is None:
+        uploader = _uploaders[api_url] = SchemeUploader(api_url, batch_size=1, concurrency=1)
+    failed = uploader.send_batch([scheme])
+    if not failed:
         print(f"✅ Scheme saved successfully: {scheme.get('link')}")
     else:
+        failure = failed[0]
         print(f"❌ Failed to save scheme: {scheme.get('link')}")
-        print(response.status_code, response.text)
+        print(failure["status"], failure["error"])
+
+
+def _read_schemes(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
 
 # -----------------------------
 # Main execution
 # -----------------------------
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python scraper_save_eligibility.py <scheme_url> <api_url>")
-        sys.exit(1)
+    import metrics
+
+    metrics.start_from_env()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--upload":
+        # python scraper_save_eligibility.py --upload <schemes.jsonl|-> <api_url> [--batch-size N] [--concurrency N]
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Bulk upload scraped schemes (JSON lines) to the API")
+        parser.add_argument("--upload", metavar="SCHEMES_JSONL", required=True, help="file of JSON lines, or - for stdin")
+        parser.add_argument("api_url")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--max-retries", type=int, default=5)
+        args = parser.parse_args()
+
+        uploader = SchemeUploader(args.api_url, args.batch_size, args.concurrency, args.max_retries)
+        source = sys.stdin if args.upload == "-" else open(args.upload)
+        try:
+            summary = uploader.upload(_read_schemes(source))
+        finally:
+            uploader.close()
+            if source is not sys.stdin:
+                source.close()
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        sys.exit(1 if summary["failed"] else 0)
+
+    # python scraper_save_eligibility.py <scheme_url> <api_url> [--timing]
+    # Arguments are checked before any browser or driver work, so --help and typos stay cheap
+    import argparse
+    from urllib.parse import urlparse
 
-    scheme_url = sys.argv[1]
-    api_url = sys.argv[2]
+    parser = argparse.ArgumentParser(
+        description="Scrape one scheme page and save it through the API",
+        epilog="bulk mode: scraper_save_eligibility.py --upload <schemes.jsonl|-> <api_url>",
+    )
+    parser.add_argument("scheme_url")
+    parser.add_argument("api_url")
+    parser.add_argument("--timing", action="store_true", help="report the page timing on stderr")
+    args = parser.parse_args()
+    for url in (args.scheme_url, args.api_url):
+        if urlparse(url).scheme not in ("http", "https"):
+            parser.error(f"not an http(s) URL: {url}")
 
+    scheme_url, api_url = args.scheme_url, args.api_url
+    timings = [] if args.timing else None
     try:
-        scheme_data = scrape_scheme_details(scheme_url)
-        save_scheme_to_api(scheme_data, api_url)
+        with METRICS.timer("pipeline_stage_seconds", stage="scrape"):
+            scheme_data = scrape_scheme_details(scheme_url, timings)
+        with METRICS.timer("pipeline_stage_seconds", stage="save"):
+            save_scheme_to_api(scheme_data, api_url)
+        if timings:
+            print(json.dumps(timings[0]), file=sys.stderr)
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -0,0 +1,450 @@
+# src/scripts/search_index.py
+# Offline full-text search over scheme content, ranked with BM25.
+# Tokenised documents live in a SQLite doc store, so an update after a crawl
+# only tokenises the schemes whose updatedAt moved (plus deletions); the
+# compressed, memory-mapped index is then rewritten from the stored term
+# counts. Queries never touch the database.
+#
+# index.bin (scheme_snapshot.write_sections layout, magic b"SCHSRCH\0"):
+#   ids_offsets/ids           scheme ids in doc-number order
+#   doc_len                   weighted token count per doc (BM25 length)
+#   terms_offsets/terms       vocabulary, sorted by utf-8 bytes (binary search, prefix ranges)
+#   df                        documents per term
+#   postings_offsets/postings per term: varint (doc-number gap, weighted tf) pairs
+#
+#   python3 search_index.py update --db | --schemes schemes.json
+#   python3 search_index.py query "pm kisan farmer" [-k 10]
+#   python3 search_index.py suggest "schol"
+#   python3 search_index.py serve          # JSON lines: {"id", "q", "k"} / {"id", "op": "suggest", "q"}
+import os
+import re
+import sys
+import json
+import math
+import time
+import sqlite3
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scheme_snapshot import MappedSections, blob, has_magic, write_sections
+
+MAGIC = b"SCHSRCH\0"
+INDEX_VERSION = 1
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".search_index")
+DEFAULT_BATCH = 500
+TOP_K = 10
+PREFIX_EXPANSIONS = 32          # most frequent completions scored for the last query word
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A name hit counts three times, a tag twice
+FIELD_WEIGHTS = {"name": 3, "tags": 2, "ministry": 1, "state": 1, "details": 1, "benefits": 1, "eligibility": 1}
+STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+             "or", "the", "to", "with", "will", "this", "that", "shall", "should", "must", "may", "who"}
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without stopwords; single letters are dropped, digits kept."""
+    return [t for t in TOKEN_RE.findall((text or "").lower())
+            if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def document_terms(scheme: Dict) -> Dict[str, int]:
+    """Weighted term frequencies of one scheme's searchable fields."""
+    counts: Dict[str, int] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        value = scheme.get(field)
+        if isinstance(value, list):
+            value = " ".join(v for v in value if isinstance(v, str))
+        if not isinstance(value, str):
+            continue
+        for term in tokenize(value):
+            counts[term] = counts.get(term, 0) + weight
+    return counts
+
+
+def _varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+# -----------------------------
+# Doc store + compile
+# -----------------------------
+class DocStore:
+    """
+    state_dir/docs.sqlite   docs(id, terms JSON, length), watermarks(source, updated_at)
+    state_dir/index.bin     compiled index, rewritten by compile()
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        self.index_path = os.path.join(state_dir, "index.bin")
+        self.conn = sqlite3.connect(os.path.join(state_dir, "docs.sqlite"))
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, terms TEXT NOT NULL, length INTEGER NOT NULL);
+               CREATE TABLE IF NOT EXISTS watermarks (source TEXT PRIMARY KEY, updated_at TEXT NOT NULL);"""
+        )
+        self.changed = 0
+
+    def watermark(self, source: str = "schemes") -> Optional[str]:
+        row = self.conn.execute("SELECT updated_at FROM watermarks WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, updated_at: Optional[str], source: str = "schemes"):
+        if updated_at is None:
+            return
+        self.conn.execute(
+            "INSERT INTO watermarks (source, updated_at) VALUES (?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET updated_at = excluded.updated_at",
+            (source, updated_at),
+        )
+
+    def known_ids(self) -> set:
+        return {row[0] for row in self.conn.execute("SELECT id FROM docs")}
+
+    def upsert(self, schemes: Iterable[Dict]) -> int:
+        """Tokenise and store schemes; `changed` only counts docs whose terms actually differ."""
+        rows = []
+        for scheme in schemes:
+            terms = document_terms(scheme)
+            rows.append((str(scheme["id"]), json.dumps(terms, ensure_ascii=False), sum(terms.values())))
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT INTO docs (id, terms, length) VALUES (?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+            "terms = excluded.terms, length = excluded.length WHERE docs.terms != excluded.terms",
+            rows,
+        )
+        self.changed += self.conn.total_changes - before
+        return len(rows)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        before = self.conn.total_changes
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in ids])
+        deleted = self.conn.total_changes - before
+        self.changed += deleted
+        return deleted
+
+    def needs_compile(self) -> bool:
+        """Docs changed in this run, or index.bin is missing or holds a different number of docs."""
+        if self.changed or not is_search_index(self.index_path):
+            return True
+        count = self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        with SearchIndex(self.index_path) as index:
+            return index.num_docs != count
+
+    def compile(self) -> Dict:
+        """Rewrite index.bin from the stored term counts (no re-tokenising). Returns the header."""
+        ids, doc_len = [], array("I")
+        postings: Dict[str, list] = {}
+        for docno, (doc_id, terms, length) in enumerate(
+                self.conn.execute("SELECT id, terms, length FROM docs ORDER BY id")):
+            ids.append(doc_id.encode("utf-8"))
+            doc_len.append(length)
+            for term, tf in json.loads(terms).items():
+                postings.setdefault(term, []).append((docno, tf))
+
+        vocabulary = sorted(postings, key=lambda t: t.encode("utf-8"))
+        df, postings_offsets, postings_blob = array("I"), array("Q", [0]), bytearray()
+        for term in vocabulary:
+            previous = 0
+            for docno, tf in postings[term]:          # doc numbers ascend: rows come in id order
+                _varint(postings_blob, docno - previous)
+                _varint(postings_blob, tf)
+                previous = docno
+            df.append(len(postings[term]))
+            postings_offsets.append(len(postings_blob))
+
+        ids_offsets, ids_blob = blob(ids, "I")
+        terms_offsets, terms_blob = blob((t.encode("utf-8") for t in vocabulary), "I")
+        header = {"version": INDEX_VERSION, "docs": len(ids), "terms": len(vocabulary),
+                  "avgdl": sum(doc_len) / len(ids) if ids else 0.0, "k1": BM25_K1, "b": BM25_B,
+                  "builtAt": time.time()}
+        header = write_sections(self.index_path, MAGIC, header, {
+            "ids_offsets": ids_offsets, "ids": ids_blob, "doc_len": doc_len,
+            "terms_offsets": terms_offsets, "terms": terms_blob, "df": df,
+            "postings_offsets": postings_offsets, "postings": postings_blob,
+        })
+        self.changed = 0
+        return header
+
+    def close(self, commit: bool = True):
+        """
+        Commit and close. With commit=False (a failed update) the partial upserts
+        are rolled back: kept, they would match the next run's terms exactly and
+        leave index.bin uncompiled.
+        """
+        if commit:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+
+# -----------------------------
+# Memory-mapped index
+# -----------------------------
+class SearchIndex(MappedSections):
+    """Ranked lookups over index.bin; opening maps the file and reads nothing else."""
+    label = "search index"
+
+    def __init__(self, path: str):
+        super().__init__(path, MAGIC, INDEX_VERSION)
+        self.num_docs = self.header["docs"]
+        self.num_terms = self.header["terms"]
+        self.avgdl = self.header["avgdl"] or 1.0
+        self.k1, self.b = self.header["k1"], self.header["b"]
+        self.mtime = os.path.getmtime(path)
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._terms_offsets[i]:self._terms_offsets[i + 1]])
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def term_id(self, term: str) -> int:
+        """Vocabulary position of term, -1 when absent."""
+        key = term.encode("utf-8")
+        i = self._lower_bound(key)
+        return i if i < self.num_terms and self._term(i) == key else -1
+
+    def completions(self, prefix: str, limit: int = PREFIX_EXPANSIONS) -> List[int]:
+        """Term ids starting with prefix, most frequent first; the prefix itself is kept when it is a term."""
+        key = prefix.encode("utf-8")
+        i, found = self._lower_bound(key), []
+        while i < self.num_terms and self._term(i).startswith(key):
+            found.append(i)
+            i += 1
+        exact = found[0] if found and self._term(found[0]) == key else -1     # sorts first in the vocabulary
+        found.sort(key=lambda t: -self._df[t])
+        found = found[:limit]
+        if exact >= 0 and exact not in found:
+            found[-1] = exact
+        return found
+
+    def postings(self, term_id: int) -> Iterable[Tuple[int, int]]:
+        data = bytes(self._postings[self._postings_offsets[term_id]:self._postings_offsets[term_id + 1]])
+        values, n, shift = [], 0, 0
+        for byte in data:
+            n |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                values.append(n)
+                n, shift = 0, 0
+        docno = 0
+        for i in range(0, len(values), 2):
+            docno += values[i]
+            yield docno, values[i + 1]
+
+    def doc_id(self, docno: int) -> str:
+        return bytes(self._ids[self._ids_offsets[docno]:self._ids_offsets[docno + 1]]).decode("utf-8")
+
+    def _bm25(self, term_id: int) -> Dict[int, float]:
+        df = self._df[term_id]
+        idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+        k1, norm = self.k1, self.k1 * self.b / self.avgdl
+        base, doc_len = k1 * (1 - self.b), self._doc_len
+        return {docno: idf * tf * (k1 + 1) / (tf + base + norm * doc_len[docno])
+                for docno, tf in self.postings(term_id)}
+
+    def search(self, query: str, k: Optional[int] = TOP_K, prefix: bool = True) -> List[Dict]:
+        """
+        Ranked {"id", "score"} for any query word (BM25, OR semantics), best first,
+        doc order on ties. With prefix, the last word also matches its completions
+        ("schol" -> scholarship); a doc scores its best completion, not their sum.
+        """
+        words = tokenize(query)
+        if not words or not self.num_docs:
+            return []
+        scores: Dict[int, float] = {}
+        for position, word in enumerate(words):
+            if prefix and position == len(words) - 1:
+                term_ids = self.completions(word)
+            else:
+                term_id = self.term_id(word)
+                term_ids = [term_id] if term_id >= 0 else []
+            best: Dict[int, float] = {}
+            for term_id in term_ids:
+                for docno, score in self._bm25(term_id).items():
+                    if score > best.get(docno, 0.0):
+                        best[docno] = score
+            for docno, score in best.items():
+                scores[docno] = scores.get(docno, 0.0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [{"id": self.doc_id(docno), "score": round(score, 4)} for docno, score in ranked[:k]]
+
+    def suggest(self, prefix: str, k: int = TOP_K) -> List[Dict]:
+        """Autocomplete: vocabulary words starting with prefix, most frequent first."""
+        words = tokenize(prefix)
+        if not words:
+            return []
+        return [{"term": self._term(i).decode("utf-8"), "df": self._df[i]} for i in self.completions(words[-1], k)]
+
+
+def is_search_index(path: str) -> bool:
+    return has_magic(path, MAGIC)
+
+
+# -----------------------------
+# Prisma source
+# -----------------------------
+async def sync_db(store: DocStore, batch_size: int = DEFAULT_BATCH) -> Dict:
+    """Re-tokenise schemes changed since the watermark, drop deleted ones and recompile when anything moved."""
+    from prisma import Prisma
+    from eligibility_delta import _changed_rows, _all_ids
+
+    db = Prisma()
+    await db.connect()
+    try:
+        mark, batch, updated, deleted = store.watermark(), [], 0, 0
+        async for s in _changed_rows(db.scheme, mark, batch_size):
+            batch.append({"id": s.id, **{field: getattr(s, field) for field in FIELD_WEIGHTS}})
+            mark = s.updatedAt.isoformat()
+            if len(batch) >= batch_size:
+                updated += store.upsert(batch)
+                batch = []
+        updated += store.upsert(batch)
+
+        # Deletions do not touch updatedAt; a count mismatch triggers an id reconcile
+        known = store.known_ids()
+        if await db.scheme.count() != len(known):
+            deleted = store.delete(known - await _all_ids(db.scheme, batch_size))
+    finally:
+        await db.disconnect()
+
+    header = store.compile() if store.needs_compile() else None
+    store.set_watermark(mark)
+    store.conn.commit()
+    return {"updated": updated, "deleted": deleted, "compiled": header is not None}
+
+
+def update_from_file(store: DocStore, path: str) -> Dict:
+    """Offline: the file replaces the indexed catalog; ids missing from it are deletions."""
+    from user_eligibility import iter_json_records
+
+    updated, batch, seen = 0, [], set()
+    with open(path, encoding="utf-8") as f:
+        for scheme in iter_json_records(f):
+            if scheme.get("id") is None:
+                continue
+            seen.add(str(scheme["id"]))
+            batch.append(scheme)
+            if len(batch) >= DEFAULT_BATCH:
+                updated += store.upsert(batch)
+                batch = []
+    updated += store.upsert(batch)
+    deleted = store.delete(store.known_ids() - seen)
+    header = store.compile() if store.needs_compile() else None
+    store.conn.commit()
+    return {"updated": updated, "deleted": deleted, "compiled": header is not None}
+
+
+# -----------------------------
+# Query service (JSON lines)
+# -----------------------------
+def serve(path: str, lines: Iterable[str], write):
+    """
+    Answer {"id", "q", "k", "prefix"} search and {"id", "op": "suggest", "q", "k"}
+    requests in order; the index is (re-)mapped once it exists and whenever an
+    update replaced the file.
+    """
+    index = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            write({"id": None, "ok": False, "error": f"Invalid JSON: {e}"})
+            continue
+        try:
+            if index is None and not is_search_index(path):
+                write({"id": request.get("id"), "ok": False,
+                       "error": "No search index yet; run `python3 search_index.py update` first"})
+                continue
+            if index is None or os.path.getmtime(path) != index.mtime:
+                fresh = SearchIndex(path)
+                if index is not None:
+                    index.close()
+                index = fresh
+            start = time.perf_counter()
+            if request.get("op") == "suggest":
+                result = index.suggest(request.get("q") or "", request.get("k") or TOP_K)
+            else:
+                result = index.search(request.get("q") or "", request.get("k") or TOP_K,
+                                      request.get("prefix", True))
+            write({"id": request.get("id"), "ok": True, "result": result,
+                   "ms": round((time.perf_counter() - start) * 1000, 2)})
+        except Exception as e:
+            write({"id": request.get("id"), "ok": False, "error": str(e)})
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="BM25 search index over scheme content")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="index directory (doc store + index.bin)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="index changed schemes and recompile")
+    source = update.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", action="store_true", help="read schemes changed since the last update from Prisma")
+    source.add_argument("--schemes", help="schemes JSON array / JSONL snapshot (offline, replaces the catalog)")
+    update.add_argument("--batch", type=int, default=DEFAULT_BATCH)
+    for name in ("query", "suggest"):
+        command = commands.add_parser(name)
+        command.add_argument("q", help="query text" if name == "query" else "prefix to complete")
+        command.add_argument("-k", type=int, default=TOP_K)
+        if name == "query":
+            command.add_argument("--no-prefix", action="store_true", help="match the last word exactly")
+    commands.add_parser("serve", help="answer JSON-line queries on stdin")
+    commands.add_parser("info")
+    args = parser.parse_args()
+    index_path = os.path.join(args.dir, "index.bin")
+
+    if args.command == "update":
+        store, succeeded = DocStore(args.dir), False
+        try:
+            start = time.perf_counter()
+            summary = asyncio.run(sync_db(store, args.batch)) if args.db else update_from_file(store, args.schemes)
+            summary["seconds"] = round(time.perf_counter() - start, 3)
+            print(json.dumps(summary))
+            succeeded = True
+        finally:
+            store.close(commit=succeeded)
+    elif args.command == "serve":
+        def write(response):
+            sys.stdout.write(json.dumps(response, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+        serve(index_path, sys.stdin, write)
+    else:
+        if not is_search_index(index_path):
+            print(f"❌ No search index at {index_path}; run `python3 search_index.py update` first", file=sys.stderr)
+            sys.exit(1)
+        with SearchIndex(index_path) as index:
+            if args.command == "info":
+                header = dict(index.header)
+                header["sections"] = {name: count for name, (_, _, count) in header["sections"].items()}
+                header["bytes"] = os.path.getsize(index_path)
+                print(json.dumps(header, indent=2))
+            elif args.command == "suggest":
+                print(json.dumps(index.suggest(args.q, args.k), ensure_ascii=False))
+            else:
+                start = time.perf_counter()
+                results = index.search(args.q, args.k, not args.no_prefix)
+                print(json.dumps(results, ensure_ascii=False))
+                print(f"⏱️  {len(results)} results in {(time.perf_counter() - start) * 1000:.1f}ms", file=sys.stderr)
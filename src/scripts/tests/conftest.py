@@ -0,0 +1,13 @@
+# src/scripts/tests/conftest.py
+# The scripts import their siblings by module name (they run as `python3 src/scripts/x.py`),
+# so the tests put src/scripts on the path the same way.
+#
+#   python3 -m pytest src/scripts/tests
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
@@ -0,0 +1,79 @@
+# src/scripts/tests/test_eligibility_engines.py
+# Every engine that ranks schemes for a user must agree with check_eligibility:
+# the inverted index, the memory-mapped snapshot, the vectorised bulk engine and
+# the delta engine.
+import pytest
+
+from benchmarks.corpus import generate_schemes, generate_users
+from bulk_eligibility import bulk_eligibility
+from eligibility_delta import DeltaEngine
+from eligibility_index import EligibilityIndex, rank_scheme_ids
+from scheme_snapshot import SchemeSnapshot, export_snapshot
+from user_eligibility import check_eligibility, score_schemes, top_k
+
+SCHEMES = generate_schemes(400)
+USERS = generate_users(300)
+
+
+def ids(schemes):
+    return [scheme["id"] for scheme in schemes]
+
+
+@pytest.fixture(scope="module")
+def expected():
+    return [ids(check_eligibility(user, SCHEMES)) for user in USERS]
+
+
+def test_corpus_has_matches(expected):
+    assert sum(1 for e in expected if e) > len(USERS) // 4
+
+
+def test_index_matches_check_eligibility(expected):
+    index = EligibilityIndex.build(SCHEMES)
+    assert [ids(index.match(user)) for user in USERS] == expected
+
+
+def test_index_round_trip(expected, tmp_path):
+    path = str(tmp_path / "index.json")
+    EligibilityIndex.build(SCHEMES).save(path)
+    index = EligibilityIndex.load(path)
+    assert [ids(index.match(user)) for user in USERS] == expected
+
+
+def test_snapshot_matches_check_eligibility(expected, tmp_path):
+    path = str(tmp_path / "schemes.snapshot")
+    export_snapshot(SCHEMES, path)
+    with SchemeSnapshot.open(path) as snapshot:
+        assert [ids(snapshot.match(user)) for user in USERS] == expected
+        assert ids(check_eligibility(USERS[0], snapshot)) == expected[0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1024])
+def test_bulk_matches_check_eligibility(expected, chunk_size):
+    results = list(bulk_eligibility(USERS, SCHEMES, 5, chunk_size))
+    assert [user["id"] for user, _ in results] == [user["id"] for user in USERS]
+    assert [ids(schemes) for _, schemes in results] == expected
+
+
+def test_bulk_every_eligible_scheme():
+    results = bulk_eligibility(USERS, SCHEMES, None, 128)
+    assert [ids(schemes) for _, schemes in results] == [
+        [scheme["id"] for _, scheme, _ in top_k(score_schemes(user, SCHEMES), None)] for user in USERS
+    ]
+
+
+def test_delta_and_bulk_rank_ties_the_same(tmp_path):
+    # The delta engine indexes schemes in change order; ties must still follow scheme id
+    engine = DeltaEngine(str(tmp_path))
+    try:
+        engine.apply_changes(users=USERS, schemes=list(reversed(SCHEMES)))
+        by_id = sorted(SCHEMES, key=lambda scheme: scheme["id"])
+        for user, schemes in bulk_eligibility(USERS, by_id, None, 256):
+            assert engine.recompute(user["id"]) == ids(schemes)
+    finally:
+        engine.close()
+
+
+def test_rank_scheme_ids_breaks_ties_by_id():
+    assert rank_scheme_ids([("b", 3), ("a", 3), ("c", 4), ("d", 2)]) == ["c", "a", "b", "d"]
+    assert rank_scheme_ids([("b", 3), ("a", 3), ("c", 4)], k=2) == ["c", "a"]
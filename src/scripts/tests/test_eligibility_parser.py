@@ -0,0 +1,97 @@
+# src/scripts/tests/test_eligibility_parser.py
+# parse_eligibility against a recorded golden corpus: the benchmark corpus plus
+# hand-written edge cases. The recording matches the parser before the single-pass
+# matcher, apart from canonical state names and whitespace-only text, which were
+# changed on purpose. After an intended parser change, regenerate with
+#   cd src/scripts && python3 tests/test_eligibility_parser.py --regen
+import io
+import os
+import json
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from eligibility import parse_eligibility, parse_stream, ParseCache
+from benchmarks.corpus import generate_schemes
+
+GOLDEN = os.path.join(FIXTURES_DIR, "eligibility_golden.json")
+CORPUS_SIZE = 150
+
+EDGE_CASES = [
+    {"eligibility": "", "state": "Kerala", "ministry": ""},
+    {"eligibility": "   \n ", "state": "Kerala", "ministry": ""},
+    {"eligibility": "Women farmers of Tamil Nadu aged 18-40 years", "state": "", "ministry": ""},
+    {"eligibility": "Students who passed 12th class from SC/ST families", "state": "Odisha", "ministry": ""},
+    {"eligibility": "Widows with annual income below Rs. 2,00,000", "state": "", "ministry": "Ministry of Rural Development"},
+    {"eligibility": "Divyang persons (40% disability) may apply", "state": "Assam", "ministry": ""},
+    {"eligibility": "Fishermen from minority communities (Muslim, Christian)", "state": "Goa", "ministry": ""},
+    {"eligibility": "Unmarried girls between 18 to 35 years of age", "state": "", "ministry": ""},
+    {"eligibility": "Transgender applicants are eligible", "state": "Delhi", "ministry": ""},
+    {"eligibility": "ITI or diploma holders; OBC; family income upto 8 lakh", "state": "Orissa", "ministry": ""},
+]
+
+
+def corpus():
+    schemes = [{k: s[k] for k in ("eligibility", "state", "ministry")} for s in generate_schemes(CORPUS_SIZE)]
+    return schemes + EDGE_CASES
+
+
+def parse(case):
+    # As the --stream reader passes them: missing state / ministry become None
+    return parse_eligibility(case["eligibility"], case["state"] or None, case["ministry"] or None)
+
+
+def load_golden():
+    with open(GOLDEN) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("number", range(CORPUS_SIZE + len(EDGE_CASES)))
+def test_matches_golden(number):
+    golden = load_golden()[number]
+    assert golden["input"] == corpus()[number]
+    assert parse(golden["input"]) == golden["parsed"]
+
+
+def _stream(cases, parse=parse_eligibility):
+    lines = [json.dumps({"id": str(i), **case}) for i, case in enumerate(cases)]
+    out = io.StringIO()
+    parse_stream(lines, out, parse)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_stream_matches_direct_parse():
+    cases = corpus()
+    results = _stream(cases)
+    assert [r["id"] for r in results] == [str(i) for i in range(len(cases))]
+    assert [r["parsed"] for r in results] == [parse(case) for case in cases]
+
+
+def test_cached_parse_matches_direct_parse(tmp_path):
+    cases = corpus() * 2                    # the second pass is served from the cache
+    path = str(tmp_path / "cache.sqlite")
+    cache = ParseCache(path)
+    try:
+        results = _stream(cases, cache.parse)
+    finally:
+        cache.close()
+    assert cache.counts["memoryHits"] >= len(cases) // 2
+    assert [r["parsed"] for r in results] == [parse(case) for case in cases]
+
+    reopened = ParseCache(path, max_memory=0)     # disk hits only
+    try:
+        assert [reopened.parse(c["eligibility"], c["state"] or None, c["ministry"] or None)
+                for c in cases[:20]] == [parse(case) for case in cases[:20]]
+    finally:
+        reopened.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--regen" not in sys.argv[1:]:
+        sys.exit("usage: python3 tests/test_eligibility_parser.py --regen")
+    with open(GOLDEN, "w") as f:
+        json.dump([{"input": case, "parsed": parse(case)} for case in corpus()], f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"✅ Wrote {GOLDEN}")
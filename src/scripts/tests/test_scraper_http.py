@@ -0,0 +1,171 @@
+# src/scripts/tests/test_scraper_http.py
+# lxml extraction from saved scheme pages, and fetch_many against a local server.
+import asyncio
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from fingerprints import FingerprintStore
+from scraper_http import fetch_many, needs_fallback, parse_scheme_html
+
+PAGES = {
+    "/server": "scheme_server_rendered.html",
+    "/client": "scheme_client_rendered.html",
+    "/missing": "scheme_missing_sections.html",
+}
+
+
+def _page(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+SERVER_RENDERED = {
+    "link": "https://rules.myscheme.in/server",
+    "state": "Karnataka",
+    "ministry": "Ministry Of Social Justice And Empowerment",
+    "tags": ["Scholarship", "Student"],
+    "details": "Financial assistance to students\nstudying at the post-matric stage.\n"
+               "Covers tuition and maintenance.",
+    "benefit": "Tuition fee\nMaintenance allowance",
+    "eligibility": "The applicant should be a resident of Karnataka.\n"
+                   "Annual family income should not exceed ₹2,50,000.",
+    "application_process": "Apply online on the state portal.",
+    "documents_required": "Income certificate\nCaste certificate",
+    "faq": ["Who can apply?\nStudents of Karnataka.", "Is there an age limit?\nNo."],
+    "sources_and_references": ["Guidelines"],
+}
+
+CLIENT_RENDERED = {
+    "link": "https://rules.myscheme.in/client",
+    "state": "Kerala",
+    "ministry": "Ministry Of Labour And Employment",
+    "tags": ["Pension", "Unorganised Workers"],
+    "details": "Monthly pension for unorganised workers.",
+    "benefit": "₹3,000 per month after 60 years of age.",
+    "eligibility": "The applicant should be between 18 and 40 years.\nMonthly income up to ₹15,000.",
+    "application_process": "Enrol at a Common Service Centre.",
+    "documents_required": "Aadhaar card",
+    "faq": ["Can I exit the scheme? Yes."],
+    "sources_and_references": ["https://example.gov.in/pension"],
+}
+
+
+# -----------------------------
+# Extraction
+# -----------------------------
+def test_server_rendered_page():
+    scheme = parse_scheme_html(SERVER_RENDERED["link"], _page(PAGES["/server"]))
+    assert scheme == SERVER_RENDERED
+    assert not needs_fallback(scheme)
+
+
+def test_client_rendered_page_reads_next_data():
+    scheme = parse_scheme_html(CLIENT_RENDERED["link"], _page(PAGES["/client"]))
+    assert scheme == CLIENT_RENDERED
+    assert not needs_fallback(scheme)
+
+
+def test_missing_sections_need_fallback():
+    scheme = parse_scheme_html("https://rules.myscheme.in/missing", _page(PAGES["/missing"]))
+    assert scheme["ministry"] == "Ministry Of Rural Development"
+    assert scheme["benefit"] == "Wage employment."
+    assert scheme["details"] == "" and scheme["eligibility"] == ""
+    assert scheme["faq"] == [] and scheme["tags"] == []
+    assert needs_fallback(scheme)
+    assert needs_fallback({"link": "x", "error": "HTTP 404"})
+
+
+# -----------------------------
+# fetch_many against a local server
+# -----------------------------
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = PAGES.get(self.path)
+        if name is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = f'"{name}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = _page(name).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _crawl(urls, **kwargs):
+    results = []
+    stats = asyncio.run(fetch_many(urls, results.append, concurrency=2, **kwargs))
+    return {scheme["link"]: scheme for scheme in results}, stats
+
+
+def test_fetch_many_without_fallback(base_url):
+    urls = [base_url + path for path in ("/server", "/client", "/missing", "/gone")]
+    results, stats = _crawl(urls, fallback=False)
+
+    assert set(results) == set(urls)
+    assert results[urls[0]] == dict(SERVER_RENDERED, link=urls[0])
+    assert results[urls[1]] == dict(CLIENT_RENDERED, link=urls[1])
+    assert needs_fallback(results[urls[2]]) and "error" not in results[urls[2]]
+    assert results[urls[3]] == {"link": urls[3], "error": "HTTP 404"}
+    assert stats == {"http": 4, "fallback": 0, "unchanged": 0}
+
+
+def test_fetch_many_sends_incomplete_pages_to_fallback(base_url, monkeypatch):
+    scraped = []
+
+    def scrape_many(urls):
+        scraped.extend(urls)
+        return [{"link": url, "details": "from the browser"} for url in urls]
+
+    monkeypatch.setattr("scraper_http.scrape_many", scrape_many)
+    urls = [base_url + "/server", base_url + "/missing", base_url + "/gone"]
+    results, stats = _crawl(urls)
+
+    assert sorted(scraped) == sorted(urls[1:])
+    assert results[urls[1]] == {"link": urls[1], "details": "from the browser"}
+    assert results[urls[0]]["details"] == SERVER_RENDERED["details"]
+    assert stats == {"http": 1, "fallback": 2, "unchanged": 0}
+
+
+def test_fetch_many_with_fingerprints(base_url, tmp_path):
+    urls = [base_url + "/server", base_url + "/client"]
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    try:
+        results, stats = _crawl(urls, fallback=False, store=store)
+        assert set(results) == set(urls)
+        assert "eligibility" in results[urls[0]]["changed"]
+
+        # Staged only: nothing is conditional until the consumer acknowledges the save
+        assert store.conditional_headers(urls[0]) == {}
+        assert store.acknowledge(urls) == 2
+        assert store.conditional_headers(urls[0]) == {"If-None-Match": '"scheme_server_rendered.html"'}
+
+        results, stats = _crawl(urls, fallback=False, store=store)
+        assert results == {}
+        assert stats == {"http": 0, "fallback": 0, "unchanged": 2}
+    finally:
+        store.close()
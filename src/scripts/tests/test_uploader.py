@@ -0,0 +1,163 @@
+# src/scripts/tests/test_uploader.py
+# SchemeUploader against a local stand-in for the Next.js /api/schemes/add route.
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraper_save_eligibility import SchemeUploader
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    /add      upserts each scheme; links containing "invalid" fail per item
+    /flaky    503 for the first `flaky` requests, then as /add
+    /reject   400
+    /garbage  200 with a body that is not JSON
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, body))
+            attempt = len(server.requests)
+
+        if self.path == "/reject":
+            return self._send(400, b"Bad request")
+        if self.path == "/garbage":
+            return self._send(200, b"<html>not json</html>")
+        if self.path == "/flaky" and attempt <= server.flaky:
+            return self._send(503, b"Service unavailable")
+
+        schemes = body if isinstance(body, list) else [body]
+        results = [
+            {"link": s["link"], "ok": False, "error": "Invalid scheme"} if "invalid" in s["link"]
+            else {"link": s["link"], "ok": True}
+            for s in schemes
+        ]
+        payload = {"results": results} if isinstance(body, list) else {"message": "Scheme saved"}
+        self._send(200, json.dumps(payload).encode())
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.flaky = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _uploader(server, path="/add", **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return SchemeUploader(server.url + path, **kwargs)
+
+
+def _schemes(*links):
+    return [{"link": link, "name": link.upper()} for link in links]
+
+
+def test_batches_and_per_item_results(server):
+    uploader = _uploader(server, batch_size=2, concurrency=2)
+    report = uploader.upload(_schemes("a", "b", "invalid-c", "d", "e"))
+    uploader.close()
+
+    sent = sorted(link for _, body in server.requests for link in (s["link"] for s in body))
+    assert sent == ["a", "b", "d", "e", "invalid-c"]
+    assert sorted(len(body) for _, body in server.requests) == [1, 2, 2]
+    assert report["sent"] == 5 and report["saved"] == 4 and report["failed"] == 1
+    assert report["requests"] == 3 and report["retries"] == 0
+    assert report["failures"] == [{"link": "invalid-c", "status": 200, "error": "Invalid scheme"}]
+
+
+def test_duplicates_and_missing_links(server):
+    uploader = _uploader(server, batch_size=10)
+    schemes = _schemes("a", "b", "a") + [{"name": "No link"}, {"link": "", "name": "Empty"}] + _schemes("b")
+    report = uploader.upload(schemes)
+    uploader.close()
+
+    assert [[s["link"] for s in body] for _, body in server.requests] == [["a", "b"]]
+    assert report["duplicates"] == 2
+    assert report["saved"] == 2
+    assert report["failures"] == [
+        {"link": None, "status": None, "error": "Missing link"},
+        {"link": None, "status": None, "error": "Missing link"},
+    ]
+
+
+def test_retries_transient_errors(server):
+    server.flaky = 2
+    uploader = _uploader(server, "/flaky", batch_size=5)
+    report = uploader.upload(_schemes("a", "b"))
+    uploader.close()
+
+    assert len(server.requests) == 3
+    assert report["retries"] == 2 and report["requests"] == 3
+    assert report["saved"] == 2 and report["failed"] == 0
+
+
+def test_gives_up_after_max_retries(server):
+    server.flaky = 100
+    uploader = _uploader(server, "/flaky", batch_size=5, max_retries=2)
+    failed = uploader.send_batch(_schemes("a"))
+    uploader.close()
+
+    assert len(server.requests) == 3
+    assert failed == [{"link": "a", "status": 503, "error": "Service unavailable"}]
+    assert uploader.failures == failed
+
+
+def test_client_error_is_not_retried(server):
+    uploader = _uploader(server, "/reject", batch_size=5)
+    failed = uploader.send_batch(_schemes("a", "b"))
+    uploader.close()
+
+    assert len(server.requests) == 1
+    assert failed == [
+        {"link": "a", "status": 400, "error": "Bad request"},
+        {"link": "b", "status": 400, "error": "Bad request"},
+    ]
+    assert uploader.stats["retries"] == 0 and uploader.stats["failed"] == 2
+
+
+def test_invalid_json_response(server):
+    uploader = _uploader(server, "/garbage", batch_size=5)
+    failed = uploader.send_batch(_schemes("a"))
+    uploader.close()
+
+    assert failed == [{"link": "a", "status": 200, "error": "Invalid JSON response: <html>not json</html>"}]
+
+
+def test_send_batch_single_scheme(server):
+    uploader = _uploader(server, batch_size=1)
+    assert uploader.send_batch(_schemes("a")) == []
+    assert uploader.send_batch(_schemes("invalid-b")) == []    # one scheme per request has no per-item results
+    uploader.close()
+
+    assert [body for _, body in server.requests] == _schemes("a", "invalid-b")
+    assert uploader.stats["saved"] == 2
+
+
+def test_connection_errors_are_retried():
+    uploader = SchemeUploader("http://127.0.0.1:9/add", max_retries=1, backoff=0.001, timeout=1)
+    failed = uploader.send_batch(_schemes("a"))
+    uploader.close()
+
+    assert len(failed) == 1 and failed[0]["link"] == "a" and failed[0]["status"] is None
+    assert uploader.stats["retries"] == 1 and uploader.stats["requests"] == 2
@@ -1,49 +1,90 @@
 # src/scripts/eligibility_checker.py
 import json
-from typing import List, Dict, Union
+import os
+import sys
+import heapq
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Union, Optional, Iterable, Iterator, Tuple, IO
+
+from canonical import state_id, normalize, is_all_states
+
+
+@lru_cache(maxsize=4096)
+def _state_token(value: str) -> Union[int, str]:
+    """Canonical id of a known state / UT, else the normalised spelling."""
+    return state_id(value) or normalize(value)
+
+
+@lru_cache(maxsize=4096)
+def _scheme_state_tokens(scheme_states) -> Optional[frozenset]:
+    """State tokens of a criterion's (hashable) state value, or None when it applies to every state."""
+    if isinstance(scheme_states, str):
+        # Allow comma-separated states in string
+        states_list = [s.strip() for s in scheme_states.split(",") if s.strip()]
+    else:
+        states_list = [s.strip() for s in scheme_states if s.strip()]
+    if not states_list or any(is_all_states(s) for s in states_list):
+        return None
+    return frozenset(_state_token(s) for s in states_list)
 
 
 def is_state_match(user_state: str, scheme_states: Union[List[str], str, None]) -> bool:
     """
     Returns True only if:
-    - scheme states is empty or 'all'
-    - OR user_state exactly matches one of the scheme states
+    - scheme states is empty or 'all' (or another every-state spelling, e.g. 'All India')
+    - OR user_state is the same state as one of the scheme states: known states
+      compare by canonical id ('TN' == 'Tamil Nadu'), unknown ones by spelling
     """
     if not user_state:
         return False
 
-    user_state_norm = user_state.strip().lower()
-
-    # Convert scheme_states to list
-    states_list: List[str] = []
-    if isinstance(scheme_states, str):
-        # Allow comma-separated states in string
-        states_list = [s.strip() for s in scheme_states.split(",") if s.strip()]
-    elif isinstance(scheme_states, list):
-        states_list = [s.strip() for s in scheme_states if s.strip()]
+    if isinstance(scheme_states, list):
+        scheme_states = tuple(s for s in scheme_states if isinstance(s, str))
+    elif not isinstance(scheme_states, str):
+        scheme_states = ()
+    tokens = _scheme_state_tokens(scheme_states)
 
     # If empty or 'all', always match
-    if not states_list or any(s.lower() == "all" for s in states_list):
-        return True
-
-    # Exact match only
-    return any(user_state_norm == s.lower() for s in states_list)
+    return tokens is None or _state_token(user_state.strip()) in tokens
 
 
 def check_eligibility(user: Dict, schemes: List[Dict]) -> List[Dict]:
     """
     Recommend top 5 schemes for a user based on criteria:
     state, education, occupation, age, gender
+
+    `schemes` may also be an EligibilityIndex or a memory-mapped SchemeSnapshot,
+    which return the same schemes without scanning every criterion.
     """
-    recommendations = []
+    if hasattr(schemes, "match"):
+        return schemes.match(user)
+
+    return [scheme for _, scheme, _ in top_k(score_schemes(user, schemes), 5)]
+
+
+def top_k(scored: Iterable[Tuple[int, Dict, int]], k: Optional[int] = 5) -> List[Tuple[int, Dict, int]]:
+    """
+    Best k (position, scheme, score) by score, earlier position first on ties.
+    Holds at most k entries, so a streamed catalog is never materialised; k=None keeps all.
+    """
+    if k is None:
+        return sorted(scored, key=itemgetter(2), reverse=True)
+    # nlargest is stable: equal scores keep input order, like the sort it replaces
+    return heapq.nlargest(k, scored, key=itemgetter(2))
+
 
+def score_schemes(user: Dict, schemes: Iterable[Dict]) -> Iterator[Tuple[int, Dict, int]]:
+    """Yield (position, scheme, best criterion score) for each scheme the user is eligible for, in input order."""
     user_state = user.get("state", "").strip().lower()
     user_edu = (user.get("education") or "").strip().lower()
     user_occ = (user.get("occupation") or "").strip().lower()
     user_age = user.get("age")
     user_gender = (user.get("gender") or "").strip().lower()
 
-    for scheme in schemes:
+    for position, scheme in enumerate(schemes):
         eligibilities = scheme.get("eligible") or []
         max_score = 0
 
@@ -99,19 +140,396 @@ def check_eligibility(user: Dict, schemes: List[Dict]) -> List[Dict]:
                 max_score = score
 
         if max_score > 0:
-            recommendations.append({"scheme": scheme, "score": max_score})
+            yield position, scheme, max_score
+
+
+# -----------------------------
+# Streaming catalog input
+# -----------------------------
+READ_CHUNK = 1 << 16
+
+
+def iter_json_records(f: IO[str], chunk_size: int = READ_CHUNK) -> Iterator[Dict]:
+    """
+    Yield the records of a JSON array or a JSONL / concatenated-JSON stream one
+    at a time. Only the unparsed tail of the input is buffered, so memory is
+    bounded by the largest record, not the file.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof, in_array, started = "", 0, False, False, False
+    while True:
+        # Skip separators between records
+        while pos < len(buf) and (buf[pos].isspace() or buf[pos] == "," and in_array):
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                if in_array:
+                    raise ValueError("Unterminated JSON array")
+                return
+            buf, pos = f.read(chunk_size), 0
+            eof = not buf
+            continue
+        if not started:
+            started = True
+            if buf[pos] == "[":
+                in_array, pos = True, pos + 1
+                continue
+        if in_array and buf[pos] == "]":
+            return
+
+        try:
+            record, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Probably a record cut by the chunk boundary: read more (doubling, so huge records stay linear)
+            more = f.read(max(chunk_size, len(buf) - pos))
+            buf, pos, eof = buf[pos:] + more, 0, not more
+            continue
+        yield record
+        pos = end
+
+
+# -----------------------------
+# Persistent worker (JSON lines)
+# -----------------------------
+class SchemeCatalog:
+    """
+    Warm, reloadable copy of the schemes file and its EligibilityIndex.
+    Checks borrow `index` through checking(); reload swaps it atomically
+    so in-flight checks keep the snapshot they started with.
+    A scheme_snapshot.py file is memory-mapped and used as the index directly;
+    a replaced snapshot is closed once the last check using it finishes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.schemes: List[Dict] = []
+        self.index = None
+        self.mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._readers: Dict[int, int] = {}     # id(index) -> checks in flight
+        self._retired: List = []               # replaced snapshots still being read
+        # Set from the SIGHUP handler, which must not take the lock (it may
+        # interrupt a reload holding it); the serve loop performs the reload
+        self.reload_requested = False
+        if path:
+            self.reload()
+
+    def reload(self, path: Optional[str] = None) -> int:
+        from eligibility_index import EligibilityIndex
+        from scheme_snapshot import SchemeSnapshot, is_snapshot
+
+        with self._lock:
+            if path:
+                self.path = path
+            if not self.path:
+                return 0
+            mtime = os.path.getmtime(self.path)
+            old = self.index
+            if is_snapshot(self.path):
+                schemes = index = SchemeSnapshot.open(self.path)
+            else:
+                with open(self.path) as f:
+                    schemes = json.load(f)
+                index = EligibilityIndex.build(schemes)
+            self.schemes, self.index, self.mtime = schemes, index, mtime
+            if isinstance(old, SchemeSnapshot):
+                self._retired.append(old)
+                self._close_retired()
+            return len(schemes)
+
+    def _close_retired(self):
+        """Close replaced snapshots that no check is reading any more (caller holds the lock)."""
+        for old in [s for s in self._retired if id(s) not in self._readers]:
+            self._retired.remove(old)
+            old.close()
+
+    @contextmanager
+    def checking(self):
+        """The current index, kept open until the block using it exits."""
+        with self._lock:
+            index = self.index
+            self._readers[id(index)] = self._readers.get(id(index), 0) + 1
+        try:
+            yield index
+        finally:
+            with self._lock:
+                self._readers[id(index)] -= 1
+                if not self._readers[id(index)]:
+                    del self._readers[id(index)]
+                    self._close_retired()
+
+    def request_reload(self):
+        """Signal-safe: mark the catalog for reload_if_requested()."""
+        self.reload_requested = True
+
+    def reload_if_requested(self) -> bool:
+        """Perform a reload asked for by request_reload(); called from the serve loop."""
+        if not self.reload_requested:
+            return False
+        self.reload_requested = False
+        try:
+            self.reload()
+        except (OSError, ValueError) as e:
+            print(f"❌ Reload failed: {e}", file=sys.stderr)
+        return True
+
+    def refresh_if_changed(self) -> bool:
+        """Reload when the schemes file was modified since the last load."""
+        if not self.path:
+            return False
+        try:
+            changed = os.path.getmtime(self.path) != self.mtime
+        except OSError:
+            return False
+        if changed:
+            self.reload()
+        return changed
+
+
+def handle_request(request: Dict, catalog: SchemeCatalog) -> Dict:
+    """
+    Handle one worker request:
+      {"id": 1, "op": "check", "user": {...}, "schemes": [...]}   (schemes optional, defaults to catalog)
+      {"id": 2, "op": "reload", "path": "schemes.json"}           (path optional)
+      {"id": 3, "op": "ping"}
+    """
+    req_id = request.get("id")
+    op = request.get("op", "check")
+    try:
+        if op == "check":
+            schemes = request.get("schemes")
+            if schemes is not None:
+                result = check_eligibility(request.get("user") or {}, schemes)
+            else:
+                catalog.refresh_if_changed()
+                with catalog.checking() as index:
+                    result = index.match(request.get("user") or {}) if index else []
+        elif op == "reload":
+            result = {"schemes": catalog.reload(request.get("path"))}
+        elif op == "ping":
+            result = {"schemes": len(catalog.schemes)}
+        else:
+            return {"id": req_id, "ok": False, "error": f"Unknown op: {op}"}
+        return {"id": req_id, "ok": True, "result": result}
+    except Exception as e:
+        return {"id": req_id, "ok": False, "error": str(e)}
+
+
+def _serve_lines(lines: Iterable[str], write, catalog: SchemeCatalog):
+    for line in lines:
+        catalog.reload_if_requested()
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {"id": None, "ok": False, "error": f"Invalid JSON: {e}"}
+        else:
+            response = handle_request(request, catalog)
+        write(json.dumps(response, ensure_ascii=False) + "\n")
+
+
+def serve_stdio(catalog: SchemeCatalog):
+    """Answer JSON-line requests from stdin on stdout, in order."""
+    def write(data: str):
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+    _serve_lines(sys.stdin, write, catalog)
+
+
+def serve_socket(socket_path: str, catalog: SchemeCatalog):
+    """Answer JSON-line requests on a Unix socket, one thread per connection."""
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (raw.decode("utf-8") for raw in self.rfile)
+
+            def write(data: str):
+                self.wfile.write(data.encode("utf-8"))
+                self.wfile.flush()
+
+            _serve_lines(lines, write, catalog)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        def service_actions(self):
+            # Runs between polls of serve_forever, so a SIGHUP reload waits at most one poll
+            catalog.reload_if_requested()
+
+    server = Server(socket_path, Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+class EligibilityClient:
+    """
+    Send many checks to a running worker over one connection.
+
+        with EligibilityClient(socket_path="/tmp/eligibility.sock") as client:
+            top = client.check(user)
+            results = client.check_many(users)
+
+    Without a socket path the client starts its own stdio worker.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, schemes_file: Optional[str] = None):
+        self._next_id = 0
+        self._proc = None
+        self._sock = None
+        if socket_path:
+            import socket
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(socket_path)
+            self._reader = self._sock.makefile("r", encoding="utf-8")
+            self._writer = self._sock.makefile("w", encoding="utf-8")
+        else:
+            import subprocess
+            cmd = [sys.executable, os.path.abspath(__file__), "--serve"]
+            if schemes_file:
+                cmd += ["--schemes", schemes_file]
+            self._proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8"
+            )
+            self._reader = self._proc.stdout
+            self._writer = self._proc.stdin
+
+    def _send(self, request: Dict) -> int:
+        self._next_id += 1
+        request["id"] = self._next_id
+        self._writer.write(json.dumps(request, ensure_ascii=False) + "\n")
+        return self._next_id
+
+    def _receive(self, req_id: int):
+        response = json.loads(self._reader.readline())
+        if response.get("id") != req_id:
+            raise RuntimeError(f"Out-of-order response: expected {req_id}, got {response.get('id')}")
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error"))
+        return response["result"]
+
+    def check(self, user: Dict, schemes: Optional[List[Dict]] = None) -> List[Dict]:
+        return self.check_many([user], schemes)[0]
+
+    def check_many(self, users: List[Dict], schemes: Optional[List[Dict]] = None) -> List[List[Dict]]:
+        """Pipeline all requests before reading any response."""
+        ids = []
+        for user in users:
+            request = {"op": "check", "user": user}
+            if schemes is not None:
+                request["schemes"] = schemes
+            ids.append(self._send(request))
+        self._writer.flush()
+        return [self._receive(req_id) for req_id in ids]
+
+    def reload(self, path: Optional[str] = None) -> int:
+        req_id = self._send({"op": "reload", "path": path})
+        self._writer.flush()
+        return self._receive(req_id)["schemes"]
+
+    def close(self):
+        if self._sock:
+            self._sock.close()
+        if self._proc:
+            self._proc.stdin.close()
+            self._proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def serve_main(argv: List[str]):
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Persistent eligibility worker (JSON lines)")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--schemes", help="schemes JSON file kept warm between requests")
+    parser.add_argument("--socket", help="serve on this Unix socket instead of stdin/stdout")
+    args = parser.parse_args(argv)
+
+    catalog = SchemeCatalog(args.schemes)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: catalog.request_reload())
+
+    if args.socket:
+        serve_socket(args.socket, catalog)
+    else:
+        serve_stdio(catalog)
+
+
+def stream_main(argv: List[str]):
+    """
+    Top-k for one user over a catalog read record by record, printed as JSON
+    lines (best first): {"position", "id", "score"}, plus "scheme" with --full.
+    Peak memory is k records, whatever the catalog size.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Top-k eligible schemes for one user, streaming the catalog")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("user", help="user JSON file")
+    parser.add_argument("schemes", help="JSON array or JSONL of schemes, a scheme_snapshot.py file, or - for stdin")
+    parser.add_argument("-k", "--top-k", type=int, default=5, help="results to keep (0 = every eligible scheme)")
+    parser.add_argument("--full", action="store_true", help="include the full scheme record in each line")
+    args = parser.parse_args(argv)
+
+    with open(args.user) as f:
+        user = json.load(f)
+    k = args.top_k or None
+
+    def emit(position: int, scheme_id, score: int, scheme=None):
+        line = {"position": position, "id": scheme_id, "score": score}
+        if args.full:
+            line["scheme"] = scheme
+        sys.stdout.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    from scheme_snapshot import SchemeSnapshot, is_snapshot
+
+    if args.schemes != "-" and is_snapshot(args.schemes):
+        with SchemeSnapshot.open(args.schemes) as snapshot:
+            scored = snapshot.scores(user)
+            for position, score in scored if k is None else scored[:k]:
+                emit(position, snapshot.scheme_id(position) or None, score,
+                     snapshot.scheme(position) if args.full else None)
+        return
 
-    # Sort by score descending and take top 5
-    recommendations.sort(key=lambda x: x["score"], reverse=True)
-    top_schemes = [r["scheme"] for r in recommendations[:5]]
-    return top_schemes
+    f = sys.stdin if args.schemes == "-" else open(args.schemes, encoding="utf-8")
+    try:
+        for position, scheme, score in top_k(score_schemes(user, iter_json_records(f)), k):
+            emit(position, scheme.get("id"), score, scheme)
+    finally:
+        if f is not sys.stdin:
+            f.close()
 
 
 if __name__ == "__main__":
-    import sys
+    if "--serve" in sys.argv[1:]:
+        serve_main(sys.argv[1:])
+        sys.exit(0)
+    if "--stream" in sys.argv[1:]:
+        stream_main(sys.argv[1:])
+        sys.exit(0)
 
     if len(sys.argv) != 3:
-        print("Usage: python user_eligibility.py user.json schemes.json")
+        print("Usage: python user_eligibility.py user.json schemes.json|schemes.jsonl|schemes.snap")
+        print("       python user_eligibility.py --stream user.json schemes.json|schemes.jsonl|schemes.snap|- "
+              "[-k 5] [--full]")
+        print("       python user_eligibility.py --serve [--schemes schemes.json] [--socket PATH]")
         sys.exit(1)
 
     user_file = sys.argv[1]
@@ -120,8 +538,13 @@ if __name__ == "__main__":
     with open(user_file) as f:
         user_data = json.load(f)
 
-    with open(schemes_file) as f:
-        schemes_data = json.load(f)
+    from scheme_snapshot import SchemeSnapshot, is_snapshot
 
-    top_schemes = check_eligibility(user_data, schemes_data)
+    if is_snapshot(schemes_file):
+        # Exported with scheme_snapshot.py: mapped, not parsed
+        top_schemes = check_eligibility(user_data, SchemeSnapshot.open(schemes_file))
+    else:
+        # Streamed record by record; only the current top 5 stay in memory
+        with open(schemes_file, encoding="utf-8") as f:
+            top_schemes = check_eligibility(user_data, iter_json_records(f))
     print(json.dumps(top_schemes, indent=2))
@@ -0,0 +1,443 @@
+# src/scripts/user_index.py
+# Reverse of eligibility_index: posting lists over user profiles, so the users
+# matching a newly parsed scheme are found by intersecting postings and range
+# lookups instead of scanning every user.
+#
+# Profile edits are appended to `<index>.log` (one JSON line per user) instead of
+# rewriting the index file; loading replays the log, and `match` folds it into
+# the index file once it holds COMPACT_AFTER edits.
+import os
+import json
+import fcntl
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional, Iterable, Iterator
+
+from canonical import ministry_id, state_key
+from eligibility_index import normalize_values, normalize_states, user_state_key
+
+USER_INDEX_VERSION = 2
+DEFAULT_BATCH = 500
+COMPACT_AFTER = 1000        # logged edits before they are folded into the index file
+PROFILE_FIELDS = ("state", "age", "gender", "occupation", "education", "castecategory", "income")
+
+
+def _norm(value) -> str:
+    return (value or "").strip().lower() if isinstance(value, str) or value is None else str(value).lower()
+
+
+class _RangeIndex:
+    """Sorted (value, user id) pairs for users that have the value; the rest are kept in `unknown`."""
+
+    def __init__(self):
+        self.keys: List = []
+        self.ids: List[str] = []
+        self.unknown: set = set()
+
+    def add(self, uid: str, value):
+        if value is None:
+            self.unknown.add(uid)
+            return
+        i = bisect_left(self.keys, value)
+        self.keys.insert(i, value)
+        self.ids.insert(i, uid)
+
+    def extend(self, pairs: Iterable[tuple]):
+        """Bulk add (uid, value) pairs with one sort instead of one insert each."""
+        known = list(zip(self.keys, self.ids))
+        for uid, value in pairs:
+            if value is None:
+                self.unknown.add(uid)
+            else:
+                known.append((value, uid))
+        known.sort(key=lambda pair: pair[0])
+        self.keys = [value for value, _ in known]
+        self.ids = [uid for _, uid in known]
+
+    def discard(self, uid: str, value):
+        if value is None:
+            self.unknown.discard(uid)
+            return
+        i = bisect_left(self.keys, value)
+        while i < len(self.keys) and self.keys[i] == value:
+            if self.ids[i] == uid:
+                del self.keys[i]
+                del self.ids[i]
+                return
+            i += 1
+
+    def count_between(self, low=None, high=None) -> int:
+        lo = 0 if low is None else bisect_left(self.keys, low)
+        hi = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return max(hi - lo, 0)
+
+    def between(self, low=None, high=None) -> set:
+        """Users whose value is within [low, high], plus every user whose value is unknown."""
+        lo = 0 if low is None else bisect_left(self.keys, low)
+        hi = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return set(self.ids[lo:hi]) | self.unknown
+
+
+class UserIndex:
+    """
+    Posting lists keyed by normalised state, education, occupation, gender and
+    caste category, plus sorted age and income. A criterion matches a user the
+    way check_eligibility scores it (state, education or occupation, gender,
+    age when both are known), except that a criterion naming no education or
+    occupation matches on the rest, as notifications went to a whole state.
+    With strict matching the criterion's caste category and income ceiling are
+    applied too, keeping users who left them blank.
+    """
+
+    def __init__(self):
+        self.profiles: Dict[str, list] = {}          # user id -> [state, edu, occ, gender, caste, age, income]
+        self.by_state: Dict[str, set] = {}
+        self.by_education: Dict[str, set] = {}
+        self.by_occupation: Dict[str, set] = {}
+        self.by_gender: Dict[str, set] = {}
+        self.by_caste: Dict[str, set] = {}
+        self.ages = _RangeIndex()
+        self.incomes = _RangeIndex()
+
+    # -----------------------------
+    # Building / incremental updates
+    # -----------------------------
+    @classmethod
+    def build(cls, users: Iterable[Dict]) -> "UserIndex":
+        index = cls()
+        for user in users:
+            index.upsert(user, ranges=False)
+        index.ages.extend((uid, p[5]) for uid, p in index.profiles.items())
+        index.incomes.extend((uid, p[6]) for uid, p in index.profiles.items())
+        return index
+
+    def _postings(self):
+        return (self.by_state, self.by_education, self.by_occupation, self.by_gender, self.by_caste)
+
+    def upsert(self, user: Dict, ranges: bool = True):
+        """Index a user, replacing the previous profile after an edit."""
+        uid = str(user["id"])
+        self.remove(uid)
+        profile = [
+            user_state_key(user), _norm(user.get("education")), _norm(user.get("occupation")),
+            _norm(user.get("gender")), _norm(user.get("castecategory")),
+            user.get("age"), user.get("income"),
+        ]
+        self.profiles[uid] = profile
+        for postings, value in zip(self._postings(), profile):
+            postings.setdefault(value, set()).add(uid)
+        if ranges:      # build() sorts the ranges once at the end instead
+            self.ages.add(uid, profile[5])
+            self.incomes.add(uid, profile[6])
+
+    def remove(self, uid: str) -> bool:
+        profile = self.profiles.pop(str(uid), None)
+        if profile is None:
+            return False
+        for postings, value in zip(self._postings(), profile):
+            postings[value].discard(uid)
+            if not postings[value]:
+                del postings[value]
+        self.ages.discard(uid, profile[5])
+        self.incomes.discard(uid, profile[6])
+        return True
+
+    # -----------------------------
+    # Matching
+    # -----------------------------
+    @staticmethod
+    def _union(postings: Dict[str, set], values: Iterable[str]) -> set:
+        result = set()
+        for v in values:
+            result |= postings.get(v, set())
+        return result
+
+    def _range_filter(self, candidates: set, ranges: _RangeIndex, field: int, low, high) -> set:
+        # Intersect with the range when it is the smaller side, otherwise test each candidate.
+        if ranges.count_between(low, high) + len(ranges.unknown) < len(candidates):
+            return candidates & ranges.between(low, high)
+        return {
+            uid for uid in candidates
+            if self.profiles[uid][field] is None or (
+                (low is None or self.profiles[uid][field] >= low) and
+                (high is None or self.profiles[uid][field] <= high))
+        }
+
+    def match_criterion(self, elig: Dict, strict: bool = True, scored: bool = False) -> set:
+        """
+        User ids matched by one parsed `eligible` criterion. A criterion without
+        education or occupation matches on state (and the other filters) alone;
+        with `scored`, it matches nobody, as in check_eligibility.
+        """
+        education, occupation = normalize_values(elig.get("education")), normalize_values(elig.get("occupation"))
+        states = normalize_states(elig.get("state"))
+        if education or occupation:
+            candidates = self._union(self.by_education, education) | self._union(self.by_occupation, occupation)
+            if states is None:      # any state, but check_eligibility never matches a user without one
+                candidates = {uid for uid in candidates if self.profiles[uid][0]}
+            elif candidates:
+                candidates &= self._union(self.by_state, states)
+        # No education / occupation ("resident of Goa", age or gender-only rules): everyone in the state
+        elif scored:
+            return set()
+        elif states is None:
+            candidates = {uid for uid, profile in self.profiles.items() if profile[0]}
+        else:
+            candidates = self._union(self.by_state, states)
+
+        if elig.get("gender") and candidates:
+            candidates &= self._union(self.by_gender, normalize_values(elig.get("gender")))
+        if (elig.get("minAge") is not None or elig.get("maxAge") is not None) and candidates:
+            candidates = self._range_filter(candidates, self.ages, 5, elig.get("minAge"), elig.get("maxAge"))
+
+        if strict and candidates:
+            caste = _norm(elig.get("castecategory"))
+            if caste:
+                candidates &= self.by_caste.get(caste, set()) | self.by_caste.get("", set())
+            if elig.get("income") is not None and candidates:
+                candidates = self._range_filter(candidates, self.incomes, 6, None, elig["income"])
+        return candidates
+
+    def match_scheme(self, scheme: Dict, strict: bool = True) -> List[str]:
+        """
+        Sorted ids of users matched by any of the scheme's criteria. A scheme that
+        has not been parsed yet falls back to its state, as /api/schemes/notify
+        did: users in that state, or everyone when the state names the ministry
+        (by prefix, or as another spelling of the same ministry).
+        """
+        criteria = [e for e in scheme.get("eligible") or [] if isinstance(e, dict)]
+        matched = set()
+        if criteria:
+            for elig in criteria:
+                matched |= self.match_criterion(elig, strict)
+            return sorted(matched)
+
+        states = scheme.get("state") or []
+        states = [s.strip() for s in ([states] if isinstance(states, str) else states) if s and s.strip()]
+        ministry = _norm(scheme.get("ministry"))
+        if ministry and any(s.lower().startswith(ministry) or ministry_id(s) == ministry_id(ministry) != 0
+                            for s in states):
+            return sorted(self.profiles)
+        return sorted(self._union(self.by_state, [state_key(s) for s in states]))
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def to_dict(self) -> Dict:
+        return {"version": USER_INDEX_VERSION, "profiles": self.profiles}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "UserIndex":
+        # Version 1 kept each state's raw spelling; rebuilding re-keys it under state_key
+        if data.get("version") not in (1, USER_INDEX_VERSION):
+            raise ValueError(f"Unsupported user index version: {data.get('version')}")
+        return cls.build(
+            {"id": uid, "state": state, "education": edu, "occupation": occ,
+             "gender": gender, "castecategory": caste, "age": age, "income": income}
+            for uid, (state, edu, occ, gender, caste, age, income) in data["profiles"].items()
+        )
+
+    def save(self, path: str):
+        # Write-then-rename so a concurrent reader never sees a half-written index
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "UserIndex":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+@contextmanager
+def locked(path: str):
+    """Exclusive lock on `path`.lock for a load / modify / save cycle, so concurrent updates don't drop edits."""
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def log_path(path: str) -> str:
+    return f"{path}.log"
+
+
+def append_edits(path: str, edits: Iterable[Dict]) -> int:
+    """
+    Log edited users ({id, profile fields} or {id, deleted: true}) for the index at
+    `path`; the cost is the edit, not the index. Hold locked(path). Returns the count.
+    """
+    count = 0
+    with open(log_path(path), "a") as f:
+        for user in edits:
+            entry = {"id": str(user["id"])}
+            if user.get("deleted"):
+                entry["deleted"] = True
+            else:
+                entry.update((field, user.get(field)) for field in PROFILE_FIELDS)
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def replay_log(index: "UserIndex", path: str) -> int:
+    """Apply the edits logged for `path` to index. Returns how many were applied."""
+    if not os.path.exists(log_path(path)):
+        return 0
+    count = 0
+    with open(log_path(path)) as f:
+        for line in f:
+            try:
+                user = json.loads(line)
+            except ValueError:      # blank, or torn by a crash mid-append
+                continue
+            if user.get("deleted"):
+                index.remove(user["id"])
+            else:
+                index.upsert(user)
+            count += 1
+    return count
+
+
+def save_compacted(index: "UserIndex", path: str):
+    """Write the index with every logged edit applied and drop the log. Hold locked(path)."""
+    index.save(path)
+    if os.path.exists(log_path(path)):
+        os.remove(log_path(path))
+
+
+def batches(user_ids: List[str], size: int = DEFAULT_BATCH) -> Iterator[List[str]]:
+    for start in range(0, len(user_ids), size):
+        yield user_ids[start:start + size]
+
+
+# -----------------------------
+# Prisma sources
+# -----------------------------
+async def _db_users(db) -> List[Dict]:
+    return [
+        {"id": u.id, **{field: getattr(u, field) for field in PROFILE_FIELDS}}
+        for u in await db.user.find_many()
+    ]
+
+
+async def _db_scheme(db, scheme_id: str) -> Optional[Dict]:
+    scheme = await db.scheme.find_unique(where={"id": scheme_id})
+    if scheme is None:
+        return None
+    return {"id": scheme.id, "state": scheme.state, "ministry": scheme.ministry, "eligible": scheme.eligible}
+
+
+async def _with_db(fn):
+    from prisma import Prisma
+
+    db = Prisma()
+    await db.connect()
+    try:
+        return await fn(db)
+    finally:
+        await db.disconnect()
+
+
+def load_or_build(path: str) -> "UserIndex":
+    """
+    The saved index with its logged edits applied, or a full one built from Prisma
+    (and saved) when the file is missing or has an unsupported version.
+    Hold locked(path).
+    """
+    import sys
+    import asyncio
+
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        try:
+            index = UserIndex.from_dict(data)
+        except ValueError as e:
+            print(f"⚠️ Rebuilding {path}: {e}", file=sys.stderr)
+        else:
+            replayed = replay_log(index, path)
+            # Migrated, or enough edits logged that replaying them costs more than a rewrite
+            if data.get("version") != USER_INDEX_VERSION or replayed >= COMPACT_AFTER:
+                save_compacted(index, path)
+            return index
+    # The database already holds every logged edit
+    index = UserIndex.build(asyncio.run(_with_db(_db_users)))
+    save_compacted(index, path)
+    return index
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Reverse index from scheme criteria to user ids")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="index every user")
+    build.add_argument("index", help="index JSON file to write")
+    build.add_argument("users", nargs="?", help="users JSON array (default: read from Prisma)")
+
+    match = sub.add_parser("match", help="emit matching user ids as JSON line batches")
+    match.add_argument("index", help="index JSON file (built from Prisma when missing)")
+    match.add_argument("scheme", nargs="?", help="scheme JSON file with `eligible`")
+    match.add_argument("--scheme-id", help="read the scheme from Prisma instead")
+    match.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    match.add_argument("--loose", action="store_true", help="ignore caste category and income ceilings")
+
+    update = sub.add_parser("update", help="re-index edited or new users (appended to the index log)")
+    update.add_argument("index", help="index JSON file")
+    update.add_argument("users", nargs="?", default="-",
+                        help="user JSON object, array or JSON lines ('-' for stdin); {id, deleted: true} removes")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.users:
+            with open(args.users) as f:
+                users_data = json.load(f)
+        else:
+            users_data = asyncio.run(_with_db(_db_users))
+        with locked(args.index):
+            save_compacted(UserIndex.build(users_data), args.index)
+        print(f"✅ Indexed {len(users_data)} users", file=sys.stderr)
+
+    elif args.command == "match":
+        with locked(args.index):
+            index = load_or_build(args.index)
+        if args.scheme_id:
+            scheme_data = asyncio.run(_with_db(lambda db: _db_scheme(db, args.scheme_id)))
+            if scheme_data is None:
+                print(json.dumps({"error": "Scheme not found"}))
+                sys.exit(1)
+        elif args.scheme:
+            with open(args.scheme) as f:
+                scheme_data = json.load(f)
+        else:
+            parser.error("a scheme file or --scheme-id is required")
+
+        # One JSON line per batch: {"schemeId", "batch", "userIds"}
+        matched = index.match_scheme(scheme_data, strict=not args.loose)
+        for number, user_ids in enumerate(batches(matched, args.batch_size)):
+            print(json.dumps({"schemeId": scheme_data.get("id"), "batch": number, "userIds": user_ids}),
+                  flush=True)
+
+    elif args.command == "update":
+        source = sys.stdin if args.users == "-" else open(args.users)
+        with source:
+            content = source.read().strip()
+        try:
+            edits = json.loads(content) if content else []
+        except ValueError:
+            edits = [json.loads(line) for line in content.splitlines() if line.strip()]
+        if isinstance(edits, dict):
+            edits = [edits]
+
+        # Only the edits are written; a missing index is built from every user (the
+        # edits included) by the next `match`, which replays the log on top of it
+        with locked(args.index):
+            append_edits(args.index, edits)
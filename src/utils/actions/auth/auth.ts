@@ -4,6 +4,7 @@ import Google from "next-auth/providers/google";
 import Credentials from "next-auth/providers/credentials";
 import bcrypt from "bcryptjs";
 import { prisma } from "../database/prisma";
+import { indexUsers } from "../notifications/userIndex";
 export const runtime = "nodejs";
 
 interface AuthUser {
@@ -98,6 +99,7 @@ export const { handlers, signIn, signOut, auth } = NextAuth({
 
           user.id = newUser.id;
           user.role = newUser.role;
+          await indexUsers([newUser]);
         }
       }
       return true;
@@ -0,0 +1,90 @@
+// src/utils/actions/eligibility/eligibilityWorker.ts
+// One long-lived `user_eligibility.py --serve` process per server,
+// requests multiplexed over its stdin/stdout as JSON lines.
+// Callers send the schemes to check with each request (the routes send the one
+// scheme being viewed), so the worker saves the interpreter start and imports
+// per check; it is not started with a --schemes catalog.
+import { spawn, ChildProcessWithoutNullStreams } from "child_process";
+import path from "path";
+import readline from "readline";
+
+// A request without a response by then is rejected; the worker is assumed hung
+const REQUEST_TIMEOUT_MS = 10_000;
+
+type Pending = {
+  resolve: (value: unknown) => void;
+  reject: (reason: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+let worker: ChildProcessWithoutNullStreams | null = null;
+let nextId = 0;
+const pending = new Map<number, Pending>();
+
+function failAll(error: Error) {
+  for (const p of pending.values()) {
+    clearTimeout(p.timer);
+    p.reject(error);
+  }
+  pending.clear();
+}
+
+// Drop this worker (spawn failure, broken pipe, exit, hang); the next request starts a new one
+function discard(py: ChildProcessWithoutNullStreams, error: Error) {
+  if (worker === py) worker = null;
+  failAll(error);
+}
+
+function getWorker(): ChildProcessWithoutNullStreams {
+  if (worker) return worker;
+
+  const scriptPath = path.join(process.cwd(), "src/scripts/user_eligibility.py");
+  const py = spawn("python3", [scriptPath, "--serve"]);
+
+  readline.createInterface({ input: py.stdout }).on("line", (line) => {
+    try {
+      const response = JSON.parse(line);
+      const p = pending.get(response.id);
+      if (!p) return;
+      pending.delete(response.id);
+      clearTimeout(p.timer);
+      if (response.ok) p.resolve(response.result);
+      else p.reject(new Error(response.error));
+    } catch (err) {
+      console.error("❌ Invalid eligibility worker output:", line, err);
+    }
+  });
+
+  py.stderr.on("data", (data) => console.error("❌ Eligibility worker:", data.toString()));
+
+  // Without these listeners ENOENT (no python3) or EPIPE (worker died) would crash the server
+  py.on("error", (err) => {
+    console.error("❌ Eligibility worker failed:", err);
+    discard(py, err);
+  });
+  py.stdin.on("error", (err) => discard(py, err));
+
+  py.on("exit", (code) => {
+    discard(py, new Error(`Eligibility worker exited with code ${code}`));
+  });
+
+  worker = py;
+  return py;
+}
+
+/**
+ * Run check_eligibility in the shared Python worker.
+ */
+export function checkEligibilityInWorker<T = unknown>(user: unknown, schemes: unknown): Promise<T> {
+  const py = getWorker();
+  const id = ++nextId;
+
+  return new Promise<T>((resolve, reject) => {
+    const timer = setTimeout(() => {
+      pending.delete(id);
+      reject(new Error(`Eligibility worker did not answer within ${REQUEST_TIMEOUT_MS} ms`));
+    }, REQUEST_TIMEOUT_MS);
+    pending.set(id, { resolve: resolve as (value: unknown) => void, reject, timer });
+    py.stdin.write(JSON.stringify({ id, op: "check", user, schemes }) + "\n");
+  });
+}
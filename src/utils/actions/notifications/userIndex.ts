@@ -0,0 +1,24 @@
+// src/utils/actions/notifications/userIndex.ts
+// Keep the new-scheme notification index (src/scripts/user_index.py) in step with
+// user rows: each created or edited user is appended to the index log.
+import { spawn } from "child_process";
+import path from "path";
+
+const USER_INDEX = "src/scripts/.user_index.json";
+
+export function indexUsers(users: Record<string, unknown>[]): Promise<void> {
+  if (users.length === 0) return Promise.resolve();
+
+  return new Promise((resolve) => {
+    const scriptPath = path.join(process.cwd(), "src/scripts/user_index.py");
+    const py = spawn("python3", [scriptPath, "update", path.join(process.cwd(), USER_INDEX)]);
+    py.on("error", (err) => {
+      console.error("⚠️ Failed to update user index:", err);
+      resolve();
+    });
+    py.stdin.on("error", (err) => console.error("⚠️ User index stdin:", err.message));
+    py.stderr.on("data", (data) => console.error("⚠️ User index update:", data.toString()));
+    py.on("close", () => resolve());
+    py.stdin.end(users.map((user) => JSON.stringify(user)).join("\n") + "\n");
+  });
+}
@@ -0,0 +1,21 @@
+// src/utils/actions/schemes/categorize.ts
+// Fill Scheme.categories for schemes that were just created or re-fetched, so they
+// show up in the category routes without waiting for the nightly categorize.py run.
+import { spawn } from "child_process";
+import path from "path";
+
+export function categorizeSchemes(ids: string[]): Promise<void> {
+  if (ids.length === 0) return Promise.resolve();
+
+  return new Promise((resolve) => {
+    const scriptPath = path.join(process.cwd(), "src/scripts/categorize.py");
+    const py = spawn("python3", [scriptPath, "--db", "--ids", "-"]);
+    py.on("error", (err) => {
+      console.error("⚠️ Failed to categorize schemes:", err);
+      resolve();
+    });
+    py.stderr.on("data", (data) => console.error("⚠️ Categorize:", data.toString()));
+    py.on("close", () => resolve());
+    py.stdin.end(ids.join("\n") + "\n");
+  });
+}